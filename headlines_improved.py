@@ -1,18 +1,21 @@
-import urllib.request, urllib.parse, json, sqlite3
+import os
+import sqlite3
 from datetime import datetime, timedelta
 
-API_KEY = "YOUR_API_KEY"
-conn = sqlite3.connect("news.db")
+from lang_app import http_client
+
+API_KEY = os.environ.get("NEWSAPI_KEY", "YOUR_API_KEY")
+NEWSAPI_URL = os.environ.get("NEWSAPI_URL", "https://newsapi.org/v2/everything")
+conn = sqlite3.connect(os.environ.get("NEWS_DB_PATH", "news.db"))
 c = conn.cursor()
 c.execute('''CREATE TABLE IF NOT EXISTS headlines (
     id INTEGER PRIMARY KEY, title TEXT UNIQUE, description TEXT, published_at TEXT)''')
 
 def fetch_news(topic):
     try:
-        url = "https://newsapi.org/v2/everything?" + urllib.parse.urlencode({
+        r = http_client.get(NEWSAPI_URL, params={
             "q": topic, "apiKey": API_KEY, "pageSize": 5, "sortBy": "publishedAt", "language": "en"
-        })
-        r = json.loads(urllib.request.urlopen(url).read().decode())
+        }).json()
         
         if r.get("status") != "ok":
             print(f"API Error: {r.get('message', 'Unknown error')}")
@@ -51,10 +54,11 @@ def delete_old(days):
     except Exception as e:
         print(f"Error: {e}\n")
 
-while True:
-    print("1. Fetch news  2. Search  3. Delete old  4. Exit")
-    ch = input("Choice: ")
-    if ch == '1': fetch_news(input("Topic: "))
-    elif ch == '2': search(input("Keyword: "))
-    elif ch == '3': delete_old(int(input("Days old: ")))
-    elif ch == '4': break
+if __name__ == "__main__":
+    while True:
+        print("1. Fetch news  2. Search  3. Delete old  4. Exit")
+        ch = input("Choice: ")
+        if ch == '1': fetch_news(input("Topic: "))
+        elif ch == '2': search(input("Keyword: "))
+        elif ch == '3': delete_old(int(input("Days old: ")))
+        elif ch == '4': break
@@ -1,126 +1,116 @@
+import hashlib
+import json
+import logging
 from datetime import datetime, timedelta
-from collections import defaultdict
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify, request
 from flask_login import current_user, login_required
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 
+from . import response_cache, stats
 from .extensions import db
-from .models import Task, VocabEntry, Assignment
+from .models import Task, UserDailyStats, UserLanguageStats, UserStats
 
 analytics_bp = Blueprint("analytics", __name__)
+logger = logging.getLogger(__name__)
 
 
 @analytics_bp.route("/dashboard", methods=["GET"])
 @login_required
 def dashboard():
-    """Get comprehensive dashboard data for the current user."""
+    """Get comprehensive dashboard data for the current user.
+
+    The payload is cached per user until one of their writes bumps their
+    cache version, and is served with an ETag so unchanged polls get a 304.
+    """
+    user_id = current_user.id
+    today = datetime.utcnow().date().isoformat()
+    version = response_cache.version(user_id)
+    cached = response_cache.lookup("dashboard", user_id, version)
+    # Date windows (last 30 days, next 7 days) move at midnight even without writes.
+    if cached and cached["day"] == today:
+        return _conditional_json(cached["payload"], cached["etag"])
+
     try:
-        # Task statistics
-        all_tasks = Task.query.filter_by(user_id=current_user.id).all()
-        completed_tasks = [t for t in all_tasks if t.is_completed]
-        pending_tasks = [t for t in all_tasks if not t.is_completed]
-        
-        # Tasks by completion status
-        task_completion_data = {
-            "completed": len(completed_tasks),
-            "pending": len(pending_tasks),
-            "total": len(all_tasks)
-        }
-        
-        # Tasks created over time (last 30 days)
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_tasks = Task.query.filter(
-            Task.user_id == current_user.id,
-            Task.created_at >= thirty_days_ago
-        ).all()
-        
-        tasks_by_date = defaultdict(int)
-        for task in recent_tasks:
-            if task.created_at:
-                date_key = task.created_at.date().isoformat()
-                tasks_by_date[date_key] += 1
-        
-        # Vocabulary statistics
-        all_vocab = VocabEntry.query.filter_by(user_id=current_user.id).all()
-        vocab_by_language = defaultdict(int)
-        for entry in all_vocab:
-            vocab_by_language[entry.target_language] += 1
-        
-        # Vocabulary growth over time (last 30 days)
-        recent_vocab = VocabEntry.query.filter(
-            VocabEntry.user_id == current_user.id,
-            VocabEntry.created_at >= thirty_days_ago
-        ).all()
-        
-        vocab_by_date = defaultdict(int)
-        for entry in recent_vocab:
-            if entry.created_at:
-                date_key = entry.created_at.date().isoformat()
-                vocab_by_date[date_key] += 1
-        
-        # Upcoming tasks (next 7 days)
         seven_days_ahead = datetime.utcnow().date() + timedelta(days=7)
+
+        # Counters come from the materialized stats tables (see stats.py),
+        # so these are primary-key lookups whatever the size of the history.
+        totals = db.session.get(UserStats, user_id)
+        if totals is None:
+            # No stats row yet (user predates the table): backfill this user once.
+            stats.backfill_stats(user_id)
+            db.session.commit()
+            totals = db.session.get(UserStats, user_id) or UserStats(
+                tasks_total=0, tasks_completed=0, vocab_total=0, assignments_total=0,
+                assignments_completed=0, assignment_score_sum=0.0, assignment_score_count=0,
+            )
+
+        vocab_by_language = {
+            row.language: row.vocab_count for row in db.session.scalars(language_counts_query(user_id))
+        }
+        tasks_by_date = {}
+        vocab_by_date = {}
+        for row in db.session.scalars(daily_counts_query(user_id, thirty_days_ago.date())):
+            if row.tasks_created:
+                tasks_by_date[row.day.isoformat()] = row.tasks_created
+            if row.vocab_created:
+                vocab_by_date[row.day.isoformat()] = row.vocab_created
+        total_vocab = totals.vocab_total
+
+        # Upcoming tasks (next 7 days)
         try:
-            upcoming_tasks = Task.query.filter(
-                and_(
-                    Task.user_id == current_user.id,
-                    Task.due_date.isnot(None),
-                    Task.due_date <= seven_days_ahead,
-                    Task.is_completed == False
-                )
-            ).order_by(Task.due_date).all()
+            upcoming_tasks = db.session.execute(upcoming_tasks_query(user_id, seven_days_ahead)).all()
         except Exception:
             # Fallback if there's an issue with the query
             upcoming_tasks = []
-        
-        # Assignment statistics
-        all_assignments = Assignment.query.filter_by(user_id=current_user.id).all()
-        completed_assignments = [a for a in all_assignments if a.is_completed]
-        pending_assignments = [a for a in all_assignments if not a.is_completed]
-        
-        assignment_scores = [a.score for a in completed_assignments if a.score is not None]
-        avg_score = sum(assignment_scores) / len(assignment_scores) if assignment_scores else 0
-        
-        return jsonify({
+
+        task_completion_data = {
+            "completed": totals.tasks_completed,
+            "pending": totals.tasks_total - totals.tasks_completed,
+            "total": totals.tasks_total
+        }
+        avg_score = (
+            totals.assignment_score_sum / totals.assignment_score_count
+            if totals.assignment_score_count else 0
+        )
+
+        payload = {
             "tasks": {
                 "completion": task_completion_data,
-                "created_over_time": dict(tasks_by_date),
+                "created_over_time": tasks_by_date,
                 "upcoming": [
                     {
                         "id": t.id,
                         "name": t.name,
                         "due_date": t.due_date.isoformat() if t.due_date else None
                     }
-                    for t in upcoming_tasks[:5]  # Limit to 5
+                    for t in upcoming_tasks
                 ]
             },
             "vocabulary": {
-                "total": len(all_vocab),
-                "by_language": dict(vocab_by_language),
-                "learned_over_time": dict(vocab_by_date)
+                "total": total_vocab,
+                "by_language": vocab_by_language,
+                "learned_over_time": vocab_by_date
             },
             "assignments": {
-                "total": len(all_assignments),
-                "completed": len(completed_assignments),
-                "pending": len(pending_assignments),
+                "total": totals.assignments_total,
+                "completed": totals.assignments_completed,
+                "pending": totals.assignments_total - totals.assignments_completed,
                 "average_score": round(avg_score, 1) if avg_score > 0 else None
             },
             "summary": {
-                "total_tasks": len(all_tasks),
-                "completed_tasks": len(completed_tasks),
-                "total_vocab_words": len(all_vocab),
+                "total_tasks": totals.tasks_total,
+                "completed_tasks": totals.tasks_completed,
+                "total_vocab_words": total_vocab,
                 "languages_studied": len(vocab_by_language),
-                "total_assignments": len(all_assignments),
-                "completed_assignments": len(completed_assignments)
+                "total_assignments": totals.assignments_total,
+                "completed_assignments": totals.assignments_completed
             }
-        })
+        }
     except Exception as e:
-        # Return error details for debugging
-        import traceback
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error("Dashboard error: %s", traceback.format_exc())
+        logger.exception("Dashboard error")
         
         error_msg = str(e)
         error_type = type(e).__name__
@@ -133,3 +123,49 @@ def dashboard():
             "hint": "Make sure the database is initialized with 'flask --app lang_app.app:create_app init-db'"
         }), 500
 
+    etag = hashlib.md5(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    response_cache.store(
+        "dashboard", user_id, version,
+        {"day": today, "payload": payload, "etag": etag},
+        ttl=current_app.config.get("DASHBOARD_CACHE_TTL"),
+    )
+    return _conditional_json(payload, etag)
+
+
+def language_counts_query(user_id: int):
+    return select(UserLanguageStats).where(UserLanguageStats.user_id == user_id, UserLanguageStats.vocab_count > 0)
+
+
+def daily_counts_query(user_id: int, since):
+    return (
+        select(UserDailyStats)
+        .where(UserDailyStats.user_id == user_id, UserDailyStats.day >= since)
+        .order_by(UserDailyStats.day)
+    )
+
+
+def upcoming_tasks_query(user_id: int, until):
+    """Open tasks due by ``until``, soonest first (at most five)."""
+    return (
+        select(Task.id, Task.name, Task.due_date)
+        .where(
+            and_(
+                Task.user_id == user_id,
+                Task.due_date.isnot(None),
+                Task.due_date <= until,
+                Task.is_completed == False
+            )
+        )
+        .order_by(Task.due_date)
+        .limit(5)
+    )
+
+
+def _conditional_json(payload, etag):
+    """JSON response that answers a matching If-None-Match with 304 Not Modified."""
+    response = jsonify(payload)
+    response.set_etag(etag)
+    # Browsers keep the body but must revalidate on every poll.
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response.make_conditional(request)
+
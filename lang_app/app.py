@@ -1,9 +1,15 @@
 import os
 
+import click
 from flask import Flask, jsonify, render_template
 from flask_login import current_user
 
-from .extensions import db, init_mongo, login_manager
+from .engine_profile import engine_options, init_engine_profile
+from .event_buffer import init_events
+from .extensions import db, ensure_mongo_indexes, init_mongo, login_manager
+from .metrics import init_metrics
+from .passwords import init_password_hashing
+from .response_cache import init_response_cache
 
 
 def create_app(test_config=None):
@@ -14,23 +20,56 @@ def create_app(test_config=None):
             "DATABASE_URL", f"sqlite:///{os.path.join(app.root_path, 'app.db')}"
         ),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        # "tuned" (WAL and pragmas for SQLite, pool pre-ping for server
+        # databases; see engine_profile.py) or "default".
+        DB_ENGINE_PROFILE=os.environ.get("DB_ENGINE_PROFILE", "tuned"),
         # Optional MongoDB support; override via env if you want to use it.
         MONGO_URI=os.environ.get("MONGO_URI", ""),
         MONGO_DB_NAME=os.environ.get("MONGO_DB_NAME", "lang_app"),
+        # Per-user response cache: "memory" (single worker), "sqlite" (shared
+        # between gunicorn workers) or "none".
+        RESPONSE_CACHE_BACKEND=os.environ.get("RESPONSE_CACHE_BACKEND", "memory"),
+        RESPONSE_CACHE_PATH=os.environ.get(
+            "RESPONSE_CACHE_PATH", os.path.join(app.root_path, "response_cache.db")
+        ),
+        RESPONSE_CACHE_SIZE=int(os.environ.get("RESPONSE_CACHE_SIZE", "1024")),
+        DASHBOARD_CACHE_TTL=int(os.environ.get("DASHBOARD_CACHE_TTL", "300")),
+        # Request timing and /metrics (off by default). /metrics is only
+        # served with a METRICS_TOKEN; SERVER_TIMING adds a Server-Timing
+        # header to responses.
+        METRICS_ENABLED=os.environ.get("METRICS_ENABLED", "0") == "1",
+        METRICS_TOKEN=os.environ.get("METRICS_TOKEN", ""),
+        SERVER_TIMING=os.environ.get("SERVER_TIMING", "0") == "1",
+        # Password hashing: werkzeug method and cost (e.g. "scrypt:16384:8:1",
+        # "pbkdf2:sha256:600000"), and the process pool it runs in (0 = inline).
+        PASSWORD_HASH_METHOD=os.environ.get("PASSWORD_HASH_METHOD", "scrypt"),
+        PASSWORD_HASH_WORKERS=int(os.environ.get("PASSWORD_HASH_WORKERS", "2")),
+        PASSWORD_HASH_MAX_PENDING=int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "16")),
+        # Login and activity events: "auto" (MongoDB when configured, else
+        # JSONL at EVENT_LOG_PATH if set, else off), "mongo", "jsonl",
+        # "sqlite" or "none"; see event_buffer.py.
+        EVENT_SINK=os.environ.get("EVENT_SINK", "auto"),
+        EVENT_LOG_PATH=os.environ.get("EVENT_LOG_PATH", ""),
     )
     if test_config:
         app.config.update(test_config)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
 
     db.init_app(app)
+    init_engine_profile(app)
     login_manager.init_app(app)
     init_mongo(app)
+    init_events(app)
+    init_response_cache(app)
+    init_metrics(app)
+    init_password_hashing(app)
 
-    # Import models so Flask-Login can load them
-    from .models import User  # noqa: WPS433
+    # Users are loaded through a short-lived identity cache (no query per request)
+    from .identity_cache import identity_cache  # noqa: WPS433
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return identity_cache.load(int(user_id))
 
     # Blueprints
     from .auth import auth_bp  # noqa: WPS433
@@ -38,12 +77,14 @@ def create_app(test_config=None):
     from .vocab import vocab_bp  # noqa: WPS433
     from .analytics import analytics_bp  # noqa: WPS433
     from .assignments import assignments_bp  # noqa: WPS433
+    from .export import export_bp  # noqa: WPS433
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(tasks_bp, url_prefix="/api/tasks")
     app.register_blueprint(vocab_bp, url_prefix="/api/vocab")
     app.register_blueprint(analytics_bp, url_prefix="/api/analytics")
     app.register_blueprint(assignments_bp, url_prefix="/api/assignments")
+    app.register_blueprint(export_bp, url_prefix="/api/export")
 
     @app.route("/")
     def index():
@@ -67,25 +108,126 @@ def create_app(test_config=None):
 
     @app.cli.command("init-db")
     def init_db():
-        """Initialize the SQLite database."""
+        """Initialize the SQLite database (and the MongoDB indexes, if configured)."""
         with app.app_context():
             db.create_all()
-            # Add preferred_language column if it doesn't exist (migration)
+            # Add columns introduced after a table was first created (migration)
+            added_columns = [
+                ("user", "preferred_language", "VARCHAR(10)"),
+                ("vocab_entry", "ease", "FLOAT NOT NULL DEFAULT 2.5"),
+                ("vocab_entry", "interval_days", "INTEGER NOT NULL DEFAULT 0"),
+                ("vocab_entry", "repetitions", "INTEGER NOT NULL DEFAULT 0"),
+                ("vocab_entry", "due_at", "DATETIME"),
+                ("assignment", "answer_key", "TEXT"),
+            ]
             try:
                 from sqlalchemy import text
                 with db.engine.connect() as conn:
-                    # Check if column exists
-                    result = conn.execute(text("PRAGMA table_info(user)"))
-                    columns = [row[1] for row in result]
-                    if "preferred_language" not in columns:
-                        conn.execute(text("ALTER TABLE user ADD COLUMN preferred_language VARCHAR(10)"))
-                        conn.commit()
-                        print("Added preferred_language column to user table.")
+                    for table, column, ddl in added_columns:
+                        # Check if column exists
+                        result = conn.execute(text(f"PRAGMA table_info({table})"))
+                        columns = [row[1] for row in result]
+                        if column not in columns:
+                            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                            print(f"Added {column} column to {table} table.")
+                    # Existing words become due for review from when they were added
+                    conn.execute(
+                        text("UPDATE vocab_entry SET due_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE due_at IS NULL")
+                    )
+                    conn.commit()
             except Exception as e:
                 # If migration fails, it's okay - column might already exist
                 print(f"Migration note: {e}")
+            # create_all() skips tables that already exist, so create any
+            # indexes added to existing tables since they were first built.
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(db.engine, checkfirst=True)
+            if not ensure_mongo_indexes():
+                print("MongoDB user indexes not created; rerun init-db once MongoDB is reachable.")
             print("Database initialized.")
 
+    @app.cli.command("check-query-plans")
+    def check_query_plans_command():
+        """Fail if a hot query does a full table scan (SQLite EXPLAIN QUERY PLAN)."""
+        from .query_plans import check_query_plans  # noqa: WPS433
+
+        problems = check_query_plans()
+        for name, plan in problems.items():
+            print(f"{name}: full table scan or wrong index")
+            for line in plan:
+                print(f"    {line}")
+        if problems:
+            raise SystemExit(f"{len(problems)} hot query(ies) miss their index; run init-db to add indexes.")
+        print("All hot queries use indexes.")
+
+    @app.cli.command("rebuild-stats")
+    @click.option("--user-id", type=int, default=None, help="Only rebuild this user's stats.")
+    def rebuild_stats_command(user_id):
+        """Recompute the materialized dashboard stats from source tables."""
+        from .stats import rebuild_stats  # noqa: WPS433
+
+        rebuild_stats(user_id)
+        db.session.commit()
+        print("Stats rebuilt.")
+
+    @app.cli.command("check-stats")
+    @click.option("--user-id", type=int, default=None, help="Only check this user's stats.")
+    def check_stats_command(user_id):
+        """Verify the materialized dashboard stats against the source tables."""
+        from .stats import check_stats  # noqa: WPS433
+
+        problems = check_stats(user_id)
+        for problem in problems:
+            print(problem)
+        if problems:
+            raise SystemExit(f"{len(problems)} stats mismatch(es) found; run rebuild-stats to fix.")
+        print("Stats are consistent.")
+
+    @app.cli.command("email-worker")
+    @click.option("--once", is_flag=True, help="Deliver one batch and exit.")
+    def email_worker(once):
+        """Deliver queued emails from the outbox."""
+        from .email_utils import run_outbox_worker  # noqa: WPS433
+
+        run_outbox_worker(once=once)
+
+    @app.cli.command("send-task-reminders")
+    @click.option("--days", default=1, show_default=True, help="Remind about tasks due within this many days.")
+    @click.option("--batch-size", default=1000, show_default=True, help="Tasks fetched per query page.")
+    @click.option("--concurrency", default=4, show_default=True, help="SendGrid requests in flight.")
+    @click.option("--send/--queue-only", default=True, help="Deliver the queued digests right away.")
+    def send_task_reminders(days, batch_size, concurrency, send):
+        """Email each user a digest of their tasks that are due soon."""
+        from .reminders import dispatch_task_reminders  # noqa: WPS433
+
+        counts = dispatch_task_reminders(days=days, batch_size=batch_size, concurrency=concurrency, send=send)
+        print(f"Queued reminders for {counts['tasks']} task(s) across {counts['users']} user(s).")
+
+    @app.cli.command("migrate-assignment-content")
+    @click.option("--batch-size", type=int, default=500, show_default=True)
+    def migrate_assignment_content_command(batch_size):
+        """Move answer keys out of assignment content and store both compactly."""
+        from .assignments import migrate_assignment_content  # noqa: WPS433
+
+        migrated = migrate_assignment_content(batch_size=batch_size)
+        print(f"Migrated {migrated} assignment(s).")
+
+    @app.cli.command("warm-starter-sets")
+    @click.option("--language", "languages", multiple=True, help="Only these language codes (repeatable).")
+    @click.option("--force", is_flag=True, help="Rebuild sets that are already stored.")
+    @click.option("--deadline", type=float, default=30.0, show_default=True, help="Seconds to wait per language.")
+    def warm_starter_sets_command(languages, force, deadline):
+        """Prebuild the basic-assignment starter sets for every supported language."""
+        from .starter_sets import warm_starter_sets  # noqa: WPS433
+
+        statuses = warm_starter_sets(list(languages) or None, force=force, deadline=deadline)
+        for language, status in statuses.items():
+            print(f"{language}: {status}")
+        incomplete = [language for language, status in statuses.items() if status.startswith("incomplete")]
+        if incomplete:
+            raise SystemExit(f"{len(incomplete)} language(s) could not be fully translated; run again later.")
+
     return app
 
 
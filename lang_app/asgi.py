@@ -0,0 +1,265 @@
+"""Optional ASGI serving mode.
+
+    uvicorn --factory lang_app.asgi:create_asgi_app --host 0.0.0.0 --port $PORT
+
+Flask views stay synchronous and run in a thread pool (ASGI_WSGI_THREADS).
+The endpoints that spend most of their time waiting on LibreTranslate get
+that waiting done on the event loop first, with ``httpx``:
+
+- ``POST /api/vocab/``: the word's translation
+- ``POST /api/assignments/generate`` with ``type: basic``: the starter words
+
+The results go into the translation cache, so the view that runs next finds
+them there and only holds a thread for its database work. One worker can
+then keep hundreds of translations in flight. ``register`` and ``login``
+have no slow outbound calls left (emails go through the outbox); their
+MongoDB calls use the blocking driver and run in the thread pool like
+every other view.
+
+Needs the optional ``uvicorn`` and ``httpx`` packages (see requirements.txt).
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import httpx
+from werkzeug.wrappers import Request
+
+from . import metrics
+from .app import create_app
+from .extensions import db
+from .http_client import HTTP_POOL_MAXSIZE, HTTP_TIMEOUT
+from .models import StarterSet
+from .starter_sets import STARTER_SET_DEADLINE, STARTER_WORDS
+from .translation_cache import MISSING, translation_cache
+from .vocab import translation_endpoints
+
+logger = logging.getLogger(__name__)
+
+# Threads running Flask views, and outbound connections held by the event loop.
+ASGI_WSGI_THREADS = int(os.environ.get("ASGI_WSGI_THREADS", "32"))
+ASGI_HTTP_MAX_CONNECTIONS = int(os.environ.get("ASGI_HTTP_MAX_CONNECTIONS", "500"))
+
+
+class AsgiApp:
+    """ASGI wrapper around the Flask app with async prefetching of upstream I/O."""
+
+    def __init__(self, flask_app, threads: int = ASGI_WSGI_THREADS):
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi")
+        self.client = None
+        self.prefetchers = {
+            ("POST", "/api/vocab/"): self._prefetch_vocab,
+            ("POST", "/api/assignments/generate"): self._prefetch_starter_set,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.extend(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = bytes(body)
+
+        prefetch = self.prefetchers.get((scope["method"], scope["path"]))
+        if prefetch is not None:
+            try:
+                await prefetch(scope, body)
+            except Exception:  # noqa: BLE001
+                # The view will just do the work itself.
+                logger.exception("Prefetch failed for %s %s", scope["method"], scope["path"])
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._run_wsgi, scope, body, send, loop)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._get_client()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.client is not None:
+                    await self.client.aclose()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _get_client(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=HTTP_TIMEOUT,
+                transport=_TimedTransport(
+                    limits=httpx.Limits(
+                        max_connections=ASGI_HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=HTTP_POOL_MAXSIZE,
+                    ),
+                ),
+            )
+        return self.client
+
+    # -- WSGI bridge ---------------------------------------------------------
+
+    def _run_wsgi(self, scope, body: bytes, send, loop) -> None:
+        """Run the Flask app for one request on a pool thread, streaming its output."""
+
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers]
+
+        result = self.flask_app(_environ(scope, body), start_response)
+        try:
+            sent_start = False
+            for chunk in result:
+                if not chunk:
+                    continue
+                if not sent_start:
+                    send_sync({"type": "http.response.start", **started})
+                    sent_start = True
+                send_sync({"type": "http.response.body", "body": chunk, "more_body": True})
+            if not sent_start:
+                send_sync({"type": "http.response.start", **started})
+            send_sync({"type": "http.response.body", "body": b""})
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+    # -- prefetchers ---------------------------------------------------------
+
+    def _logged_in(self, scope) -> bool:
+        # Only spend upstream calls on requests the view will accept.
+        session = self.flask_app.session_interface.open_session(self.flask_app, Request(_environ(scope, b"")))
+        return bool(session and session.get("_user_id"))
+
+    async def _prefetch_vocab(self, scope, body: bytes) -> None:
+        data = json.loads(body or b"{}")
+        source_word = str(data.get("source_word", "")).strip()
+        target_language = str(data.get("target_language", "")).strip()
+        if source_word and target_language and self._logged_in(scope):
+            await self.prefetch_translations([source_word], target_language)
+
+    async def _prefetch_starter_set(self, scope, body: bytes) -> None:
+        data = json.loads(body or b"{}")
+        language = data.get("language")
+        if data.get("type") != "basic" or not language or not self._logged_in(scope):
+            return
+        loop = asyncio.get_running_loop()
+        stored = await loop.run_in_executor(self.executor, self._has_starter_set, language)
+        if not stored:
+            await self.prefetch_translations(STARTER_WORDS, language, deadline=STARTER_SET_DEADLINE)
+
+    async def prefetch_translations(self, texts, target: str, source: str = "auto", deadline=None) -> None:
+        """Translate cache misses concurrently on the event loop and cache the results.
+
+        Words still pending at ``deadline`` are cached as failures in memory
+        until their answer arrives, so the view does not wait for them again.
+        """
+        loop = asyncio.get_running_loop()
+        misses = await loop.run_in_executor(self.executor, self._cache_misses, list(texts), source, target)
+        if not misses:
+            return
+
+        client = self._get_client()
+        tasks = {
+            asyncio.ensure_future(
+                translation_endpoints.translate_async({"q": text, "source": source, "target": target}, client)
+            ): text
+            for text in misses
+        }
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            text = tasks[task]
+            translation_cache.set(text, source, target, None)
+            task.add_done_callback(partial(_cache_late_result, text, source, target))
+        results = {tasks[task]: task.result() for task in done}
+        await loop.run_in_executor(self.executor, self._cache_store, results, source, target)
+
+    def _cache_misses(self, texts, source: str, target: str) -> list:
+        with self.flask_app.app_context():
+            return [text for text in texts if translation_cache.get(text, source, target) is MISSING]
+
+    def _cache_store(self, results: dict, source: str, target: str) -> None:
+        with self.flask_app.app_context():
+            for text, translated in results.items():
+                translation_cache.set(text, source, target, translated)
+
+    def _has_starter_set(self, language: str) -> bool:
+        with self.flask_app.app_context():
+            return db.session.get(StarterSet, language) is not None
+
+
+class _TimedTransport(httpx.AsyncHTTPTransport):
+    """Reports every outbound call to ``metrics``, like ``http_client`` does."""
+
+    async def handle_async_request(self, request):
+        started = time.perf_counter()
+        status = None
+        try:
+            response = await super().handle_async_request(request)
+            status = response.status_code
+            return response
+        finally:
+            metrics.observe_outbound(str(request.url), status, time.perf_counter() - started)
+
+
+def _cache_late_result(text: str, source: str, target: str, task) -> None:
+    # Runs on the event loop (no app context), so only the in-memory tier is updated.
+    if not task.cancelled() and task.exception() is None:
+        translation_cache.set(text, source, target, task.result())
+
+
+def _environ(scope, body: bytes) -> dict:
+    """Build a WSGI environ for an ASGI HTTP scope."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin1").upper().replace("-", "_")
+        value = raw_value.decode("latin1")
+        if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[name] = value
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def create_asgi_app(test_config=None) -> AsgiApp:
+    """ASGI counterpart of ``create_app`` (use with ``uvicorn --factory``)."""
+    return AsgiApp(create_app(test_config))
@@ -1,41 +1,39 @@
-import json
 from datetime import datetime
 from random import choice, sample, shuffle
 
 from flask import Blueprint, jsonify, request
 from flask_login import current_user, login_required
+from sqlalchemy import select, update
+from sqlalchemy.orm import undefer
 
+from . import event_buffer, response_cache, scheduler, stats
 from .extensions import db
-from .models import Assignment, VocabEntry
+from .models import Assignment
+from .pagination import as_is, isoformat, list_response
+from .sampling import sample_vocab
+from .scheduler import review_words
+from .starter_sets import STARTER_WORDS, get_starter_set
 
 assignments_bp = Blueprint("assignments", __name__)
 
+ASSIGNMENT_FIELDS = {
+    "id": (Assignment.id, as_is),
+    "title": (Assignment.title, as_is),
+    "description": (Assignment.description, as_is),
+    "type": (Assignment.assignment_type, as_is),
+    "language": (Assignment.language, as_is),
+    "is_completed": (Assignment.is_completed, as_is),
+    "score": (Assignment.score, as_is),
+    "created_at": (Assignment.created_at, isoformat),
+    "completed_at": (Assignment.completed_at, isoformat),
+}
+
 
 @assignments_bp.route("/", methods=["GET"])
 @login_required
 def list_assignments():
-    """List all assignments for the current user."""
-    assignments = (
-        Assignment.query.filter_by(user_id=current_user.id)
-        .order_by(Assignment.created_at.desc())
-        .all()
-    )
-    return jsonify(
-        [
-            {
-                "id": a.id,
-                "title": a.title,
-                "description": a.description,
-                "type": a.assignment_type,
-                "language": a.language,
-                "is_completed": a.is_completed,
-                "score": a.score,
-                "created_at": a.created_at.isoformat() if a.created_at else None,
-                "completed_at": a.completed_at.isoformat() if a.completed_at else None,
-            }
-            for a in assignments
-        ]
-    )
+    """List all assignments for the current user (supports limit/cursor/fields)."""
+    return list_response(Assignment, [Assignment.user_id == current_user.id], ASSIGNMENT_FIELDS)
 
 
 @assignments_bp.route("/generate", methods=["POST"])
@@ -53,73 +51,71 @@ def generate_assignment():
     if assignment_type == "basic":
         pass  # Skip vocabulary check
     else:
-        # Get user's vocabulary for the language
-        vocab_entries = VocabEntry.query.filter_by(
-            user_id=current_user.id,
-            target_language=language
-        ).all()
-        
-        if len(vocab_entries) < 3:
+        # Count the user's vocabulary for the language from the materialized
+        # stats (or the source rows if the user has none yet); the generators
+        # sample only the words they use.
+        if stats.vocab_count(current_user.id, language) < 3:
             return jsonify({
                 "error": f"Not enough vocabulary words. Add at least 3 words in {language.upper()} to generate assignments."
             }), 400
     
-    # Get vocabulary entries if needed (not for basic)
-    vocab_entries = []
-    if assignment_type != "basic":
-        vocab_entries = VocabEntry.query.filter_by(
-            user_id=current_user.id,
-            target_language=language
-        ).all()
-    
-    # Generate assignment based on type
+    # Generate assignment based on type; each generator samples only the words it needs
     if assignment_type == "basic":
         assignment = _generate_basic_assignment(language)
     elif assignment_type == "translation":
-        assignment = _generate_translation_assignment(vocab_entries, language)
+        assignment = _generate_translation_assignment(current_user.id, language)
     elif assignment_type == "fill_blank":
-        assignment = _generate_fill_blank_assignment(vocab_entries, language)
+        assignment = _generate_fill_blank_assignment(current_user.id, language)
     elif assignment_type == "multiple_choice":
-        assignment = _generate_multiple_choice_assignment(vocab_entries, language)
+        assignment = _generate_multiple_choice_assignment(current_user.id, language)
     else:
         return jsonify({"error": "Invalid assignment type"}), 400
     
-    # Save assignment to database
+    # Save assignment to database, keeping the answers out of the question payload
+    content, answer_key = split_answer_key(assignment["content"])
     db_assignment = Assignment(
         user_id=current_user.id,
         title=assignment["title"],
         description=assignment.get("description"),
         assignment_type=assignment_type,
         language=language,
-        content=json.dumps(assignment["content"]),
+        content=content,
+        answer_key=answer_key,
     )
     db.session.add(db_assignment)
+    db.session.flush()
+    stats.assignment_created(db_assignment)
     db.session.commit()
+    response_cache.bump(current_user.id)
     
     return jsonify({
         "id": db_assignment.id,
         "title": assignment["title"],
         "type": assignment_type,
-        "content": assignment["content"],
+        "content": content,
     }), 201
 
 
 @assignments_bp.route("/<int:assignment_id>", methods=["GET"])
 @login_required
 def get_assignment(assignment_id):
-    """Get a specific assignment with its content."""
-    assignment = Assignment.query.filter_by(
+    """Get a specific assignment with its content (answers only once completed)."""
+    assignment = Assignment.query.options(undefer(Assignment.content), undefer(Assignment.answer_key)).filter_by(
         id=assignment_id,
         user_id=current_user.id
     ).first_or_404()
     
+    content, answer_key = split_answer_key(assignment.content, assignment.answer_key)
+    if assignment.is_completed:
+        content["answers"] = answer_key["answers"]
+    
     return jsonify({
         "id": assignment.id,
         "title": assignment.title,
         "description": assignment.description,
         "type": assignment.assignment_type,
         "language": assignment.language,
-        "content": json.loads(assignment.content),
+        "content": content,
         "is_completed": assignment.is_completed,
         "score": assignment.score,
     })
@@ -129,7 +125,7 @@ def get_assignment(assignment_id):
 @login_required
 def submit_assignment(assignment_id):
     """Submit answers for an assignment and calculate score."""
-    assignment = Assignment.query.filter_by(
+    assignment = Assignment.query.options(undefer(Assignment.answer_key)).filter_by(
         id=assignment_id,
         user_id=current_user.id
     ).first_or_404()
@@ -140,19 +136,23 @@ def submit_assignment(assignment_id):
     data = request.get_json() or {}
     answers = data.get("answers", {})
     
-    # Load assignment content
-    content = json.loads(assignment.content)
-    correct_answers = content.get("answers", {})
+    # Load the answer key (rows from before the split keep it inside content)
+    answer_key = assignment.answer_key
+    if answer_key is None:
+        _, answer_key = split_answer_key(assignment.content)
+    correct_answers = answer_key["answers"]
     
     # Calculate score
     total = len(correct_answers)
     correct = 0
+    answered_correctly = set()
     
     for question_id, user_answer in answers.items():
         correct_answer = correct_answers.get(str(question_id), "")
         # Normalize answers for comparison
         if str(user_answer).strip().lower() == str(correct_answer).strip().lower():
             correct += 1
+            answered_correctly.add(str(question_id))
     
     score = (correct / total * 100) if total > 0 else 0
     
@@ -160,7 +160,27 @@ def submit_assignment(assignment_id):
     assignment.is_completed = True
     assignment.score = score
     assignment.completed_at = datetime.utcnow()
+    activity = {
+        "type": "assignment_submitted",
+        "user_id": current_user.id,
+        "assignment_id": assignment.id,
+        "assignment_type": assignment.assignment_type,
+        "language": assignment.language,
+        "score": score,
+        "correct": correct,
+        "total": total,
+        "timestamp": assignment.completed_at,
+    }
+    stats.assignment_completed(assignment)
+    # Reschedule the words behind each question (unanswered counts as wrong)
+    vocab_ids = answer_key.get("vocab_ids", {})
+    scheduler.record_reviews(
+        current_user.id,
+        {vocab_id: question_id in answered_correctly for question_id, vocab_id in vocab_ids.items()},
+    )
     db.session.commit()
+    response_cache.bump(current_user.id)
+    event_buffer.record("activity_events", activity)
     
     return jsonify({
         "message": "Assignment submitted",
@@ -171,9 +191,48 @@ def submit_assignment(assignment_id):
     })
 
 
-def _generate_translation_assignment(vocab_entries, language):
+def split_answer_key(content: dict, answer_key=None):
+    """Return ``(question payload, answer key)`` for new or pre-split content.
+
+    Assignments created before the split store ``answers`` and ``vocab_ids``
+    inside ``content``; those are moved into the answer key.
+    """
+    content = dict(content)
+    legacy_key = {"answers": content.pop("answers", {}), "vocab_ids": content.pop("vocab_ids", {})}
+    return content, answer_key if answer_key is not None else legacy_key
+
+
+def migrate_assignment_content(batch_size: int = 500) -> int:
+    """Split and re-encode assignments stored before the answer-key split.
+
+    Walks rows with no answer key in id order and rewrites each batch with
+    one executemany UPDATE, so the new columns are written in the compact
+    encoding. Returns the number of rows migrated; commits per batch.
+    """
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Assignment.id, Assignment.content)
+            .where(Assignment.answer_key.is_(None), Assignment.id > last_id)
+            .order_by(Assignment.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return migrated
+        updates = []
+        for row in rows:
+            content, answer_key = split_answer_key(row.content)
+            updates.append({"id": row.id, "content": content, "answer_key": answer_key})
+        db.session.execute(update(Assignment), updates)
+        db.session.commit()
+        migrated += len(rows)
+        last_id = rows[-1].id
+
+
+def _generate_translation_assignment(user_id, language):
     """Generate a translation assignment."""
-    selected_words = sample(vocab_entries, min(5, len(vocab_entries)))
+    selected_words = review_words(user_id, 5, language)
     
     questions = {}
     answers = {}
@@ -190,14 +249,15 @@ def _generate_translation_assignment(vocab_entries, language):
         "description": "Translate the following words to your target language",
         "content": {
             "questions": questions,
-            "answers": answers
+            "answers": answers,
+            "vocab_ids": {str(idx): entry.id for idx, entry in enumerate(selected_words, 1)},
         }
     }
 
 
-def _generate_fill_blank_assignment(vocab_entries, language):
+def _generate_fill_blank_assignment(user_id, language):
     """Generate a fill-in-the-blank assignment."""
-    selected_words = sample(vocab_entries, min(5, len(vocab_entries)))
+    selected_words = review_words(user_id, 5, language)
     
     questions = {}
     answers = {}
@@ -238,21 +298,29 @@ def _generate_fill_blank_assignment(vocab_entries, language):
         "description": "Complete the sentences with the correct words",
         "content": {
             "questions": questions,
-            "answers": answers
+            "answers": answers,
+            "vocab_ids": {str(idx): entry.id for idx, entry in enumerate(selected_words, 1)},
         }
     }
 
 
-def _generate_multiple_choice_assignment(vocab_entries, language):
+def _generate_multiple_choice_assignment(user_id, language):
     """Generate a multiple choice assignment."""
-    selected_words = sample(vocab_entries, min(5, len(vocab_entries)))
+    selected_words = review_words(user_id, 5, language)
+    # Distractors come from the question words plus 3 random spares, so every
+    # question draws from a small pool instead of the whole vocabulary.
+    selected_ids = {entry.id for entry in selected_words}
+    spares = [
+        entry for entry in sample_vocab(user_id, 3 + len(selected_words), language) if entry.id not in selected_ids
+    ]
+    pool = selected_words + spares[:3]
     
     questions = {}
     answers = {}
     
     for idx, entry in enumerate(selected_words, 1):
         # Get wrong answers (distractors)
-        other_entries = [e for e in vocab_entries if e.id != entry.id]
+        other_entries = [e for e in pool if e.id != entry.id]
         wrong_answers = sample(other_entries, min(3, len(other_entries)))
         
         # Create options
@@ -272,43 +340,30 @@ def _generate_multiple_choice_assignment(vocab_entries, language):
         "description": "Choose the correct translation for each word",
         "content": {
             "questions": questions,
-            "answers": answers
+            "answers": answers,
+            "vocab_ids": {str(idx): entry.id for idx, entry in enumerate(selected_words, 1)},
         }
     }
 
 
 def _generate_basic_assignment(language):
     """Generate a basic starter assignment with common words."""
-    # Common starter words for any language
-    basic_words = {
-        "hello": "Hello",
-        "thank you": "Thank you",
-        "yes": "Yes",
-        "no": "No",
-        "please": "Please",
-        "goodbye": "Goodbye",
-        "sorry": "Sorry",
-        "excuse me": "Excuse me",
-        "water": "Water",
-        "food": "Food"
-    }
-    
-    # Try to get translations using the translation API
-    from .vocab import translate_word
+    # Stored per language once fully translated; otherwise translated
+    # concurrently under a deadline, keeping whatever arrived in time.
+    starter_words = get_starter_set(language)
     
     questions = {}
     answers = {}
     
-    for idx, (english_word, _) in enumerate(list(basic_words.items())[:5], 1):
-        try:
-            # Translate the word
-            translated = translate_word(english_word, language)
+    for idx, english_word in enumerate(STARTER_WORDS, 1):
+        translated = starter_words.get(english_word)
+        if translated:
             questions[str(idx)] = {
                 "question": f"Translate '{english_word}' to {language.upper()}",
                 "hint": f"English: {english_word}"
             }
             answers[str(idx)] = translated
-        except Exception:
+        else:
             # Fallback if translation fails
             questions[str(idx)] = {
                 "question": f"Learn the word: '{english_word}'",
@@ -1,13 +1,21 @@
+import logging
 from datetime import datetime
 
 from flask import Blueprint, jsonify, request
 from flask_login import current_user, login_required, login_user, logout_user
-from werkzeug.security import check_password_hash, generate_password_hash
+from pymongo.errors import DuplicateKeyError
 
+from . import event_buffer
 from .extensions import db, mongo_db
+from .identity_cache import identity_cache
 from .models import User
+from .passwords import HashingBusy, hash_password, needs_rehash, verify_password
 
 auth_bp = Blueprint("auth", __name__)
+logger = logging.getLogger(__name__)
+
+# Fields login reads from a Mongo user document.
+CREDENTIAL_FIELDS = {"password_hash": 1, "email": 1, "sql_user_id": 1}
 
 
 @auth_bp.route("/set-language", methods=["POST"])
@@ -26,8 +34,10 @@ def set_language():
             return jsonify({"error": "Invalid language code"}), 400
         
         # Update user's preferred language
+        user_id = current_user.id
         current_user.preferred_language = language_code
         db.session.commit()
+        identity_cache.invalidate(user_id)
         
         return jsonify({
             "message": "Language preference updated",
@@ -77,29 +87,34 @@ def register():
                 "error": f"Database query error: {str(query_error)}. Please ensure the database is initialized."
             }), 500
 
-        password_hash = generate_password_hash(password)
+        password_hash = hash_password(password)
 
-        # Primary user store: MongoDB (if configured)
-        mongo_user_id = None
-        if mongo_db is not None:
-            try:
-                mongo_user = mongo_db.users.insert_one(
-                    {
-                        "username": username,
-                        "email": email,
-                        "password_hash": password_hash,
-                        "created_at": datetime.utcnow(),
-                    }
-                )
-                mongo_user_id = str(mongo_user.inserted_id)
-            except Exception as mongo_error:
-                # If MongoDB fails, continue with SQL-only registration
-                pass
-
-        # Shadow SQL user for relationships and Flask-Login
+        # Shadow SQL user for relationships and Flask-Login. It is flushed
+        # first so the Mongo document can carry its id in a single insert.
         try:
             user = User(username=username, email=email, password_hash=password_hash)
             db.session.add(user)
+            db.session.flush()
+
+            # Primary user store: MongoDB (if configured)
+            if mongo_db is not None:
+                try:
+                    mongo_db.users.insert_one(
+                        {
+                            "username": username,
+                            "email": email,
+                            "password_hash": password_hash,
+                            "sql_user_id": user.id,
+                            "created_at": datetime.utcnow(),
+                        }
+                    )
+                except DuplicateKeyError:
+                    db.session.rollback()
+                    return jsonify({"error": "User already exists"}), 400
+                except Exception as mongo_error:
+                    # If MongoDB fails, continue with SQL-only registration
+                    logger.warning("Could not store user in MongoDB: %s", mongo_error)
+
             db.session.commit()
         except Exception as commit_error:
             db.session.rollback()
@@ -110,18 +125,8 @@ def register():
                 "error": f"Database error: {error_msg}. Please check your database connection."
             }), 500
 
-        # Back-link SQL id into Mongo for convenience (if Mongo is available)
-        if mongo_db is not None and mongo_user_id is not None:
-            try:
-                mongo_db.users.update_one(
-                    {"_id": mongo_user.inserted_id},
-                    {"$set": {"sql_user_id": user.id}},
-                )
-            except Exception:
-                # Non-critical error, continue
-                pass
-
         login_user(user)
+        identity_cache.remember(user)
         
         # Send welcome email (non-blocking, don't fail registration if email fails)
         try:
@@ -137,11 +142,10 @@ def register():
             ),
             201,
         )
+    except HashingBusy:
+        raise
     except Exception as e:
-        import traceback
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error("Registration error: %s", traceback.format_exc())
+        logger.exception("Registration error")
         return jsonify({
             "error": f"Registration failed: {str(e)}. Please check the server logs for details."
         }), 500
@@ -160,12 +164,14 @@ def login():
 
     success = False
     user = None
+    stored_hash = ""
 
     if mongo_db is not None:
-        # Primary: check MongoDB credentials
-        mongo_user = mongo_db.users.find_one({"username": username})
-        if mongo_user and check_password_hash(mongo_user.get("password_hash", ""), password):
+        # Primary: check MongoDB credentials (indexed on username)
+        mongo_user = mongo_db.users.find_one({"username": username}, CREDENTIAL_FIELDS)
+        if mongo_user and verify_password(mongo_user.get("password_hash", ""), password):
             success = True
+            stored_hash = mongo_user["password_hash"]
             # Ensure there is a corresponding SQL user row
             user = User.query.filter_by(username=username).first()
             if not user:
@@ -178,7 +184,7 @@ def login():
                 db.session.commit()
 
             # Keep sql_user_id up to date
-            if "sql_user_id" not in mongo_user or mongo_user["sql_user_id"] != user.id:
+            if mongo_user.get("sql_user_id") != user.id:
                 mongo_db.users.update_one(
                     {"_id": mongo_user["_id"]},
                     {"$set": {"sql_user_id": user.id}},
@@ -189,12 +195,13 @@ def login():
             user = User.query.filter_by(username=username).first()
             if user and user.check_password(password):
                 success = True
-                # Sync password to MongoDB if it exists there
-                if mongo_user:
+                stored_hash = user.password_hash
+                # Sync password to MongoDB if it exists there (a rehash below syncs it instead)
+                if mongo_user and not needs_rehash(stored_hash):
                     try:
                         mongo_db.users.update_one(
-                            {"username": username},
-                            {"$set": {"password_hash": user.password_hash}}
+                            {"_id": mongo_user["_id"]},
+                            {"$set": {"password_hash": user.password_hash, "sql_user_id": user.id}}
                         )
                     except Exception:
                         pass  # Non-critical
@@ -203,24 +210,20 @@ def login():
         user = User.query.filter_by(username=username).first()
         if user and user.check_password(password):
             success = True
+            stored_hash = user.password_hash
 
-    # Record login attempt details in MongoDB if configured.
-    if mongo_db is not None:
-        try:
-            mongo_db.login_events.insert_one(
-                {
-                    "username": username,
-                    "success": success,
-                    "timestamp": datetime.utcnow(),
-                }
-            )
-        except Exception:
-            pass  # Non-critical
+    # Record the login attempt; written in batches by a background thread,
+    # off the request path.
+    event_buffer.record("login_events", {"username": username, "success": success, "timestamp": datetime.utcnow()})
 
     if not success or user is None:
         return jsonify({"error": "Invalid credentials"}), 401
 
+    if needs_rehash(stored_hash):
+        _upgrade_password_hash(user, password)
+
     login_user(user)
+    identity_cache.remember(user)
     return jsonify({
         "message": "Logged in",
         "user": {
@@ -231,6 +234,25 @@ def login():
     })
 
 
+def _upgrade_password_hash(user, password: str) -> None:
+    """Re-hash a just-verified password under the current policy (best effort)."""
+    try:
+        user.password_hash = hash_password(password)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning("Could not upgrade password hash for %s: %s", user.username, e)
+        return
+    if mongo_db is not None:
+        try:
+            mongo_db.users.update_one(
+                {"username": user.username},
+                {"$set": {"password_hash": user.password_hash, "sql_user_id": user.id}}
+            )
+        except Exception:
+            pass  # Non-critical
+
+
 @auth_bp.route("/logout", methods=["POST"])
 @login_required
 def logout():
@@ -293,35 +315,29 @@ def reset_password():
         # Update password in SQL
         user.set_password(new_password)
         db.session.commit()
+        identity_cache.invalidate(user.id)
         
         # Update MongoDB if configured (sync after SQL commit to ensure consistency)
         if mongo_db is not None:
             try:
-                # Check if user exists in MongoDB
-                mongo_user = mongo_db.users.find_one({"username": username})
-                if mongo_user:
-                    # Update existing MongoDB user
-                    mongo_db.users.update_one(
-                        {"username": username},
-                        {"$set": {"password_hash": user.password_hash}}
-                    )
-                else:
-                    # Create MongoDB user if it doesn't exist (for consistency)
-                    mongo_db.users.insert_one({
-                        "username": username,
-                        "email": user.email,
-                        "password_hash": user.password_hash,
-                        "sql_user_id": user.id,
-                        "created_at": datetime.utcnow(),
-                    })
+                # Update the MongoDB user, or create it if missing (for consistency)
+                mongo_db.users.update_one(
+                    {"username": username},
+                    {
+                        "$set": {"password_hash": user.password_hash, "sql_user_id": user.id},
+                        "$setOnInsert": {"email": user.email, "created_at": datetime.utcnow()},
+                    },
+                    upsert=True,
+                )
             except Exception as e:
                 # Log but don't fail - SQL is the source of truth
-                print(f"Warning: Could not sync password to MongoDB: {e}")
-                pass
+                logger.warning("Could not sync password to MongoDB: %s", e)
         
         return jsonify({
             "message": "Password reset successfully. You can now login with your new password."
         }), 200
+    except HashingBusy:
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Failed to reset password: {str(e)}"}), 500
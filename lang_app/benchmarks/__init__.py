@@ -0,0 +1 @@
+# Benchmarks for lang_app; run one with `python -m lang_app.benchmarks.<name>`.
@@ -0,0 +1,107 @@
+"""Throughput and tail latency of sync (gunicorn) vs. async (uvicorn) serving.
+
+    python -m lang_app.benchmarks.asgi_load --users 200 --duration 20 --latency 0.3
+
+Starts a stub translator with a fixed latency, then for each mode runs the
+real server in a subprocess and has ``--users`` concurrent clients add new
+vocabulary words (every word a translation cache miss) for ``--duration``
+seconds. Both modes get the same number of worker processes.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import tempfile
+import time
+
+import httpx
+
+from .common import print_table
+from .load import PASSWORD, free_port, prepare_database, server_command, summarize, wait_ready
+from .stubs import start_translator
+
+
+async def _drive(base_url: str, users: int, duration: float, mode: str) -> dict:
+    clients = [httpx.AsyncClient(base_url=base_url, timeout=120) for _ in range(users)]
+    try:
+        logins = await asyncio.gather(
+            *(client.post("/api/auth/login", json={"username": f"load{i}", "password": PASSWORD})
+              for i, client in enumerate(clients))
+        )
+        assert all(response.status_code == 200 for response in logins), "login failed"
+
+        latencies = []
+        errors = 0
+        stop_at = time.monotonic() + duration
+
+        async def user(index: int, client) -> None:
+            nonlocal errors
+            count = 0
+            while time.monotonic() < stop_at:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/api/vocab/", json={"source_word": f"{mode}-{index}-{count}", "target_language": "es"}
+                    )
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += not ok
+                count += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(user(i, client) for i, client in enumerate(clients)))
+        elapsed = time.monotonic() - started
+    finally:
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    return {"mode": mode, **summarize("add_word", latencies, errors, elapsed)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200, help="Concurrent clients.")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load per mode.")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub translator latency in seconds.")
+    parser.add_argument("--workers", type=int, default=2, help="Server worker processes in both modes.")
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    args = parser.parse_args(argv)
+
+    translator, translator_url = start_translator(latency=args.latency)
+    results = []
+    try:
+        for mode in args.modes:
+            workdir = tempfile.mkdtemp(prefix=f"lang_app_load_{mode}_")
+            db_path = os.path.join(workdir, "load.db")
+            prepare_database(db_path, args.users)
+            port = free_port()
+            env = dict(
+                os.environ,
+                DATABASE_URL=f"sqlite:///{db_path}",
+                RESPONSE_CACHE_PATH=os.path.join(workdir, "response_cache.db"),
+                EVENT_LOG_PATH=os.path.join(workdir, "events.jsonl"),
+                LIBRE_TRANSLATE_URL=translator_url,
+                LIBRE_TRANSLATE_FALLBACK_URLS="",
+                TRANSLATE_HEDGE_AFTER="0",
+            )
+            server = subprocess.Popen(
+                server_command(mode, port, args.workers), env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                asyncio.run(wait_ready(base_url))
+                results.append(asyncio.run(_drive(base_url, args.users, args.duration, mode)))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+    finally:
+        translator.shutdown()
+
+    print_table(results, ["mode", "requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
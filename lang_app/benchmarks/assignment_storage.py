@@ -0,0 +1,114 @@
+"""Assignment storage size and submit-time decoding, before and after the
+answer-key split and compact encoding.
+
+    python -m lang_app.benchmarks.assignment_storage --assignments 500
+
+Generates real assignments through the API, rewrites them in the old
+layout (one plain JSON ``content`` blob holding questions and answers),
+measures, then runs ``migrate_assignment_content`` and measures again.
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import func, select, text, update
+
+from ..assignments import migrate_assignment_content
+from ..extensions import db
+from ..models import Assignment, CompressedJSON
+from .common import login, make_app, print_table, seed_rows
+
+TYPES = ["translation", "fill_blank", "multiple_choice"]
+
+
+def _stored_bytes(ids) -> float:
+    total = db.session.scalar(
+        select(
+            func.sum(
+                func.length(func.coalesce(text("assignment.content"), ""))
+                + func.length(func.coalesce(text("assignment.answer_key"), ""))
+            )
+        )
+        .select_from(Assignment)
+        .where(Assignment.id.in_(ids))
+    )
+    return round(total / len(ids), 1)
+
+
+def _decode_us(ids) -> float:
+    """Microseconds to decode what submit reads: the answer key, or legacy content."""
+    raw = db.session.execute(
+        text("SELECT content, answer_key FROM assignment WHERE id IN (%s)" % ",".join(map(str, ids)))
+    ).all()
+    decoder = CompressedJSON()
+    started = time.perf_counter()
+    for content, answer_key in raw:
+        decoder.process_result_value(answer_key if answer_key is not None else content, None)
+    return round((time.perf_counter() - started) / len(raw) * 1e6, 2)
+
+
+def _submit_ms(client, ids, answers) -> float:
+    db.session.execute(update(Assignment).where(Assignment.id.in_(ids)).values(is_completed=False))
+    db.session.commit()
+    samples = []
+    for assignment_id in ids:
+        started = time.perf_counter()
+        response = client.post(f"/api/assignments/{assignment_id}/submit", json={"answers": answers[assignment_id]})
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return round(statistics.median(samples), 3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--assignments", type=int, default=500)
+    parser.add_argument("--vocab", type=int, default=2000, help="Words per language pool to generate from.")
+    args = parser.parse_args(argv)
+
+    app = make_app()
+    client = app.test_client()
+    user_id = login(client)
+    with app.app_context():
+        seed_rows(user_id, args.vocab)
+
+    ids = []
+    answers = {}
+    for i in range(args.assignments):
+        response = client.post("/api/assignments/generate", json={"type": TYPES[i % len(TYPES)], "language": "es"})
+        assert response.status_code == 201, response.get_data(as_text=True)
+        ids.append(response.get_json()["id"])
+
+    results = []
+    with app.app_context():
+        # Rewrite the rows in the pre-split layout: one plain JSON blob.
+        for assignment in db.session.scalars(
+            select(Assignment).where(Assignment.id.in_(ids)).execution_options(populate_existing=True)
+        ):
+            legacy = {**assignment.content, **assignment.answer_key}
+            answers[assignment.id] = {qid: str(answer) for qid, answer in legacy["answers"].items()}
+            db.session.execute(
+                text("UPDATE assignment SET content = :content, answer_key = NULL WHERE id = :id"),
+                {"content": json.dumps(legacy), "id": assignment.id},
+            )
+        db.session.commit()
+
+        for phase in ("before", "after"):
+            if phase == "after":
+                migrate_assignment_content()
+            results.append(
+                {
+                    "layout": phase,
+                    "bytes_per_assignment": _stored_bytes(ids),
+                    "decode_us_per_submit": _decode_us(ids),
+                    "submit_p50_ms": _submit_ms(client, ids, answers),
+                }
+            )
+        db.engine.dispose()
+
+    print_table(results, ["layout", "bytes_per_assignment", "decode_us_per_submit", "submit_p50_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Helpers shared by the benchmark scripts."""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+
+from .. import stats
+from ..app import create_app
+from ..extensions import db
+from ..models import Assignment, Task, VocabEntry
+
+LANGUAGES = ["es", "fr", "de", "it", "pt"]
+
+
+def make_app(**config):
+    """App backed by a fresh SQLite file in a temp directory, tables created."""
+    workdir = tempfile.mkdtemp(prefix="lang_app_bench_")
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            "EVENT_LOG_PATH": os.path.join(workdir, "events.jsonl"),
+            **config,
+        }
+    )
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def login(client, username="bench", password="bench-password"):
+    """Register (or log in) a benchmark user through the API; returns its id."""
+    response = client.post(
+        "/api/auth/register",
+        json={"username": username, "email": f"{username}@example.com", "password": password},
+    )
+    if response.status_code != 201:
+        response = client.post("/api/auth/login", json={"username": username, "password": password})
+    return response.get_json()["user"]["id"]
+
+
+def seed_rows(user_id: int, rows: int, chunk: int = 10000, seed: int = 0) -> None:
+    """Bulk-insert ``rows`` tasks, vocab entries and assignments for a user.
+
+    Must run inside an app context. Uses Core executemany so seeding a few
+    hundred thousand rows takes seconds rather than minutes. The
+    materialized stats are rebuilt afterwards to match.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    today = date.today()
+    for start in range(0, rows, chunk):
+        count = min(chunk, rows - start)
+        created = [now - timedelta(days=rng.randint(0, 90), seconds=rng.randint(0, 86399)) for _ in range(count)]
+        db.session.execute(
+            insert(Task),
+            [
+                {
+                    "user_id": user_id,
+                    "name": f"task {start + i}",
+                    "due_date": today + timedelta(days=rng.randint(-10, 30)) if i % 2 else None,
+                    "is_completed": rng.random() < 0.4,
+                    "created_at": created[i],
+                }
+                for i in range(count)
+            ],
+        )
+        db.session.execute(
+            insert(VocabEntry),
+            [
+                {
+                    "user_id": user_id,
+                    "source_word": f"word{start + i}",
+                    "target_language": rng.choice(LANGUAGES),
+                    "translated_word": f"palabra{start + i}",
+                    "created_at": created[i],
+                }
+                for i in range(count)
+            ],
+        )
+        db.session.execute(
+            insert(Assignment),
+            [
+                {
+                    "user_id": user_id,
+                    "title": "Translation Practice",
+                    "assignment_type": "translation",
+                    "language": rng.choice(LANGUAGES),
+                    "content": {"questions": {}},
+                    "answer_key": {"answers": {}, "vocab_ids": {}},
+                    "is_completed": (done := rng.random() < 0.5),
+                    "score": rng.choice([40.0, 60.0, 80.0, 100.0]) if done else None,
+                    "created_at": created[i],
+                }
+                for i in range(count)
+            ],
+        )
+    stats.rebuild_stats(user_id)
+    db.session.commit()
+
+
+def time_call(fn, repeat: int = 20, warmup: int = 2) -> dict:
+    """Run ``fn`` repeatedly and summarize wall time in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(percentile(samples, 0.95), 2),
+        "mean_ms": round(statistics.fmean(samples), 2),
+    }
+
+
+def percentile(sorted_samples: list, q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0..1) of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * q))]
+
+
+def print_table(rows: list, columns: list) -> None:
+    widths = [max(len(str(col)), *(len(str(row.get(col, ""))) for row in rows)) for col in columns]
+    print("  ".join(str(col).rjust(width) for col, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row.get(col, "")).rjust(width) for col, width in zip(columns, widths)))
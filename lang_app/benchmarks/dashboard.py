@@ -0,0 +1,39 @@
+"""Dashboard latency vs. history size.
+
+    python -m lang_app.benchmarks.dashboard --sizes 1000 10000 50000
+"""
+
+import argparse
+
+from ..extensions import db
+from .common import login, make_app, print_table, seed_rows, time_call
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="Rows per table (tasks, vocab, assignments) for the user.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        app = make_app()
+        client = app.test_client()
+        user_id = login(client)
+        with app.app_context():
+            seed_rows(user_id, size)
+
+        def load():
+            response = client.get("/api/analytics/dashboard")
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+        results.append({"rows_per_table": size, **time_call(load, repeat=args.repeat)})
+        with app.app_context():
+            db.engine.dispose()
+
+    print_table(results, ["rows_per_table", "p50_ms", "p95_ms", "mean_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""SQLite under concurrent workers, with and without the tuned engine profile.
+
+    python -m lang_app.benchmarks.db_concurrency --workers 8 --duration 15 --write-ratio 0.3
+
+For each DB_ENGINE_PROFILE, seeds a fresh database file, then starts
+``--workers`` processes (like gunicorn sync workers), each logged in as its
+own user and issuing a random mix of reads (task, vocab and review lists,
+dashboard) and writes (create, complete and delete tasks) through the app.
+Reports throughput, latency and how many requests failed with "database is
+locked".
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from ..app import create_app
+from .common import percentile, print_table
+from .load import PASSWORD, prepare_database
+
+READS = ["/api/tasks/?limit=20", "/api/vocab/?limit=20", "/api/vocab/review", "/api/analytics/dashboard"]
+
+
+def _worker(db_path, profile, index, duration, write_ratio, ready, start, results):
+    config = {
+        "TESTING": True,  # let OperationalError propagate so lock failures can be told apart
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "DB_ENGINE_PROFILE": profile,
+        "RESPONSE_CACHE_BACKEND": "none",
+        "METRICS_ENABLED": False,
+    }
+    client = create_app(config).test_client()
+    response = client.post("/api/auth/login", json={"username": f"load{index}", "password": PASSWORD})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    rng = random.Random(index)
+    own_tasks = []
+    latencies = {"read": [], "write": []}
+    errors = {"lock": 0, "other": 0}
+
+    ready.put(index)
+    start.wait()
+    stop_at = time.monotonic() + duration
+    while time.monotonic() < stop_at:
+        kind = "write" if rng.random() < write_ratio else "read"
+        started = time.perf_counter()
+        try:
+            if kind == "read":
+                ok = client.get(rng.choice(READS)).status_code == 200
+            elif own_tasks and rng.random() < 0.5:
+                task_id = own_tasks.pop(rng.randrange(len(own_tasks)))
+                if rng.random() < 0.5:
+                    ok = client.patch(f"/api/tasks/{task_id}", json={"is_completed": True}).status_code == 200
+                else:
+                    ok = client.delete(f"/api/tasks/{task_id}").status_code == 200
+            else:
+                response = client.post("/api/tasks/", json={"name": f"task {rng.randrange(10 ** 6)}"})
+                ok = response.status_code == 201
+                if ok:
+                    own_tasks.append(response.get_json()["id"])
+            if not ok:
+                errors["other"] += 1
+        except OperationalError as e:
+            errors["lock" if "locked" in str(e) or "busy" in str(e) else "other"] += 1
+        latencies[kind].append((time.perf_counter() - started) * 1000)
+    results.put({"latencies": latencies, "errors": errors})
+
+
+def run_profile(profile: str, workers: int, duration: float, write_ratio: float, rows: int) -> dict:
+    db_path = os.path.join(tempfile.mkdtemp(prefix=f"lang_app_dbconc_{profile}_"), "bench.db")
+    # The journal mode is stored in the database file, so seed with the same profile.
+    prepare_database(db_path, workers, rows, DB_ENGINE_PROFILE=profile)
+
+    ctx = multiprocessing.get_context("spawn")
+    ready, results, start = ctx.Queue(), ctx.Queue(), ctx.Event()
+    processes = [
+        ctx.Process(target=_worker, args=(db_path, profile, i, duration, write_ratio, ready, start, results))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get(timeout=120)
+    start.set()
+    outcomes = [results.get(timeout=duration + 120) for _ in processes]
+    for process in processes:
+        process.join()
+
+    reads = sorted(latency for outcome in outcomes for latency in outcome["latencies"]["read"])
+    writes = sorted(latency for outcome in outcomes for latency in outcome["latencies"]["write"])
+    return {
+        "profile": profile,
+        "workers": workers,
+        "requests": len(reads) + len(writes),
+        "rps": round((len(reads) + len(writes)) / duration, 1),
+        "read_p50_ms": round(statistics.median(reads), 2) if reads else 0.0,
+        "read_p99_ms": round(percentile(reads, 0.99), 2),
+        "write_p50_ms": round(statistics.median(writes), 2) if writes else 0.0,
+        "write_p99_ms": round(percentile(writes, 0.99), 2),
+        "lock_errors": sum(outcome["errors"]["lock"] for outcome in outcomes),
+        "other_errors": sum(outcome["errors"]["other"] for outcome in outcomes),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent worker processes.")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load per profile.")
+    parser.add_argument("--write-ratio", type=float, default=0.3, help="Share of requests that write.")
+    parser.add_argument("--rows", type=int, default=2000, help="Rows of each kind seeded per user.")
+    parser.add_argument("--profiles", nargs="+", default=["default", "tuned"], choices=["default", "tuned"])
+    args = parser.parse_args(argv)
+
+    results = [run_profile(profile, args.workers, args.duration, args.write_ratio, args.rows) for profile in args.profiles]
+    print_table(
+        results,
+        ["profile", "workers", "requests", "rps", "read_p50_ms", "read_p99_ms",
+         "write_p50_ms", "write_p99_ms", "lock_errors", "other_errors"],
+    )
+
+
+if __name__ == "__main__":
+    main()
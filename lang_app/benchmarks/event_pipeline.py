@@ -0,0 +1,141 @@
+"""Throughput and backpressure of the buffered event log.
+
+    python -m lang_app.benchmarks.event_pipeline --events 50000
+    MONGO_URI=mongodb://localhost:27017 python -m lang_app.benchmarks.event_pipeline --sinks jsonl sqlite mongo
+
+Part one drains ``--events`` login-sized events into each sink with batches
+of one (the old write-per-event path) and of EVENT_BATCH_SIZE, and reports
+events written per second. Part two puts a sink that takes ``--slow-ms`` per
+batch behind a small buffer, lets ``--threads`` producers record as fast as
+they can, and reports what ``record`` cost them and how many events were
+dropped, with and without ``--full-wait-ms`` of backpressure.
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from .. import event_buffer, extensions
+from ..event_buffer import EVENT_BATCH_SIZE, EventBuffer, JsonlSink, MongoSink, SQLiteSink
+from .common import percentile, print_table
+
+
+class SlowSink:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def write(self, batch: list) -> None:
+        time.sleep(self.delay)
+
+
+def _event(i: int) -> dict:
+    return {"username": f"user{i % 1000}", "success": i % 10 != 0, "timestamp": datetime.utcnow()}
+
+
+def _make_sink(kind: str, workdir: str, mongo_uri: str):
+    if kind == "jsonl":
+        return JsonlSink(os.path.join(workdir, "events.jsonl"))
+    if kind == "sqlite":
+        return SQLiteSink(os.path.join(workdir, "events.db"))
+    from pymongo import MongoClient  # noqa: WPS433
+
+    client = MongoClient(mongo_uri)
+    client.drop_database("lang_app_bench_events")
+    extensions.mongo_db = client["lang_app_bench_events"]
+    return MongoSink()
+
+
+def drain(sink, events: int, batch_size: int) -> dict:
+    event_buffer.sink = sink
+    buffer = EventBuffer(events, batch_size, 3600, 0)
+    for i in range(events):
+        buffer.add("login_events", _event(i))
+    started = time.perf_counter()
+    buffer.flush()
+    elapsed = time.perf_counter() - started
+    stats = buffer.stats()
+    return {
+        "batch_size": batch_size,
+        "written": stats["written"],
+        "failed": stats["failed"],
+        "events_s": round(stats["written"] / elapsed),
+    }
+
+
+def overload(threads: int, duration: float, slow_ms: float, full_wait_ms: float, buffer_size: int) -> dict:
+    event_buffer.sink = SlowSink(slow_ms / 1000)
+    buffer = EventBuffer(buffer_size, 100, 0.05, full_wait_ms / 1000)
+    stop = threading.Event()
+    costs = []
+
+    def produce(offset):
+        samples = []
+        i = offset
+        while not stop.is_set():
+            started = time.perf_counter()
+            buffer.add("login_events", _event(i))
+            samples.append((time.perf_counter() - started) * 1e6)
+            i += threads
+        costs.extend(samples)
+
+    producers = [threading.Thread(target=produce, args=(i,)) for i in range(threads)]
+    for producer in producers:
+        producer.start()
+    time.sleep(duration)
+    stop.set()
+    for producer in producers:
+        producer.join()
+    stats = buffer.stats()
+    costs.sort()
+    return {
+        "full_wait_ms": full_wait_ms,
+        "recorded": stats["recorded"],
+        "written": stats["written"],
+        "waited": stats["waited"],
+        "dropped": stats["dropped"],
+        "record_p50_us": round(percentile(costs, 0.5), 1),
+        "record_p99_us": round(percentile(costs, 0.99), 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sinks", nargs="+", default=["jsonl", "sqlite"], choices=["jsonl", "sqlite", "mongo"])
+    parser.add_argument("--mongo-uri", default=os.environ.get("MONGO_URI", ""))
+    parser.add_argument("--events", type=int, default=20000, help="Events drained per sink and batch size.")
+    parser.add_argument("--threads", type=int, default=8, help="Producers in the overload run.")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds of the overload run.")
+    parser.add_argument("--slow-ms", type=float, default=50.0, help="Time the slow sink takes per batch.")
+    parser.add_argument("--full-wait-ms", type=float, default=5.0)
+    parser.add_argument("--buffer", type=int, default=1000, help="Buffer size in the overload run.")
+    args = parser.parse_args(argv)
+    if "mongo" in args.sinks and not args.mongo_uri:
+        parser.error("the mongo sink needs MONGO_URI or --mongo-uri")
+
+    workdir = tempfile.mkdtemp(prefix="lang_app_events_")
+    results = []
+    for kind in args.sinks:
+        sink = _make_sink(kind, workdir, args.mongo_uri)
+        for batch_size in (1, EVENT_BATCH_SIZE):
+            # Batches of one are slow; a tenth of the events is enough to measure them.
+            events = args.events // 10 if batch_size == 1 else args.events
+            results.append({"sink": kind, **drain(sink, events, batch_size)})
+    print_table(results, ["sink", "batch_size", "written", "failed", "events_s"])
+    print()
+
+    results = [
+        overload(args.threads, args.duration, args.slow_ms, full_wait_ms, args.buffer)
+        for full_wait_ms in (0.0, args.full_wait_ms)
+    ]
+    print_table(
+        results,
+        ["full_wait_ms", "recorded", "written", "waited", "dropped", "record_p50_us", "record_p99_us"],
+    )
+    event_buffer.sink = None
+
+
+if __name__ == "__main__":
+    main()
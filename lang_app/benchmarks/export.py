@@ -0,0 +1,92 @@
+"""Peak memory of a full ``/api/export`` stream.
+
+    python -m lang_app.benchmarks.export --rows 1000000 --max-rss-mb 200
+
+Seeds ``--rows`` synthetic rows (split evenly across tasks, vocab entries and
+assignments) for one user, then streams the export in a fresh subprocess so
+its peak RSS reflects only the export and not the seeding. Exits non-zero if
+the peak exceeds ``--max-rss-mb``.
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+from ..app import create_app
+from ..extensions import db
+from .common import login, make_app, print_table, seed_rows
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS).
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_export(database_uri: str, fmt: str) -> dict:
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database_uri, "EVENT_SINK": "none"})
+    client = app.test_client()
+    login(client)
+    rss_before = _peak_rss_mb()
+
+    started = time.perf_counter()
+    response = client.get(f"/api/export?format={fmt}", buffered=False)
+    assert response.status_code == 200, response.status_code
+    lines = 0
+    size = 0
+    for chunk in response.response:
+        lines += chunk.count(b"\n")
+        size += len(chunk)
+    response.close()
+
+    return {
+        "format": fmt,
+        "lines": lines,
+        "mb": round(size / (1024 * 1024), 1),
+        "seconds": round(time.perf_counter() - started, 2),
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Total rows across the three tables.")
+    parser.add_argument("--max-rss-mb", type=float, default=200.0, help="Fail if the export's peak RSS exceeds this.")
+    parser.add_argument("--formats", nargs="+", default=["ndjson", "csv"], choices=["ndjson", "csv"])
+    parser.add_argument("--run", metavar="DATABASE_URI", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run:
+        # Child mode: print one result row as "key=value" pairs for the parent.
+        result = run_export(args.run, args.formats[0])
+        print(" ".join(f"{key}={value}" for key, value in result.items()))
+        return
+
+    app = make_app()
+    database_uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    user_id = login(app.test_client())
+    with app.app_context():
+        seed_rows(user_id, -(-args.rows // 3), chunk=20000)
+        db.engine.dispose()
+
+    results = []
+    for fmt in args.formats:
+        output = subprocess.run(
+            [sys.executable, "-m", __spec__.name, "--run", database_uri, "--formats", fmt],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(dict(pair.split("=", 1) for pair in output.split()))
+
+    print_table(results, ["format", "lines", "mb", "seconds", "rss_before_mb", "peak_rss_mb"])
+    over = [row for row in results if float(row["peak_rss_mb"]) > args.max_rss_mb]
+    if over:
+        sys.exit(f"Peak RSS exceeded {args.max_rss_mb} MB: {', '.join(row['format'] for row in over)}")
+
+
+if __name__ == "__main__":
+    main()
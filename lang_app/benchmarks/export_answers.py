@@ -0,0 +1,70 @@
+"""Answers in ``/api/export`` before and after an assignment is completed.
+
+    python -m lang_app.benchmarks.export_answers
+
+Generates a translation assignment from seeded words and exports it in both
+formats while it is open, then again after submitting it. Exits non-zero if
+the open assignment's export carries its answer key or any correct answer,
+or if the completed one lost it.
+"""
+
+import json
+import sys
+
+from sqlalchemy import insert
+
+from .. import stats
+from ..extensions import db
+from ..models import Assignment, VocabEntry
+from .common import login, make_app, print_table
+
+
+def _exported(client, fmt: str) -> str:
+    response = client.get(f"/api/export?format={fmt}&include=assignment")
+    assert response.status_code == 200, response.status_code
+    return response.get_data(as_text=True)
+
+
+def main():
+    app = make_app()
+    client = app.test_client()
+    user_id = login(client)
+    with app.app_context():
+        db.session.execute(
+            insert(VocabEntry),
+            [
+                {"user_id": user_id, "source_word": f"word{i}", "target_language": "es",
+                 "translated_word": f"secreto{i}"}
+                for i in range(10)
+            ],
+        )
+        stats.rebuild_stats(user_id)
+        db.session.commit()
+    created = client.post("/api/assignments/generate", json={"type": "translation", "language": "es"})
+    assignment_id = created.get_json()["id"]
+    with app.app_context():
+        answers = db.session.get(Assignment, assignment_id).answer_key["answers"]
+
+    results = []
+    for state in ("open", "completed"):
+        if state == "completed":
+            client.post(f"/api/assignments/{assignment_id}/submit", json={"answers": answers})
+        for fmt in ("ndjson", "csv"):
+            body = _exported(client, fmt)
+            results.append({
+                "state": state,
+                "format": fmt,
+                "answer_key": '"answers"' in body or '""answers""' in body,
+                "answers_seen": sum(json.dumps(answer)[1:-1] in body for answer in answers.values()),
+            })
+    print_table(results, ["state", "format", "answer_key", "answers_seen"])
+
+    leaked = [row for row in results if row["state"] == "open" and (row["answer_key"] or row["answers_seen"])]
+    missing = [row for row in results if row["state"] == "completed" and not row["answer_key"]]
+    if leaked or missing:
+        print("Export shows answers of an open assignment" if leaked else "Export lost a completed assignment's answers")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
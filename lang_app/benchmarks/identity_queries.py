@@ -0,0 +1,57 @@
+"""SQL statements and latency per request with and without the identity cache.
+
+    python -m lang_app.benchmarks.identity_queries
+
+Counts the statements each hot read endpoint issues (after a warm-up
+request) with IDENTITY_CACHE_TTL at 0 and at its configured value, and
+times them. Exits non-zero if ``GET /api/tasks/`` still needs more than
+one statement with the cache on, so it doubles as a regression check.
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import event
+
+from ..extensions import db
+from ..identity_cache import IDENTITY_CACHE_TTL, identity_cache
+from .common import login, make_app, print_table, seed_rows, time_call
+
+ENDPOINTS = ["/api/me", "/api/tasks/", "/api/vocab/?limit=20", "/api/vocab/review", "/api/analytics/dashboard"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200, help="Rows of each kind seeded for the user.")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    app = make_app()
+    client = app.test_client()
+    user_id = login(client)
+    statements = []
+    with app.app_context():
+        seed_rows(user_id, args.rows)
+        event.listen(db.engine, "before_cursor_execute", lambda *event_args: statements.append(event_args[2]))
+
+    results = []
+    for ttl in (0, IDENTITY_CACHE_TTL or 30):
+        identity_cache.ttl = ttl
+        identity_cache.clear()
+        for url in ENDPOINTS:
+            client.get(url)
+            statements.clear()
+            assert client.get(url).status_code == 200
+            count = len(statements)
+            results.append({"identity_ttl": ttl, "endpoint": url, "statements": count,
+                            **time_call(lambda: client.get(url), repeat=args.repeat)})
+
+    print_table(results, ["identity_ttl", "endpoint", "statements", "p50_ms", "p95_ms"])
+    cached_tasks = next(row for row in results if row["identity_ttl"] and row["endpoint"] == "/api/tasks/")
+    if cached_tasks["statements"] != 1:
+        print(f"GET /api/tasks/ issued {cached_tasks['statements']} statements, expected 1")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Load test: the real server driven by a realistic mix of users, upstreams stubbed.
+
+    python -m lang_app.benchmarks.load --users 50 --duration 30
+    python -m lang_app.benchmarks.load --server async --translate-latency lognormal:0.3,0.6 --output baseline.json
+
+Starts the LibreTranslate and SendGrid stubs (see ``stubs``), a fresh SQLite
+database with ``--users`` seeded accounts, the app under gunicorn (``sync``)
+or uvicorn (``async``) and the outbox email worker. Each virtual user logs
+in and then loops: pick an action by weight from ``MIX``, run it, think for
+an exponentially distributed ``--think`` seconds. Reports throughput,
+p50/p95/p99 latency and error rate per request and overall; ``--output``
+also writes them as JSON so runs can be compared against a baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from ..app import create_app
+from ..extensions import db
+from ..models import User
+from ..passwords import hash_password
+from .common import percentile, print_table, seed_rows
+from .stubs import start_stub
+
+PASSWORD = "load-test-password"
+LANGUAGES = ["es", "fr", "de", "it", "pt"]
+PRACTICE_TYPES = ["translation", "fill_blank", "multiple_choice"]
+
+# Relative weight of each user action; override with --mix name=weight,...
+MIX = {
+    "dashboard": 20,
+    "list_vocab": 15,
+    "add_word": 15,
+    "list_tasks": 10,
+    "review": 10,
+    "practice": 8,
+    "create_task": 5,
+    "quiz": 5,
+    "starter_assignment": 2,
+    "register": 2,
+    "export": 1,
+}
+COLUMNS = ["request", "requests", "errors", "error_pct", "rps", "p50_ms", "p95_ms", "p99_ms"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def prepare_database(path: str, users: int, words: int = 0, **config) -> None:
+    """Create the schema and ``load0..loadN`` users, each seeded with ``words`` rows."""
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", **config})
+    with app.app_context():
+        db.create_all()
+        password_hash = hash_password(PASSWORD)
+        accounts = [
+            User(username=f"load{i}", email=f"load{i}@example.com", password_hash=password_hash)
+            for i in range(users)
+        ]
+        db.session.add_all(accounts)
+        db.session.commit()
+        if words:
+            for seed, account in enumerate(accounts):
+                seed_rows(account.id, words, seed=seed)
+        db.engine.dispose()
+
+
+def server_command(mode: str, port: int, workers: int) -> list:
+    if mode == "sync":
+        return [sys.executable, "-m", "gunicorn", "lang_app.app:create_app()",
+                "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--backlog", "2048"]
+    return [sys.executable, "-m", "uvicorn", "--factory", "lang_app.asgi:create_asgi_app",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+            "--backlog", "2048", "--log-level", "warning", "--no-access-log"]
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{base_url}/api/me")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+def summarize(name: str, samples: list, errors: int, elapsed: float) -> dict:
+    """One report row from ``(latency_ms)`` samples."""
+    samples = sorted(samples)
+    return {
+        "request": name,
+        "requests": len(samples),
+        "errors": errors,
+        "error_pct": round(100 * errors / len(samples), 2) if samples else 0.0,
+        "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(samples), 1) if samples else 0.0,
+        "p95_ms": round(percentile(samples, 0.95), 1),
+        "p99_ms": round(percentile(samples, 0.99), 1),
+    }
+
+
+class VirtualUser:
+    """One logged-in client working through weighted actions."""
+
+    def __init__(self, index: int, client, recorder, rng):
+        self.index = index
+        self.client = client
+        self.record = recorder
+        self.rng = rng
+        self.count = 0
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.record(name, (time.perf_counter() - started) * 1000, ok)
+        return response if ok else None
+
+    async def dashboard(self):
+        await self.request("dashboard", "GET", "/api/analytics/dashboard")
+
+    async def list_vocab(self):
+        await self.request("list_vocab", "GET", "/api/vocab/", params={"limit": 20})
+
+    async def add_word(self):
+        self.count += 1
+        word = f"w{self.index}-{self.count}-{self.rng.randrange(1 << 30)}"
+        await self.request(
+            "add_word", "POST", "/api/vocab/",
+            json={"source_word": word, "target_language": self.rng.choice(LANGUAGES)},
+        )
+
+    async def list_tasks(self):
+        await self.request("list_tasks", "GET", "/api/tasks/")
+
+    async def review(self):
+        await self.request("review", "GET", "/api/vocab/review", params={"limit": 10})
+
+    async def practice(self):
+        response = await self.request(
+            "generate", "POST", "/api/assignments/generate",
+            json={"type": self.rng.choice(PRACTICE_TYPES), "language": self.rng.choice(LANGUAGES)},
+        )
+        if response is None:
+            return
+        assignment = response.json()
+        questions = assignment.get("content", {}).get("questions", {})
+        await self.request(
+            "submit", "POST", f"/api/assignments/{assignment['id']}/submit",
+            json={"answers": {qid: self.rng.choice(["?", "x"]) for qid in questions}},
+        )
+
+    async def create_task(self):
+        await self.request("create_task", "POST", "/api/tasks/", json={"name": f"study {self.rng.randrange(1000)}"})
+
+    async def quiz(self):
+        await self.request("quiz", "GET", "/api/vocab/quiz")
+
+    async def starter_assignment(self):
+        await self.request(
+            "starter_assignment", "POST", "/api/assignments/generate",
+            json={"type": "basic", "language": self.rng.choice(LANGUAGES)},
+        )
+
+    async def register(self):
+        # A fresh client, so the virtual user's own session is untouched.
+        name = f"new-{uuid.uuid4().hex[:12]}"
+        started = time.perf_counter()
+        try:
+            async with httpx.AsyncClient(base_url=self.client.base_url, timeout=self.client.timeout) as client:
+                response = await client.post(
+                    "/api/auth/register", json={"username": name, "email": f"{name}@example.com", "password": PASSWORD}
+                )
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        self.record("register", (time.perf_counter() - started) * 1000, ok)
+
+    async def export(self):
+        started = time.perf_counter()
+        try:
+            async with self.client.stream("GET", "/api/export", params={"format": "ndjson"}) as response:
+                async for _ in response.aiter_bytes():
+                    pass
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        self.record("export", (time.perf_counter() - started) * 1000, ok)
+
+
+async def drive(base_url: str, users: int, duration: float, mix: dict, think: float, seed: int = 0) -> list:
+    """Run the user mix against ``base_url``; returns report rows, overall last."""
+    samples = {}
+    errors = {}
+
+    def record(name: str, latency_ms: float, ok: bool) -> None:
+        samples.setdefault(name, []).append(latency_ms)
+        errors[name] = errors.get(name, 0) + (not ok)
+
+    actions = list(mix)
+    weights = [mix[name] for name in actions]
+    clients = [httpx.AsyncClient(base_url=base_url, timeout=120) for _ in range(users)]
+    try:
+        logins = await asyncio.gather(
+            *(client.post("/api/auth/login", json={"username": f"load{i}", "password": PASSWORD})
+              for i, client in enumerate(clients))
+        )
+        if any(response.status_code != 200 for response in logins):
+            raise RuntimeError("Virtual users could not log in")
+
+        stop_at = time.monotonic() + duration
+
+        async def run(user: VirtualUser) -> None:
+            while time.monotonic() < stop_at:
+                await getattr(user, user.rng.choices(actions, weights)[0])()
+                if think > 0:
+                    await asyncio.sleep(user.rng.expovariate(1 / think))
+
+        started = time.monotonic()
+        await asyncio.gather(
+            *(run(VirtualUser(i, client, record, random.Random(seed * 100003 + i))) for i, client in enumerate(clients))
+        )
+        elapsed = time.monotonic() - started
+    finally:
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    rows = [summarize(name, samples[name], errors[name], elapsed) for name in sorted(samples)]
+    every = [latency for values in samples.values() for latency in values]
+    rows.append(summarize("total", every, sum(errors.values()), elapsed))
+    return rows
+
+
+def _parse_mix(text: str) -> dict:
+    mix = dict(MIX)
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in MIX:
+            raise SystemExit(f"Unknown action {name!r}; choose from {', '.join(MIX)}")
+        mix[name] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="Concurrent virtual users.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load.")
+    parser.add_argument("--think", type=float, default=0.5, help="Mean think time between actions (0 = none).")
+    parser.add_argument("--words", type=int, default=50, help="Rows (tasks, words, assignments) seeded per user.")
+    parser.add_argument("--mix", default="", help="Weight overrides, e.g. 'add_word=30,export=0'.")
+    parser.add_argument("--server", choices=["sync", "async"], default="sync")
+    parser.add_argument("--workers", type=int, default=2, help="Server worker processes.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--translate-latency", default="lognormal:0.25,0.5", help="Stub latency spec.")
+    parser.add_argument("--translate-error-rate", type=float, default=0.01)
+    parser.add_argument("--translate-timeout-rate", type=float, default=0.0)
+    parser.add_argument("--sendgrid-latency", default="uniform:0.05,0.2", help="Stub latency spec.")
+    parser.add_argument("--sendgrid-error-rate", type=float, default=0.01)
+    parser.add_argument("--sendgrid-timeout-rate", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=20.0, help="Seconds a stubbed timeout hangs.")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args(argv)
+    mix = _parse_mix(args.mix)
+
+    translator, translator_url = start_stub(
+        "translate", latency=args.translate_latency, error_rate=args.translate_error_rate,
+        timeout_rate=args.translate_timeout_rate, hang=args.hang, seed=args.seed,
+    )
+    sendgrid, sendgrid_url = start_stub(
+        "sendgrid", latency=args.sendgrid_latency, error_rate=args.sendgrid_error_rate,
+        timeout_rate=args.sendgrid_timeout_rate, hang=args.hang, seed=args.seed,
+    )
+    workdir = tempfile.mkdtemp(prefix="lang_app_load_")
+    db_path = os.path.join(workdir, "load.db")
+    prepare_database(db_path, args.users, args.words)
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        RESPONSE_CACHE_BACKEND=os.environ.get("RESPONSE_CACHE_BACKEND", "sqlite"),
+        RESPONSE_CACHE_PATH=os.path.join(workdir, "response_cache.db"),
+        EVENT_LOG_PATH=os.path.join(workdir, "events.jsonl"),
+        LIBRE_TRANSLATE_URL=translator_url,
+        LIBRE_TRANSLATE_FALLBACK_URLS="",
+        SENDGRID_API_URL=sendgrid_url,
+        SENDGRID_API_KEY="load-test",
+        OUTBOX_POLL_SECONDS="1",
+    )
+    quiet = {"env": env, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    processes = [
+        subprocess.Popen(server_command(args.server, port, args.workers), **quiet),
+        subprocess.Popen([sys.executable, "-m", "flask", "--app", "lang_app.app:create_app", "email-worker"], **quiet),
+    ]
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        asyncio.run(wait_ready(base_url))
+        rows = asyncio.run(drive(base_url, args.users, args.duration, mix, args.think, args.seed))
+        time.sleep(2)  # let the email worker drain what the run queued
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+        translator.shutdown()
+        sendgrid.shutdown()
+
+    print_table(rows, COLUMNS)
+    upstreams = {"translate": translator.stats, "sendgrid": sendgrid.stats}
+    print_table([{"stub": name, **counts} for name, counts in upstreams.items()],
+                ["stub", "requests", "errors", "timeouts", "messages"])
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"config": vars(args), "mix": mix, "results": rows, "upstreams": upstreams}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
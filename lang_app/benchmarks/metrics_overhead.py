@@ -0,0 +1,82 @@
+"""Cost of the request instrumentation in ``metrics``.
+
+    python -m lang_app.benchmarks.metrics_overhead --rows 5000 --repeat 300
+
+Builds two identical seeded apps, one with METRICS_ENABLED off and one with
+it on (plus SERVER_TIMING), and times the same read endpoints on both,
+interleaved so drift affects them equally. Also reports the raw cost of one
+histogram observation.
+"""
+
+import argparse
+import time
+
+from ..metrics import Histogram
+from .common import login, make_app, print_table, seed_rows, time_call
+
+ENDPOINTS = [
+    "/api/me",
+    "/api/tasks/?limit=20",
+    "/api/vocab/?limit=20",
+    "/api/vocab/review",
+    "/api/vocab/quiz",
+    "/api/analytics/dashboard",
+]
+
+
+def _client(rows: int, **config):
+    app = make_app(**config)
+    client = app.test_client()
+    user_id = login(client)
+    with app.app_context():
+        seed_rows(user_id, rows)
+    return client
+
+
+def _observe_ns(samples: int = 200000) -> float:
+    histogram = Histogram("bench_seconds", "Benchmark histogram.", ("endpoint",))
+    started = time.perf_counter()
+    for i in range(samples):
+        histogram.observe(i * 1e-6, "/api/vocab/")
+    return round((time.perf_counter() - started) / samples * 1e9, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000, help="Rows of each kind seeded per app.")
+    parser.add_argument("--repeat", type=int, default=300, help="Timed requests per endpoint per round.")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    clients = {
+        "off": _client(args.rows, METRICS_ENABLED=False),
+        "on": _client(args.rows, METRICS_ENABLED=True, SERVER_TIMING=True),
+    }
+    best = {}
+    for _ in range(args.rounds):
+        for url in ENDPOINTS:
+            for mode, client in clients.items():
+                p50 = time_call(lambda: client.get(url), repeat=args.repeat, warmup=10)["p50_ms"]
+                best[url, mode] = min(best.get((url, mode), p50), p50)
+
+    results = []
+    for url in [*ENDPOINTS, "total"]:
+        if url == "total":
+            off = sum(best[endpoint, "off"] for endpoint in ENDPOINTS)
+            on = sum(best[endpoint, "on"] for endpoint in ENDPOINTS)
+        else:
+            off, on = best[url, "off"], best[url, "on"]
+        results.append(
+            {
+                "endpoint": url,
+                "off_p50_ms": round(off, 3),
+                "on_p50_ms": round(on, 3),
+                "overhead_pct": round(100 * (on - off) / off, 1),
+            }
+        )
+    print_table(results, ["endpoint", "off_p50_ms", "on_p50_ms", "overhead_pct"])
+    print(f"Histogram.observe: {_observe_ns()} ns")
+
+
+if __name__ == "__main__":
+    main()
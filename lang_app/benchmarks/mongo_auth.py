@@ -0,0 +1,109 @@
+"""MongoDB round trips and latency of the auth endpoints.
+
+    MONGO_URI=mongodb://localhost:27017/lang_app_bench python -m lang_app.benchmarks.mongo_auth
+
+Needs a running MongoDB; the ``--db-name`` database is dropped first. Counts
+the Mongo commands each auth request issues on the request thread, using
+pymongo's command monitoring, and times login. Login events are written by
+the background flusher, so they must not show up in the login counts; the
+script exits non-zero if a successful login needs more than one command.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import threading
+
+from pymongo import MongoClient, monitoring
+
+from ..event_buffer import events
+from ..extensions import ensure_mongo_indexes
+from .common import make_app, print_table, time_call
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Commands started on the current request thread (the flusher's are counted apart)."""
+
+    def __init__(self):
+        self.commands = []
+        self.background = 0
+
+    def started(self, event):
+        if threading.current_thread().name.startswith("flush-"):
+            self.background += 1
+        else:
+            self.commands.append(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mongo-uri", default=os.environ.get("MONGO_URI", ""))
+    parser.add_argument("--db-name", default="lang_app_bench")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+    if not args.mongo_uri:
+        parser.error("set MONGO_URI or --mongo-uri")
+
+    MongoClient(args.mongo_uri).drop_database(args.db_name)
+    counter = CommandCounter()
+    monitoring.register(counter)
+    # Cheap hashing so Mongo, not the password hash, dominates login time.
+    app = make_app(
+        MONGO_URI=args.mongo_uri,
+        MONGO_DB_NAME=args.db_name,
+        PASSWORD_HASH_METHOD="pbkdf2:sha256:1000",
+        PASSWORD_HASH_WORKERS=0,
+    )
+    ensure_mongo_indexes()
+    client = app.test_client()
+
+    def count(call) -> dict:
+        counter.commands.clear()
+        status = call().status_code
+        return {"status": status, "commands": len(counter.commands), "names": ",".join(counter.commands)}
+
+    def register(i):
+        return client.post(
+            "/api/auth/register",
+            json={"username": f"mongo{i}", "email": f"mongo{i}@example.com", "password": "bench-password"},
+        )
+
+    def login(i, password="bench-password"):
+        return client.post("/api/auth/login", json={"username": f"mongo{i}", "password": password})
+
+    for i in range(1, args.users):
+        register(i)
+    login(1)  # first login after registration may back-fill sql_user_id
+
+    results = [
+        {"request": "register", **count(lambda: register(0))},
+        {"request": "login", **count(lambda: login(1))},
+        {"request": "login (wrong password)", **count(lambda: login(1, "nope"))},
+        {"request": "reset-password", **count(
+            lambda: client.post("/api/auth/reset-password", json={"username": "mongo2", "password": "new-password"})
+        )},
+    ]
+    print_table(results, ["request", "status", "commands", "names"])
+
+    accounts = itertools.cycle(range(1, args.users))
+    timing = time_call(lambda: login(next(accounts)), repeat=args.repeat)
+    print()
+    print(f"login p50 {timing['p50_ms']} ms, p95 {timing['p95_ms']} ms")
+    print(f"events {events.stats()}, insert_many calls by the flusher {counter.background}")
+
+    logins = next(row for row in results if row["request"] == "login")
+    if logins["commands"] > 1:
+        print(f"Successful login issued {logins['commands']} Mongo commands, expected 1")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Login throughput per password hashing policy, inline and in the process pool.
+
+    python -m lang_app.benchmarks.password_hashing --threads 8 --duration 10
+
+First reports raw verifications per second on one core for each policy.
+Then, for each policy and PASSWORD_HASH_WORKERS setting, ``--threads``
+clients log in as fast as they can for ``--duration`` seconds while a probe
+client keeps requesting ``/api/me``. Reports logins/s (total and per core),
+login latency, 503s from a full hashing queue, and the probe's latency,
+which shows whether a login burst starves other endpoints.
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from .. import passwords
+from .common import login, make_app, percentile, print_table
+
+POLICIES = ["pbkdf2:sha256:600000", "pbkdf2:sha256:1000000", "scrypt:16384:8:1", "scrypt:32768:8:1"]
+PASSWORD = "bench-password"
+
+
+def verify_rate(method: str, seconds: float = 2.0) -> float:
+    """Single-threaded check_password_hash calls per second."""
+    pwhash = generate_password_hash(PASSWORD, method)
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        check_password_hash(pwhash, PASSWORD)
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def login_burst(method: str, workers: int, threads: int, duration: float) -> dict:
+    app = make_app(PASSWORD_HASH_METHOD=method, PASSWORD_HASH_WORKERS=workers, METRICS_ENABLED=False)
+    for i in range(threads):
+        login(app.test_client(), f"pw{i}", PASSWORD)
+    probe = app.test_client()
+    login(probe, "probe", PASSWORD)
+    # Start the pool (if any) before timing.
+    app.test_client().post("/api/auth/login", json={"username": "pw0", "password": PASSWORD})
+
+    stop = threading.Event()
+    logins, probes, busy = [], [], [0]
+
+    def client_loop(i):
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            status = client.post("/api/auth/login", json={"username": f"pw{i}", "password": PASSWORD}).status_code
+            if status == 200:
+                logins.append((time.perf_counter() - started) * 1000)
+            elif status == 503:
+                busy[0] += 1
+
+    def probe_loop():
+        while not stop.is_set():
+            started = time.perf_counter()
+            probe.get("/api/me")
+            probes.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.02)
+
+    runners = [threading.Thread(target=client_loop, args=(i,)) for i in range(threads)]
+    runners.append(threading.Thread(target=probe_loop))
+    for runner in runners:
+        runner.start()
+    time.sleep(duration)
+    stop.set()
+    for runner in runners:
+        runner.join()
+    passwords.policy.shutdown()
+
+    logins.sort()
+    probes.sort()
+    cores = os.cpu_count() or 1
+    return {
+        "policy": method,
+        "workers": workers,
+        "logins_s": round(len(logins) / duration, 1),
+        "per_core": round(len(logins) / duration / cores, 1),
+        "login_p50_ms": round(statistics.median(logins), 1) if logins else 0.0,
+        "login_p95_ms": round(percentile(logins, 0.95), 1),
+        "busy_503": busy[0],
+        "probe_p50_ms": round(statistics.median(probes), 1) if probes else 0.0,
+        "probe_p95_ms": round(percentile(probes, 0.95), 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--policies", nargs="+", default=POLICIES)
+    parser.add_argument("--workers", nargs="+", type=int, default=[0, 2], help="PASSWORD_HASH_WORKERS values.")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent login clients.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of login load per run.")
+    args = parser.parse_args(argv)
+
+    print_table(
+        [{"policy": method, "verify_per_s_per_core": round(verify_rate(method), 1)} for method in args.policies],
+        ["policy", "verify_per_s_per_core"],
+    )
+    print()
+    results = [
+        login_burst(method, workers, args.threads, args.duration)
+        for method in args.policies
+        for workers in args.workers
+    ]
+    print_table(
+        results,
+        ["policy", "workers", "logins_s", "per_core", "login_p50_ms", "login_p95_ms",
+         "busy_503", "probe_p50_ms", "probe_p95_ms"],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Random vocab samples when a user's ids are clustered.
+
+    python -m lang_app.benchmarks.sample_coverage --other-rows 100000
+
+Gives one user a word, then ``--other-rows`` words of other users, then
+``--words`` more words, so nearly every random id probe between the user's
+smallest and largest id lands on the first row of the second cluster.
+Samples ``k`` ids ``--runs`` times (and asks for a quiz) and exits non-zero
+if any sample comes back with fewer than ``k`` distinct ids.
+"""
+
+import argparse
+import random
+import sys
+
+from sqlalchemy import insert
+
+from .. import stats
+from ..extensions import db
+from ..models import VocabEntry
+from ..sampling import sample_vocab_ids
+from .common import login, make_app, print_table, time_call
+
+
+def _words(user_id: int, count: int, prefix: str) -> list:
+    return [
+        {"user_id": user_id, "source_word": f"{prefix}{i}", "target_language": "es", "translated_word": f"{prefix}-es{i}"}
+        for i in range(count)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--other-rows", type=int, default=100_000, help="Other users' words between the clusters.")
+    parser.add_argument("--words", type=int, default=400, help="Words in the user's second cluster.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    app = make_app()
+    client = app.test_client()
+    user_id = login(client)
+    other_id = login(app.test_client(), "other")
+    with app.app_context():
+        db.session.execute(insert(VocabEntry), _words(user_id, 1, "early"))
+        for start in range(0, args.other_rows, 20000):
+            db.session.execute(insert(VocabEntry), _words(other_id, min(20000, args.other_rows - start), f"o{start}-"))
+        db.session.execute(insert(VocabEntry), _words(user_id, args.words, "late"))
+        stats.rebuild_stats()
+        db.session.commit()
+
+        rng = random.Random(0)
+        sizes = [len(set(sample_vocab_ids(user_id, args.k, rng=rng))) for _ in range(args.runs)]
+        timing = time_call(lambda: sample_vocab_ids(user_id, args.k), repeat=args.runs)
+    quiz = len(client.get("/api/vocab/quiz").get_json()["questions"])
+
+    print_table(
+        [{"k": args.k, "runs": args.runs, "min_ids": min(sizes), "max_ids": max(sizes), "quiz_questions": quiz,
+          "p50_ms": timing["p50_ms"], "p95_ms": timing["p95_ms"]}],
+        ["k", "runs", "min_ids", "max_ids", "quiz_questions", "p50_ms", "p95_ms"],
+    )
+    if min(sizes) < args.k or quiz < 5:
+        print(f"Clustered vocabulary sampled short: {min(sizes)} of {args.k} ids, {quiz} of 5 quiz questions")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Dashboard counters for users who predate the materialized stats tables.
+
+    python -m lang_app.benchmarks.stats_upgrade
+
+Mimics an upgraded database: each user gets source rows inserted directly,
+with no stats rows, then makes one write through the API (add a word, add,
+complete or delete a task, generate an assignment from the old words).
+Their dashboard must count the old rows plus that write, and ``check_stats``
+must find no drift. A second pass races two first writes of one legacy user
+from separate threads. The script exits non-zero on any mismatch.
+"""
+
+import argparse
+import sys
+import threading
+
+from sqlalchemy import insert
+
+from .. import stats
+from ..extensions import db
+from ..models import Task, UserStats, VocabEntry
+from ..translation_cache import translation_cache
+from .common import login, make_app, print_table
+
+
+def seed_legacy(user_id: int, words: int, tasks: int) -> None:
+    """Source rows only, as an app version without the stats tables left them."""
+    if words:
+        db.session.execute(
+            insert(VocabEntry),
+            [
+                {"user_id": user_id, "source_word": f"old{i}", "target_language": "es", "translated_word": f"viejo{i}"}
+                for i in range(words)
+            ],
+        )
+    if tasks:
+        db.session.execute(insert(Task), [{"user_id": user_id, "name": f"old task {i}"} for i in range(tasks)])
+    db.session.commit()
+    assert db.session.get(UserStats, user_id) is None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--words", type=int, default=10, help="Vocab entries each user already has.")
+    parser.add_argument("--tasks", type=int, default=5, help="Tasks each user already has.")
+    args = parser.parse_args(argv)
+
+    app = make_app()
+    with app.app_context():
+        # Warm the cache so adding a word needs no translation upstream.
+        translation_cache.set("new", "auto", "es", "nuevo")
+
+    def add_word(client):
+        return client.post("/api/vocab/", json={"source_word": "new", "target_language": "es"})
+
+    def add_task(client):
+        return client.post("/api/tasks/", json={"name": "new task"})
+
+    def complete_task(client):
+        task_id = client.get("/api/tasks/").get_json()[0]["id"]
+        return client.patch(f"/api/tasks/{task_id}", json={"is_completed": True})
+
+    def generate(client):
+        return client.post("/api/assignments/generate", json={"type": "translation", "language": "es"})
+
+    def delete_task(client):
+        task_id = client.get("/api/tasks/").get_json()[0]["id"]
+        return client.delete(f"/api/tasks/{task_id}")
+
+    cases = [
+        ("add word", add_word, {"total_vocab_words": args.words + 1, "total_tasks": args.tasks}),
+        ("add task", add_task, {"total_vocab_words": args.words, "total_tasks": args.tasks + 1}),
+        ("complete task", complete_task, {"total_tasks": args.tasks, "completed_tasks": 1}),
+        ("delete task", delete_task, {"total_vocab_words": args.words, "total_tasks": args.tasks - 1}),
+        ("generate assignment", generate, {"total_vocab_words": args.words, "total_assignments": 1}),
+    ]
+    results = []
+    failed = False
+    for i, (name, write, expected) in enumerate(cases):
+        client = app.test_client()
+        user_id = login(client, f"legacy{i}")
+        with app.app_context():
+            seed_legacy(user_id, args.words, args.tasks)
+        status = write(client).status_code
+        summary = client.get("/api/analytics/dashboard").get_json()["summary"]
+        with app.app_context():
+            drift = stats.check_stats(user_id)
+        ok = status < 400 and not drift and all(summary[key] == value for key, value in expected.items())
+        failed = failed or not ok
+        results.append({
+            "write": name,
+            "status": status,
+            "expected": ", ".join(f"{key}={value}" for key, value in expected.items()),
+            "got": ", ".join(f"{key}={summary[key]}" for key in expected),
+            "drift": len(drift),
+            "ok": ok,
+        })
+
+    # Two first writes of one legacy user at once: each may see no stats row.
+    client = app.test_client()
+    user_id = login(client, "legacy-race")
+    with app.app_context():
+        seed_legacy(user_id, args.words, args.tasks)
+        # Backfilling twice (a lost race) must not double-count either.
+        stats.backfill_stats(user_id)
+        stats.backfill_stats(user_id)
+        db.session.commit()
+        db.session.query(UserStats).filter_by(user_id=user_id).delete()
+        db.session.commit()
+    barrier = threading.Barrier(2)
+    statuses = []
+
+    def racer():
+        racer_client = app.test_client()
+        login(racer_client, "legacy-race")
+        barrier.wait()
+        statuses.append(racer_client.post("/api/tasks/", json={"name": "raced task"}).status_code)
+
+    racers = [threading.Thread(target=racer) for _ in range(2)]
+    for thread in racers:
+        thread.start()
+    for thread in racers:
+        thread.join()
+    summary = client.get("/api/analytics/dashboard").get_json()["summary"]
+    with app.app_context():
+        drift = stats.check_stats(user_id)
+    ok = max(statuses) < 400 and not drift and summary["total_tasks"] == args.tasks + 2
+    failed = failed or not ok
+    results.append({
+        "write": "2 racing task adds",
+        "status": max(statuses),
+        "expected": f"total_tasks={args.tasks + 2}",
+        "got": f"total_tasks={summary['total_tasks']}",
+        "drift": len(drift),
+        "ok": ok,
+    })
+
+    print_table(results, ["write", "status", "expected", "got", "drift", "ok"])
+    if failed:
+        print("Stats of a pre-existing user do not match their rows")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Local stand-ins for upstream APIs, for benchmarks and load tests.
+
+    python -m lang_app.benchmarks.stubs translate --port 5001 --latency lognormal:0.2,0.5 --error-rate 0.02
+
+Three services are mimicked closely enough for the app's clients:
+
+- ``translate``: LibreTranslate ``POST /translate`` (form or JSON, ``q`` may
+  be a list); answers ``"<q>-<target>"``
+- ``sendgrid``: SendGrid ``POST /v3/mail/send``; answers 202 and counts
+  messages (one per personalization)
+- ``newsapi``: NewsAPI ``GET /v2/everything``; answers ``pageSize`` made-up
+  articles about ``q``
+
+Every request first waits a delay drawn from the latency spec, then fails
+with ``--error-status`` at ``--error-rate``, or hangs for ``--hang`` seconds
+(long enough for the client to time out) at ``--timeout-rate``.
+
+Latency specs: ``0.2`` or ``fixed:0.2``, ``uniform:LOW,HIGH``,
+``exp:MEAN`` and ``lognormal:MEDIAN,SIGMA`` (all in seconds).
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def latency_sampler(spec):
+    """Turn a latency spec (number or ``kind:params`` string) into a sampler."""
+    if isinstance(spec, (int, float)):
+        return lambda rng: float(spec)
+    kind, _, params = str(spec).partition(":")
+    if not params:
+        kind, params = "fixed", kind
+    values = [float(value) for value in params.split(",")]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency spec: {spec!r}")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _behave(self) -> bool:
+        """Apply latency, errors and timeouts; False when the request is already answered."""
+        server = self.server
+        with server.lock:
+            delay = max(0.0, server.sample_latency(server.rng))
+            roll = server.rng.random()
+            server.stats["requests"] += 1
+            if roll < server.timeout_rate:
+                server.stats["timeouts"] += 1
+            elif roll < server.timeout_rate + server.error_rate:
+                server.stats["errors"] += 1
+        time.sleep(delay)
+        if roll < server.timeout_rate:
+            time.sleep(server.hang)
+            self.close_connection = True
+            return False
+        if roll < server.timeout_rate + server.error_rate:
+            self._send_json(server.error_status, {"error": "stub failure", "message": "stub failure"})
+            return False
+        return True
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _send_json(self, status: int, payload=None) -> None:
+        out = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+class _TranslateHandler(_StubHandler):
+    def do_POST(self):
+        body = self._read_body()
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            payload = json.loads(body or b"{}")
+        else:
+            payload = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+        if not self._behave():
+            return
+        text = payload.get("q", "")
+        target = payload.get("target", "")
+        translated = [f"{item}-{target}" for item in text] if isinstance(text, list) else f"{text}-{target}"
+        self._send_json(200, {"translatedText": translated})
+
+
+class _SendGridHandler(_StubHandler):
+    def do_POST(self):
+        body = self._read_body()
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._send_json(401, {"errors": [{"message": "authorization required"}]})
+            return
+        try:
+            personalizations = json.loads(body or b"{}")["personalizations"]
+        except (ValueError, KeyError):
+            self._send_json(400, {"errors": [{"message": "personalizations required"}]})
+            return
+        if not self._behave():
+            return
+        with self.server.lock:
+            self.server.stats["messages"] += len(personalizations)
+        self._send_json(202)
+
+
+class _NewsHandler(_StubHandler):
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+        if not params.get("apiKey"):
+            self._send_json(401, {"status": "error", "code": "apiKeyMissing", "message": "apiKey required"})
+            return
+        if not self._behave():
+            return
+        topic = params.get("q", "news")
+        now = datetime.utcnow()
+        articles = [
+            {
+                "title": f"{topic} story {i} ({now:%H%M%S%f})",
+                "description": f"Stub article {i} about {topic}.",
+                "publishedAt": (now - timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }
+            for i in range(int(params.get("pageSize", 20)))
+        ]
+        self._send_json(200, {"status": "ok", "totalResults": len(articles), "articles": articles})
+
+
+SERVICES = {
+    "translate": (_TranslateHandler, "/translate"),
+    "sendgrid": (_SendGridHandler, "/v3/mail/send"),
+    "newsapi": (_NewsHandler, "/v2/everything"),
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def start_stub(
+    service: str,
+    latency=0.2,
+    error_rate: float = 0.0,
+    timeout_rate: float = 0.0,
+    hang: float = 30.0,
+    error_status: int = 500,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    seed=None,
+):
+    """Serve one stub in a background thread.
+
+    Returns ``(server, url)`` where ``url`` is the API endpoint to configure
+    the client with; ``server.stats`` counts requests, errors, timeouts (and
+    messages for SendGrid). Call ``server.shutdown()`` when done.
+    """
+    handler, path = SERVICES[service]
+    server = _Server((host, port), handler)
+    server.sample_latency = latency_sampler(latency)
+    server.error_rate = error_rate
+    server.timeout_rate = timeout_rate
+    server.hang = hang
+    server.error_status = error_status
+    server.rng = random.Random(seed)
+    server.lock = threading.Lock()
+    server.stats = {"requests": 0, "errors": 0, "timeouts": 0, "messages": 0}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}{path}"
+
+
+def start_translator(latency=0.2, host: str = "127.0.0.1", port: int = 0, **behaviour):
+    """Serve a LibreTranslate-compatible ``/translate``; see ``start_stub``."""
+    return start_stub("translate", latency=latency, host=host, port=port, **behaviour)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("service", choices=sorted(SERVICES))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", default="0.2", help="Latency spec (see above).")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=30.0, help="Seconds a timed-out request hangs.")
+    args = parser.parse_args(argv)
+
+    server, url = start_stub(
+        args.service,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang=args.hang,
+        error_status=args.error_status,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"{args.service} stub listening on {url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Latency and error rate of the app's upstream clients against local stubs.
+
+    python -m lang_app.benchmarks.upstreams --calls 200 --concurrency 8 --latency lognormal:0.2,0.5 --error-rate 0.05
+
+Calls ``vocab.translate_word`` (every word a cache miss),
+``email_utils.send_email_via_sendgrid`` and ``headlines_improved.fetch_news``
+``--calls`` times each, ``--concurrency`` at a time (``fetch_news`` one at a
+time, and only when run from the repository root), with the stubs from
+``stubs`` standing in for the real APIs. Shows what the clients' timeouts,
+retries and failover add on top of the upstream's own latency.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .. import email_utils, vocab
+from ..endpoint_pool import EndpointPool
+from .common import make_app, percentile, print_table
+from .stubs import start_stub
+
+
+def _run(fn, calls: int, concurrency: int) -> dict:
+    def timed(i):
+        started = time.perf_counter()
+        try:
+            ok = fn(i)
+        except Exception:  # noqa: BLE001
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        results = [timed(i) for i in range(calls)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(timed, range(calls)))
+    elapsed = time.perf_counter() - started
+    samples = sorted(latency for latency, _ in results)
+    errors = sum(not ok for _, ok in results)
+    return {
+        "calls": calls,
+        "errors": errors,
+        "error_pct": round(100 * errors / calls, 2),
+        "calls_per_s": round(calls / elapsed, 1),
+        "p50_ms": round(percentile(samples, 0.5), 1),
+        "p95_ms": round(percentile(samples, 0.95), 1),
+        "p99_ms": round(percentile(samples, 0.99), 1),
+    }
+
+
+def _fetch_news(news_url: str):
+    # The script reads its configuration at import time.
+    os.environ.update(
+        NEWSAPI_URL=news_url,
+        NEWSAPI_KEY="bench",
+        NEWS_DB_PATH=os.path.join(tempfile.mkdtemp(prefix="lang_app_news_"), "news.db"),
+    )
+    sys.path.insert(0, os.getcwd())
+    import headlines_improved  # noqa: WPS433
+
+    def call(i):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            headlines_improved.fetch_news(f"topic{i % 10}")
+        return "Data saved" in out.getvalue()
+
+    return call
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", default="lognormal:0.2,0.5", help="Stub latency spec (see stubs).")
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=12.0, help="Seconds a stubbed timeout hangs.")
+    parser.add_argument("--only", nargs="+", choices=["translate", "sendgrid", "newsapi"])
+    args = parser.parse_args(argv)
+    behaviour = {
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "timeout_rate": args.timeout_rate,
+        "hang": args.hang,
+    }
+
+    app = make_app()
+    results = []
+    for service in args.only or ["translate", "sendgrid", "newsapi"]:
+        server, url = start_stub(service, **behaviour)
+        try:
+            if service == "translate":
+                pool = vocab.translation_endpoints
+                vocab.translation_endpoints = EndpointPool(
+                    [url], timeout=pool.timeout, budget=pool.budget, hedge_after=0,
+                    failure_threshold=pool.failure_threshold, cooldown=pool.cooldown,
+                )
+
+                def call(i):
+                    with app.app_context():
+                        return vocab.translate_word(f"bench{i}-{time.time_ns()}", "es") is not None
+
+                name = "translate_word"
+            elif service == "sendgrid":
+                email_utils.SENDGRID_API_URL = url
+                email_utils.SENDGRID_API_KEY = "bench"
+                email_utils.EMAIL_ENABLED = True
+
+                def call(i):
+                    return email_utils.send_email_via_sendgrid(f"user{i}@example.com", "Bench", "<p>hi</p>")
+
+                name = "send_email_via_sendgrid"
+            else:
+                call = _fetch_news(url)
+                name = "fetch_news"
+            # The news script shares one sqlite3 connection, usable from one thread only.
+            concurrency = 1 if service == "newsapi" else args.concurrency
+            results.append({"function": name, **_run(call, args.calls, concurrency), **{
+                f"stub_{key}": value for key, value in server.stats.items() if key in ("requests", "timeouts")
+            }})
+        finally:
+            server.shutdown()
+
+    print_table(
+        results,
+        ["function", "calls", "errors", "error_pct", "calls_per_s", "p50_ms", "p95_ms", "p99_ms",
+         "stub_requests", "stub_timeouts"],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,205 @@
+import json
 import logging
 import os
-from datetime import date, datetime
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 
 import requests
 from flask_login import current_user
 
+from sqlalchemy import select, update
+
+from . import http_client
+from .extensions import db
+from .models import OutboxEmail
+
 logger = logging.getLogger(__name__)
 
 # Email service configuration
 SENDGRID_API_KEY = os.environ.get("SENDGRID_API_KEY", "")
 SENDGRID_FROM_EMAIL = os.environ.get("SENDGRID_FROM_EMAIL", "noreply@langapp.com")
+SENDGRID_API_URL = os.environ.get("SENDGRID_API_URL", "https://api.sendgrid.com/v3/mail/send")
 EMAIL_ENABLED = bool(SENDGRID_API_KEY)
 
+# Outbox worker tuning
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "500"))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get("OUTBOX_RETRY_BASE_SECONDS", "60"))
+OUTBOX_POLL_SECONDS = float(os.environ.get("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_CONCURRENCY = int(os.environ.get("OUTBOX_CONCURRENCY", "4"))
+# How long a worker owns the emails it claimed; a crashed worker's batch is retried after this.
+OUTBOX_CLAIM_SECONDS = int(os.environ.get("OUTBOX_CLAIM_SECONDS", "300"))
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
 
 def send_email_via_sendgrid(to_email: str, subject: str, html_content: str) -> bool:
     """Send email using SendGrid API."""
+    return send_batch_via_sendgrid([{"to": [{"email": to_email}]}], subject, html_content)
+
+
+def send_batch_via_sendgrid(personalizations: list, subject: str, html_content: str) -> bool:
+    """Send one message to many recipients using SendGrid personalizations.
+
+    Each personalization may carry ``substitutions`` that SendGrid applies to
+    the subject and content for that recipient.
+    """
     if not EMAIL_ENABLED:
         logger.info("Email disabled (no SENDGRID_API_KEY). Would send: %s", subject)
         return False
     
     try:
-        response = requests.post(
-            "https://api.sendgrid.com/v3/mail/send",
+        response = http_client.post(
+            SENDGRID_API_URL,
             headers={
                 "Authorization": f"Bearer {SENDGRID_API_KEY}",
                 "Content-Type": "application/json",
             },
             json={
-                "personalizations": [{"to": [{"email": to_email}]}],
+                "personalizations": personalizations,
                 "from": {"email": SENDGRID_FROM_EMAIL},
                 "subject": subject,
                 "content": [{"type": "text/html", "value": html_content}],
             },
             timeout=10,
         )
+        if response.status_code != 202:
+            logger.error("SendGrid rejected batch: %s %s", response.status_code, response.text[:200])
         return response.status_code == 202
     except requests.RequestException as e:
         logger.error("SendGrid error: %s", e)
         return False
 
 
+def enqueue_email(
+    to_email: str,
+    subject: str,
+    html_content: str,
+    substitutions: dict | None = None,
+    commit: bool = True,
+) -> bool:
+    """Persist an email in the outbox for the worker to deliver.
+
+    Returns False when email is disabled, like the direct senders. Pass
+    ``commit=False`` to enqueue as part of the caller's transaction.
+    """
+    if not EMAIL_ENABLED:
+        return False
+
+    db.session.add(
+        OutboxEmail(
+            to_email=to_email,
+            subject=subject,
+            html_content=html_content,
+            substitutions=json.dumps(substitutions) if substitutions else None,
+        )
+    )
+    if commit:
+        db.session.commit()
+    return True
+
+
+def deliver_outbox(
+    batch_size: int = OUTBOX_BATCH_SIZE,
+    max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+    concurrency: int = OUTBOX_CONCURRENCY,
+) -> dict:
+    """Deliver one batch of due outbox emails; returns counts by outcome.
+
+    Messages with identical subject and body are sent as a single SendGrid
+    request with one personalization per recipient, with up to
+    ``concurrency`` requests in flight. Failed messages are retried with
+    exponential backoff and marked ``dead`` after ``max_attempts`` tries.
+
+    The batch is claimed first (status ``sending`` for OUTBOX_CLAIM_SECONDS)
+    in one committed UPDATE, so several workers can drain the outbox without
+    sending the same email twice.
+    """
+    now = datetime.utcnow()
+    due_ids = (
+        select(OutboxEmail.id)
+        .where(OutboxEmail.status.in_(("pending", "sending")), OutboxEmail.next_attempt_at <= now)
+        .order_by(OutboxEmail.id)
+        .limit(batch_size)
+    )
+    claimed = db.session.execute(
+        update(OutboxEmail)
+        .where(
+            OutboxEmail.id.in_(due_ids.scalar_subquery()),
+            OutboxEmail.status.in_(("pending", "sending")),
+            OutboxEmail.next_attempt_at <= now,
+        )
+        .values(status="sending", next_attempt_at=now + timedelta(seconds=OUTBOX_CLAIM_SECONDS))
+        .returning(OutboxEmail.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.session.commit()
+    due = OutboxEmail.query.filter(OutboxEmail.id.in_(claimed)).order_by(OutboxEmail.id).all() if claimed else []
+
+    groups = defaultdict(list)
+    for email in due:
+        groups[(email.subject, email.html_content)].append(email)
+
+    requests_to_send = []
+    for (subject, html_content), emails in groups.items():
+        for start in range(0, len(emails), SENDGRID_MAX_PERSONALIZATIONS):
+            chunk = emails[start:start + SENDGRID_MAX_PERSONALIZATIONS]
+            personalizations = []
+            for email in chunk:
+                personalization = {"to": [{"email": email.to_email}]}
+                if email.substitutions:
+                    personalization["substitutions"] = json.loads(email.substitutions)
+                personalizations.append(personalization)
+            requests_to_send.append((chunk, personalizations, subject, html_content))
+
+    counts = {"sent": 0, "retry": 0, "dead": 0}
+    if not requests_to_send:
+        return counts
+
+    # Only the HTTP calls run on the pool; ORM updates stay on this thread.
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        outcomes = pool.map(lambda req: send_batch_via_sendgrid(*req[1:]), requests_to_send)
+        for (chunk, _, _, _), delivered in zip(requests_to_send, outcomes):
+            if delivered:
+                for email in chunk:
+                    email.status = "sent"
+                    email.sent_at = datetime.utcnow()
+                counts["sent"] += len(chunk)
+                continue
+
+            for email in chunk:
+                email.attempts += 1
+                email.last_error = "SendGrid request failed"
+                if email.attempts >= max_attempts:
+                    email.status = "dead"
+                    counts["dead"] += 1
+                    logger.error("Email to %s dead-lettered after %s attempts", email.to_email, email.attempts)
+                else:
+                    email.status = "pending"
+                    email.next_attempt_at = now + timedelta(seconds=OUTBOX_RETRY_BASE_SECONDS * 2 ** (email.attempts - 1))
+                    counts["retry"] += 1
+
+    db.session.commit()
+    return counts
+
+
+def run_outbox_worker(
+    interval: float = OUTBOX_POLL_SECONDS, once: bool = False, concurrency: int = OUTBOX_CONCURRENCY
+) -> None:
+    """Drain the outbox forever (or once), sleeping only when it is empty."""
+    while True:
+        counts = deliver_outbox(concurrency=concurrency)
+        if any(counts.values()):
+            logger.info("Outbox batch: %s", counts)
+        if once:
+            return
+        if not any(counts.values()):
+            time.sleep(interval)
+
+
 def send_task_reminder(task_name: str, due_date: date, recipient_email: str) -> None:
-    """Send task reminder email."""
+    """Queue a task reminder email."""
     days_until = (due_date - date.today()).days
     urgency = "urgent" if days_until <= 1 else "upcoming"
     
@@ -60,15 +218,47 @@ def send_task_reminder(task_name: str, due_date: date, recipient_email: str) ->
     
     subject = f"Reminder: {task_name} due in {days_until} day(s)"
     
-    if send_email_via_sendgrid(recipient_email, subject, html_content):
-        logger.info("Email reminder sent to %s for task %s", recipient_email, task_name)
+    if enqueue_email(recipient_email, subject, html_content):
+        logger.info("Email reminder queued for %s for task %s", recipient_email, task_name)
     else:
         logger.info("Email reminder logged (not sent) -> to=%s | task=%s | due=%s",
                    recipient_email, task_name, due_date)
 
 
+def send_task_digest(recipient_email: str, username: str, tasks: list, commit: bool = True) -> bool:
+    """Queue one reminder email listing several upcoming tasks.
+
+    ``tasks`` is a list of ``(task_name, due_date)`` pairs, soonest first.
+    """
+    today = date.today()
+    rows = "".join(
+        f"<li><strong>{name}</strong> &mdash; due {due.strftime('%B %d, %Y')} "
+        f"({(due - today).days} day(s))</li>"
+        for name, due in tasks
+    )
+    html_content = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; padding: 20px;">
+        <h2 style="color: #667eea;">Upcoming Tasks</h2>
+        <p>Hello {username}!</p>
+        <p>You have {len(tasks)} task(s) coming up:</p>
+        <ul>{rows}</ul>
+        <p style="margin-top: 20px; color: #666;">Log in to your Language Learning Platform to manage your tasks.</p>
+    </body>
+    </html>
+    """
+
+    subject = f"Reminder: {len(tasks)} task(s) due soon"
+
+    if enqueue_email(recipient_email, subject, html_content, commit=commit):
+        logger.info("Task digest queued for %s (%s task(s))", recipient_email, len(tasks))
+        return True
+    logger.info("Task digest logged (not sent) -> to=%s | tasks=%s", recipient_email, len(tasks))
+    return False
+
+
 def send_learning_milestone(recipient_email: str, milestone_type: str, count: int) -> None:
-    """Send learning milestone notification."""
+    """Queue a learning milestone notification."""
     milestones = {
         "vocab_10": ("10 Words Learned!", "Congratulations! You've learned 10 vocabulary words."),
         "vocab_50": ("50 Words Learned!", "Amazing progress! You've learned 50 vocabulary words."),
@@ -92,20 +282,20 @@ def send_learning_milestone(recipient_email: str, milestone_type: str, count: in
     
     subject = f"🎉 {title}"
     
-    if send_email_via_sendgrid(recipient_email, subject, html_content):
-        logger.info("Milestone email sent to %s: %s", recipient_email, milestone_type)
+    if enqueue_email(recipient_email, subject, html_content):
+        logger.info("Milestone email queued for %s: %s", recipient_email, milestone_type)
     else:
         logger.info("Milestone email logged (not sent) -> to=%s | milestone=%s",
                    recipient_email, milestone_type)
 
 
 def send_welcome_email(recipient_email: str, username: str) -> None:
-    """Send welcome email to new users."""
-    html_content = f"""
+    """Queue a welcome email for a new user."""
+    html_content = """
     <html>
     <body style="font-family: Arial, sans-serif; padding: 20px;">
         <h2 style="color: #667eea;">Welcome to Language Learning Platform!</h2>
-        <p>Hello {username}!</p>
+        <p>Hello -username-!</p>
         <p>Thank you for joining our language learning platform. You're all set to start your learning journey!</p>
         <p>Here's what you can do:</p>
         <ul>
@@ -121,8 +311,10 @@ def send_welcome_email(recipient_email: str, username: str) -> None:
     
     subject = "Welcome to Language Learning Platform!"
     
-    if send_email_via_sendgrid(recipient_email, subject, html_content):
-        logger.info("Welcome email sent to %s", recipient_email)
+    # The greeting is a substitution tag so every welcome email shares one body
+    # and the outbox worker can send them together in a single request.
+    if enqueue_email(recipient_email, subject, html_content, {"-username-": username}):
+        logger.info("Welcome email queued for %s", recipient_email)
     else:
         logger.info("Welcome email logged (not sent) -> to=%s", recipient_email)
 
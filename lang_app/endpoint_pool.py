@@ -0,0 +1,288 @@
+"""Health-aware routing across several LibreTranslate-compatible endpoints.
+
+Each endpoint tracks an EWMA of its latency and error rate plus a circuit
+breaker (closed -> open after repeated failures -> half-open single probe
+after a cooldown). Requests go to the healthiest endpoint first; if it has
+not answered within ``hedge_after`` seconds a second endpoint is fired as
+well and the first good answer wins. The whole call is bounded by ``budget``.
+
+``translate_async`` does the same on an event loop with an ``httpx.AsyncClient``
+(used by the ASGI entry point); both share the same health statistics.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from . import http_client, metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Shared by every pool; losing hedged attempts keep running here in the
+# background and still feed the health statistics when they finish.
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="translate")
+
+
+class Endpoint:
+    def __init__(self, url: str):
+        self.url = url
+        self.latency = None  # EWMA in seconds, None until the first answer
+        self.error_rate = 0.0  # EWMA of failures (0..1)
+        self.failures = 0  # consecutive failures, drives the breaker
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.encoding = None  # "json" or "form" once we know what it accepts
+
+    def snapshot(self) -> dict:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "encoding": self.encoding,
+        }
+
+
+def _translated_text(response):
+    """``translatedText`` of a LibreTranslate reply, or None if the body is not a JSON object."""
+    try:
+        payload = response.json()
+    except ValueError:
+        return None
+    return payload.get("translatedText") if isinstance(payload, dict) else None
+
+
+class EndpointPool:
+    def __init__(
+        self,
+        urls,
+        timeout: float = 15.0,
+        budget: float = 20.0,
+        hedge_after: float = 2.0,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        alpha: float = 0.2,
+    ):
+        self.endpoints = [Endpoint(url) for url in dict.fromkeys(urls) if url]
+        self.timeout = timeout
+        self.budget = budget
+        self.hedge_after = hedge_after
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self._lock = threading.Lock()
+
+    def translate(self, payload: dict):
+        """POST ``payload`` and return its ``translatedText``, or None if nobody answered in budget."""
+        deadline = time.monotonic() + self.budget
+        candidates = iter(self._candidates())
+        in_flight = {}
+
+        def launch() -> bool:
+            for endpoint in candidates:
+                if time.monotonic() >= deadline:
+                    return False
+                if self._claim(endpoint):
+                    future = _executor.submit(metrics.bind(self._attempt), endpoint, payload, deadline)
+                    in_flight[future] = endpoint
+                    return True
+            return False
+
+        launch()
+        while in_flight:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_for = min(remaining, self.hedge_after) if self.hedge_after > 0 else remaining
+            done, _ = wait(in_flight, timeout=wait_for, return_when=FIRST_COMPLETED)
+            if not done:
+                # Latency budget for the current attempt(s) exceeded: hedge.
+                launch()
+                continue
+            for future in done:
+                in_flight.pop(future)
+                translated = future.result()
+                if translated is not None:
+                    return translated
+                launch()
+
+        logger.warning("No translation endpoint answered within %.1fs", self.budget)
+        return None
+
+    async def translate_async(self, payload: dict, client):
+        """Async twin of ``translate`` using ``client`` (an ``httpx.AsyncClient``)."""
+        deadline = time.monotonic() + self.budget
+        candidates = iter(self._candidates())
+        in_flight = {}
+
+        def launch() -> bool:
+            for endpoint in candidates:
+                if time.monotonic() >= deadline:
+                    return False
+                if self._claim(endpoint):
+                    task = asyncio.ensure_future(self._attempt_async(client, endpoint, payload, deadline))
+                    in_flight[task] = endpoint
+                    return True
+            return False
+
+        launch()
+        while in_flight:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_for = min(remaining, self.hedge_after) if self.hedge_after > 0 else remaining
+            done, _ = await asyncio.wait(in_flight, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for task in done:
+                in_flight.pop(task)
+                translated = task.result()
+                if translated is not None:
+                    return translated
+                launch()
+
+        logger.warning("No translation endpoint answered within %.1fs", self.budget)
+        return None
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [endpoint.snapshot() for endpoint in self.endpoints]
+
+    def _candidates(self) -> list:
+        """Usable endpoints, best first by expected cost: latency plus error rate x timeout.
+
+        Untried endpoints score zero so they get explored in configured order.
+        """
+        now = time.monotonic()
+        with self._lock:
+            usable = []
+            for endpoint in self.endpoints:
+                if endpoint.state == OPEN and now - endpoint.opened_at >= self.cooldown:
+                    endpoint.state = HALF_OPEN
+                    endpoint.probing = False
+                if endpoint.state != OPEN:
+                    usable.append(endpoint)
+        return sorted(usable, key=lambda e: (e.latency or 0.0) + e.error_rate * self.timeout)
+
+    def _claim(self, endpoint: Endpoint) -> bool:
+        """Half-open endpoints only let a single probe through at a time."""
+        with self._lock:
+            if endpoint.state == OPEN:
+                return False
+            if endpoint.state == HALF_OPEN:
+                if endpoint.probing:
+                    return False
+                endpoint.probing = True
+            return True
+
+    def _attempt(self, endpoint: Endpoint, payload: dict, deadline: float):
+        encodings = [endpoint.encoding] if endpoint.encoding else ["json", "form"]
+        started = time.monotonic()
+        status = None
+        sent = False
+        try:
+            for encoding in encodings:
+                timeout = min(self.timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+                sent = True
+                if encoding == "json":
+                    response = http_client.post(endpoint.url, json=payload, timeout=timeout)
+                else:
+                    response = http_client.post(endpoint.url, data=payload, timeout=timeout)
+                status = response.status_code
+                if status == 200:
+                    translated = _translated_text(response)
+                    if translated:
+                        self._record(endpoint, True, time.monotonic() - started, encoding)
+                        return translated
+                logger.warning(
+                    "Translation failed on %s (%s): status %s, response: %s",
+                    endpoint.url, encoding, status, response.text[:200],
+                )
+        except requests.RequestException as e:
+            logger.warning("Translation error on %s: %s", endpoint.url, e)
+            status = None
+
+        if not sent:
+            # Queued past the deadline before anything went out: says nothing about the endpoint.
+            self._release(endpoint)
+            return None
+        if status == 400:
+            # The endpoint is healthy, it just rejected this request (e.g. language pair).
+            self._record(endpoint, True, time.monotonic() - started, None)
+        else:
+            self._record(endpoint, False, time.monotonic() - started, None)
+        return None
+
+    async def _attempt_async(self, client, endpoint: Endpoint, payload: dict, deadline: float):
+        import httpx  # noqa: WPS433 (only needed by the ASGI entry point)
+
+        encodings = [endpoint.encoding] if endpoint.encoding else ["json", "form"]
+        started = time.monotonic()
+        status = None
+        sent = False
+        try:
+            for encoding in encodings:
+                timeout = min(self.timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+                sent = True
+                if encoding == "json":
+                    response = await client.post(endpoint.url, json=payload, timeout=timeout)
+                else:
+                    response = await client.post(endpoint.url, data=payload, timeout=timeout)
+                status = response.status_code
+                if status == 200:
+                    translated = _translated_text(response)
+                    if translated:
+                        self._record(endpoint, True, time.monotonic() - started, encoding)
+                        return translated
+                logger.warning(
+                    "Translation failed on %s (%s): status %s, response: %s",
+                    endpoint.url, encoding, status, response.text[:200],
+                )
+        except httpx.HTTPError as e:
+            logger.warning("Translation error on %s: %s", endpoint.url, e)
+            status = None
+
+        if not sent:
+            self._release(endpoint)
+            return None
+        # As in _attempt, a 400 means the endpoint is healthy but rejected this request.
+        self._record(endpoint, status == 400, time.monotonic() - started, None)
+        return None
+
+    def _release(self, endpoint: Endpoint) -> None:
+        """Free a half-open probe slot without recording an outcome."""
+        with self._lock:
+            endpoint.probing = False
+
+    def _record(self, endpoint: Endpoint, ok: bool, latency: float, encoding) -> None:
+        with self._lock:
+            a = self.alpha
+            endpoint.latency = latency if endpoint.latency is None else (1 - a) * endpoint.latency + a * latency
+            endpoint.error_rate = (1 - a) * endpoint.error_rate + a * (0.0 if ok else 1.0)
+            if encoding:
+                endpoint.encoding = encoding
+            endpoint.probing = False
+            if ok:
+                endpoint.failures = 0
+                endpoint.state = CLOSED
+                return
+            endpoint.failures += 1
+            if endpoint.state == HALF_OPEN or endpoint.failures >= self.failure_threshold:
+                if endpoint.state != OPEN:
+                    logger.warning("Circuit opened for %s", endpoint.url)
+                endpoint.state = OPEN
+                endpoint.opened_at = time.monotonic()
@@ -0,0 +1,88 @@
+"""Database engine tuning applied at app creation (DB_ENGINE_PROFILE).
+
+``tuned`` (the default):
+
+- SQLite files: every new connection runs the pragmas below. WAL lets
+  readers continue while another worker commits, ``synchronous=NORMAL``
+  skips the fsync per commit (still durable across application crashes),
+  ``busy_timeout`` makes a writer wait for the lock instead of failing, and
+  the mmap and page cache sizes keep hot pages out of read() calls.
+- Server databases: a sized connection pool with pre-ping and recycling,
+  so connections dropped by the server or a proxy are replaced quietly.
+
+``default`` leaves SQLAlchemy's defaults alone.
+"""
+
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from .extensions import db
+
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "10000"))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Negative values are KiB (so -65536 is 64 MiB), positive values are pages.
+SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", "-65536"))
+# Connection pool per worker process (SQLite files and server databases).
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+
+
+def _sqlite_kind(uri: str):
+    """``"file"``, ``"memory"``, or None when ``uri`` is not SQLite."""
+    url = make_url(uri)
+    if url.get_backend_name() != "sqlite":
+        return None
+    return "memory" if url.database in (None, "", ":memory:") else "file"
+
+
+def sqlite_pragmas() -> list:
+    return [
+        f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size={SQLITE_CACHE_SIZE}",
+    ]
+
+
+def engine_options(config) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database and profile."""
+    if config.get("DB_ENGINE_PROFILE", "tuned") != "tuned":
+        return {}
+    kind = _sqlite_kind(config["SQLALCHEMY_DATABASE_URI"])
+    if kind == "memory":
+        # One shared connection (StaticPool); nothing to size.
+        return {}
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    if kind is None:
+        options.update(pool_pre_ping=True, pool_recycle=DB_POOL_RECYCLE)
+    return options
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def init_engine_profile(app) -> None:
+    """Install the SQLite pragmas on the app's engines (after ``db.init_app``)."""
+    if app.config.get("DB_ENGINE_PROFILE", "tuned") != "tuned":
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite" and not event.contains(engine, "connect", _apply_pragmas):
+                event.listen(engine, "connect", _apply_pragmas)
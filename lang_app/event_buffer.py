@@ -0,0 +1,227 @@
+"""Buffered, batched event log: login events and user activity for analytics.
+
+``record(stream, document)`` appends to a bounded in-process ring buffer and
+returns at once. A background thread per process hands what has accumulated
+to the configured sink every EVENT_FLUSH_SECONDS, or sooner once
+EVENT_BATCH_SIZE events are waiting. Sinks (EVENT_SINK):
+
+- ``mongo``: one ``insert_many`` per stream, into the collection named after it.
+- ``jsonl``: an append-only file, one JSON object per line (one ``write``
+  per batch, so lines from several workers never interleave).
+- ``sqlite``: an ``events`` table in a local SQLite file.
+- ``none``; ``auto`` (the default) is ``mongo`` when MONGO_URI is set,
+  ``jsonl`` when EVENT_LOG_PATH is, and ``none`` otherwise.
+
+The file sinks write only to an explicit EVENT_LOG_PATH: events carry
+usernames and nothing trims the file, so it should live somewhere chosen,
+persistent and rotated, not inside the package.
+
+When the sink is slow or down the buffer fills up (EVENT_BUFFER_MAX).
+``record`` then waits up to EVENT_FULL_WAIT_MS for the flusher to make room
+and, failing that, overwrites the oldest event; waits and drops are counted
+(see ``/metrics``). Whatever is still buffered is flushed at exit.
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import deque
+from datetime import date, datetime
+
+from . import extensions
+
+logger = logging.getLogger(__name__)
+
+EVENT_BATCH_SIZE = int(os.environ.get("EVENT_BATCH_SIZE", "500"))
+EVENT_FLUSH_SECONDS = float(os.environ.get("EVENT_FLUSH_SECONDS", "1"))
+EVENT_BUFFER_MAX = int(os.environ.get("EVENT_BUFFER_MAX", "10000"))
+EVENT_FULL_WAIT_MS = float(os.environ.get("EVENT_FULL_WAIT_MS", "0"))
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class MongoSink:
+    def write(self, batch: list) -> None:
+        mongo_db = extensions.mongo_db
+        if mongo_db is None:
+            raise RuntimeError("MongoDB is not configured")
+        streams = {}
+        for stream, document in batch:
+            streams.setdefault(stream, []).append(document)
+        for stream, documents in streams.items():
+            mongo_db[stream].insert_many(documents, ordered=False)
+
+
+class JsonlSink:
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, batch: list) -> None:
+        data = "".join(
+            json.dumps({"stream": stream, **document}, default=_json_default, separators=(",", ":")) + "\n"
+            for stream, document in batch
+        ).encode()
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+
+
+class SQLiteSink:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY, stream TEXT NOT NULL, created_at TEXT NOT NULL, payload TEXT NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and process (connections must not cross a fork).
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def write(self, batch: list) -> None:
+        rows = [
+            (
+                stream,
+                _json_default(document.get("timestamp") or datetime.utcnow()),
+                json.dumps(document, default=_json_default, separators=(",", ":")),
+            )
+            for stream, document in batch
+        ]
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO events (stream, created_at, payload) VALUES (?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+sink = None
+
+
+class EventBuffer:
+    """Bounded ring buffer of ``(stream, document)`` pairs drained by a background flusher."""
+
+    def __init__(self, max_size: int, batch_size: int, interval: float, full_wait: float):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.full_wait = full_wait
+        self._items: deque = deque()
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+        self._counters = {"recorded": 0, "written": 0, "waited": 0, "dropped": 0, "failed": 0}
+
+    def add(self, stream: str, document: dict) -> None:
+        with self._space:
+            if len(self._items) >= self.max_size and self.full_wait > 0:
+                self._counters["waited"] += 1
+                self._space.wait_for(lambda: len(self._items) < self.max_size, self.full_wait)
+            if len(self._items) >= self.max_size:
+                self._items.popleft()
+                self._counters["dropped"] += 1
+            self._items.append((stream, document))
+            self._counters["recorded"] += 1
+            full = len(self._items) >= self.batch_size
+            # Started lazily so each (forked) web worker runs its own flusher.
+            if self._thread is None or self._thread_pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name="flush-events", daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand everything buffered so far to the sink, one batch at a time."""
+        with self._flush_lock:
+            while True:
+                with self._space:
+                    batch = [self._items.popleft() for _ in range(min(self.batch_size, len(self._items)))]
+                    self._space.notify_all()
+                if not batch:
+                    return
+                current = sink
+                outcome = "written"
+                if current is None:
+                    outcome = "dropped"
+                else:
+                    try:
+                        current.write(batch)
+                    except Exception as e:  # noqa: BLE001
+                        logger.warning("Could not write %d event(s): %s", len(batch), e)
+                        outcome = "failed"
+                with self._lock:
+                    self._counters[outcome] += len(batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending"] = len(self._items)
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+events = EventBuffer(EVENT_BUFFER_MAX, EVENT_BATCH_SIZE, EVENT_FLUSH_SECONDS, EVENT_FULL_WAIT_MS / 1000)
+atexit.register(events.flush)
+
+
+def init_events(app) -> None:
+    """Create the configured sink (EVENT_SINK: auto, mongo, jsonl, sqlite or none)."""
+    global sink
+
+    kind = app.config.get("EVENT_SINK", "auto")
+    path = app.config.get("EVENT_LOG_PATH", "")
+    if kind == "auto":
+        kind = "mongo" if app.config.get("MONGO_URI") else "jsonl" if path else "none"
+    if kind in ("jsonl", "sqlite") and not path:
+        logger.warning("EVENT_SINK=%s needs EVENT_LOG_PATH; events are not recorded", kind)
+        kind = "none"
+    if kind == "mongo":
+        sink = MongoSink()
+    elif kind == "jsonl":
+        sink = JsonlSink(path)
+    elif kind == "sqlite":
+        sink = SQLiteSink(path)
+    else:
+        sink = None
+
+
+def record(stream: str, document: dict) -> None:
+    """Queue ``document`` for ``stream`` (a Mongo collection name) without waiting on the sink."""
+    if sink is None:
+        return
+    events.add(stream, document)
@@ -0,0 +1,172 @@
+import csv
+import io
+import json
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from flask_login import current_user, login_required
+from sqlalchemy import select
+
+from .assignments import split_answer_key
+from .extensions import db
+from .models import Assignment, Task, VocabEntry
+
+export_bp = Blueprint("export", __name__)
+
+# Rows fetched per round trip, and bytes buffered before a chunk is sent.
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _task(row):
+    return {
+        "id": row.id,
+        "name": row.name,
+        "due_date": _iso(row.due_date),
+        "is_completed": row.is_completed,
+        "created_at": _iso(row.created_at),
+    }
+
+
+def _vocab(row):
+    return {
+        "id": row.id,
+        "source_word": row.source_word,
+        "target_language": row.target_language,
+        "translated_word": row.translated_word,
+        "created_at": _iso(row.created_at),
+    }
+
+
+def _assignment(row):
+    content, answer_key = split_answer_key(row.content, row.answer_key)
+    return {
+        "id": row.id,
+        "title": row.title,
+        "description": row.description,
+        "type": row.assignment_type,
+        "language": row.language,
+        "content": content,
+        # Answers stay hidden until the assignment is done, as in get_assignment.
+        "answer_key": answer_key if row.is_completed else None,
+        "is_completed": row.is_completed,
+        "score": row.score,
+        "created_at": _iso(row.created_at),
+        "completed_at": _iso(row.completed_at),
+    }
+
+
+# record type -> (model, columns to select, row -> dict)
+SOURCES = {
+    "task": (
+        Task,
+        [Task.id, Task.name, Task.due_date, Task.is_completed, Task.created_at],
+        _task,
+    ),
+    "vocab": (
+        VocabEntry,
+        [VocabEntry.id, VocabEntry.source_word, VocabEntry.target_language, VocabEntry.translated_word,
+         VocabEntry.created_at],
+        _vocab,
+    ),
+    "assignment": (
+        Assignment,
+        [Assignment.id, Assignment.title, Assignment.description, Assignment.assignment_type,
+         Assignment.language, Assignment.content, Assignment.answer_key, Assignment.is_completed, Assignment.score,
+         Assignment.created_at, Assignment.completed_at],
+        _assignment,
+    ),
+}
+
+CSV_COLUMNS = [
+    "record_type", "id", "name", "due_date", "source_word", "target_language", "translated_word",
+    "title", "description", "type", "language", "content", "answer_key", "is_completed", "score",
+    "created_at", "completed_at",
+]
+
+
+def iter_records(user_id: int, record_types):
+    """Yield ``(record_type, dict)`` for a user's rows without loading them all.
+
+    Each source is read with ``yield_per`` so only one batch of rows is held
+    in memory at a time, in (user_id, created_at) index order so the
+    database does not have to sort the whole history first.
+    """
+    for record_type in record_types:
+        model, columns, serialize = SOURCES[record_type]
+        result = db.session.execute(
+            select(*columns)
+            .where(model.user_id == user_id)
+            .order_by(model.created_at, model.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for row in result:
+            yield record_type, serialize(row)
+
+
+def _chunked(lines):
+    """Join small strings into ~EXPORT_CHUNK_BYTES chunks to keep writes efficient."""
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _ndjson(records):
+    for record_type, record in records:
+        yield json.dumps({"record_type": record_type, **record}) + "\n"
+
+
+def _csv(records):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for record_type, record in records:
+        for name in ("content", "answer_key"):
+            if name in record:
+                record[name] = json.dumps(record[name])
+        writer.writerow({"record_type": record_type, **record})
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+
+
+@export_bp.route("", methods=["GET"])
+@login_required
+def export():
+    """Stream the user's tasks, vocabulary and assignments as NDJSON or CSV.
+
+    Query params: ``format`` (``ndjson`` or ``csv``) and optionally
+    ``include=task,vocab,assignment`` to limit the record types.
+    """
+    fmt = request.args.get("format", "ndjson").lower()
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be 'ndjson' or 'csv'"}), 400
+
+    include = request.args.get("include")
+    record_types = [name.strip() for name in include.split(",")] if include else list(SOURCES)
+    unknown = [name for name in record_types if name not in SOURCES]
+    if unknown:
+        return jsonify({"error": f"Unknown record type(s): {', '.join(unknown)}"}), 400
+
+    records = iter_records(current_user.id, record_types)
+    if fmt == "csv":
+        body, mimetype, extension = _csv(records), "text/csv", "csv"
+    else:
+        body, mimetype, extension = _ndjson(records), "application/x-ndjson", "ndjson"
+
+    return Response(
+        stream_with_context(_chunked(body)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=lang_app_export.{extension}"},
+    )
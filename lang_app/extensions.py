@@ -1,6 +1,11 @@
+import logging
+
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
 from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
 
 db = SQLAlchemy()
 login_manager = LoginManager()
@@ -28,3 +33,21 @@ def init_mongo(app):
 
     mongo_db = mongo_client[db_name]
 
+
+def ensure_mongo_indexes() -> bool:
+    """Create the unique user indexes; False if MongoDB could not be reached.
+
+    Run by ``init-db`` rather than at app start, so an unreachable MongoDB
+    cannot stall worker boot.
+    """
+    if mongo_db is None:
+        return True
+    # Credential lookups are by username; both fields must stay unique.
+    try:
+        mongo_db.users.create_index("username", unique=True)
+        mongo_db.users.create_index("email", unique=True)
+    except PyMongoError as e:
+        logger.warning("Could not create MongoDB user indexes: %s", e)
+        return False
+    return True
+
@@ -0,0 +1,96 @@
+"""Short-lived, bounded cache of the logged-in user's identity.
+
+Flask-Login calls the user loader on every authenticated request. With this
+cache the loader rebuilds the ``User`` from remembered column values and
+attaches it to the session with ``merge(load=False)``, so no SELECT is
+issued; changes made through ``current_user`` are still flushed as usual.
+
+The cache is per process. Writes that change a user call ``invalidate``;
+other workers pick the change up when their entry expires, so
+IDENTITY_CACHE_TTL bounds how stale e.g. ``preferred_language`` can be
+there. ``password_hash`` is never cached (it loads on access).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from .extensions import db
+from .models import User
+
+IDENTITY_CACHE_SIZE = int(os.environ.get("IDENTITY_CACHE_SIZE", "4096"))
+# Seconds an entry is reused; 0 disables the cache.
+IDENTITY_CACHE_TTL = float(os.environ.get("IDENTITY_CACHE_TTL", "30"))
+
+_COLUMNS = [column.key for column in User.__table__.columns if column.key != "password_hash"]
+
+
+class IdentityCache:
+    """user id -> column values, LRU-bounded with a TTL."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+
+    def load(self, user_id: int):
+        """The user for ``user_id`` (or None), from the cache when possible."""
+        if self.ttl <= 0:
+            return db.session.get(User, user_id)
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(user_id)
+            if item is not None and item[1] > now:
+                self._entries.move_to_end(user_id)
+                self._counters["hits"] += 1
+                values = item[0]
+            else:
+                self._counters["misses"] += 1
+                values = None
+
+        if values is None:
+            user = db.session.get(User, user_id)
+            if user is not None:
+                self.remember(user)
+            return user
+
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    def remember(self, user) -> None:
+        """Cache ``user``'s current column values (call after committing changes)."""
+        if self.ttl <= 0:
+            return
+        values = {key: getattr(user, key) for key in _COLUMNS}
+        with self._lock:
+            self._entries[user.id] = (values, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else None
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+identity_cache = IdentityCache(IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL)
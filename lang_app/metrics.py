@@ -0,0 +1,295 @@
+"""Request timing instrumentation and a Prometheus-format ``/metrics`` endpoint.
+
+``init_metrics`` (called from ``create_app``) records for every request its
+latency by endpoint, the number and total time of its SQL queries
+(SQLAlchemy cursor events) and the time it spent in outbound HTTP calls
+(``http_client`` and the ASGI client report them through
+``observe_outbound``). Cache hit ratios are read from the caches' own
+``stats()`` when ``/metrics`` is scraped, so lookups pay nothing extra.
+
+With SERVER_TIMING on, every response also carries a ``Server-Timing``
+header (``app``, ``db`` and ``http`` durations) for the browser dev tools.
+
+Metrics live in the process that recorded them: under gunicorn each worker
+answers ``/metrics`` with its own numbers, like any per-instance target.
+No ``prometheus_client`` dependency; the text format is written here.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+from flask import Response, abort, request
+from sqlalchemy import event
+
+from .extensions import db
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            values = {key: ([*counts], total, count) for key, (counts, total, count) in self._values.items()}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in values.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else _number(bound)
+                lines.append(f"{self.name}_bucket{_labels((*self.labels, 'le'), (*key, le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+request_duration = Histogram(
+    "lang_app_request_duration_seconds", "Time to produce a response.", ("method", "endpoint", "status")
+)
+request_sql_queries = Histogram(
+    "lang_app_request_sql_queries", "SQL queries issued per request.", ("endpoint",), COUNT_BUCKETS
+)
+request_sql_seconds = Histogram(
+    "lang_app_request_sql_seconds", "Time per request spent in SQL queries.", ("endpoint",)
+)
+request_http_seconds = Histogram(
+    "lang_app_request_http_seconds", "Time per request spent in outbound HTTP calls.", ("endpoint",)
+)
+sql_query_duration = Histogram("lang_app_sql_query_duration_seconds", "Duration of one SQL query.", (), QUERY_BUCKETS)
+outbound_duration = Histogram(
+    "lang_app_outbound_request_duration_seconds", "Duration of outbound HTTP calls.", ("host", "status")
+)
+
+REGISTRY = [
+    request_duration,
+    request_sql_queries,
+    request_sql_seconds,
+    request_http_seconds,
+    sql_query_duration,
+    outbound_duration,
+]
+# Callables returning extra exposition lines when /metrics is scraped.
+COLLECTORS = []
+
+
+class RequestTimings:
+    """What one request spent its time on; shared with pool threads via ``bind``."""
+
+    __slots__ = ("started", "sql_queries", "sql_seconds", "http_seconds", "lock")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.http_seconds = 0.0
+        self.lock = threading.Lock()
+
+
+_current: ContextVar = ContextVar("lang_app_request_timings", default=None)
+
+
+def bind(fn):
+    """Wrap ``fn`` so work it does on another thread counts toward the current request."""
+    timings = _current.get()
+    if timings is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _current.set(timings)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return run
+
+
+def observe_outbound(url: str, status, seconds: float) -> None:
+    """Record one outbound HTTP call (``status`` is the code, or None on error)."""
+    status_class = f"{status // 100}xx" if status else "error"
+    outbound_duration.observe(seconds, urlsplit(url).netloc, status_class)
+    timings = _current.get()
+    if timings is not None:
+        with timings.lock:
+            timings.http_seconds += seconds
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for collect in COLLECTORS:
+        try:
+            lines.extend(collect())
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Metrics collector failed: %s", e)
+    return "\n".join(lines) + "\n"
+
+
+def _cache_lines() -> list:
+    from . import response_cache  # noqa: WPS433
+    from .identity_cache import identity_cache  # noqa: WPS433
+    from .translation_cache import translation_cache  # noqa: WPS433
+
+    caches = {
+        "translation": translation_cache.stats(),
+        "response": response_cache.stats(),
+        "identity": identity_cache.stats(),
+    }
+    lines = [
+        "# HELP lang_app_cache_lookups_total Cache lookups by outcome.",
+        "# TYPE lang_app_cache_lookups_total counter",
+    ]
+    ratios = [
+        "# HELP lang_app_cache_hit_ratio Share of lookups answered from the cache.",
+        "# TYPE lang_app_cache_hit_ratio gauge",
+    ]
+    for cache, stats in caches.items():
+        for result, count in stats.items():
+            if result not in ("size", "hit_ratio"):
+                lines.append(f"lang_app_cache_lookups_total{_labels(('cache', 'result'), (cache, result))} {count}")
+        if stats.get("hit_ratio") is not None:
+            ratios.append(f"lang_app_cache_hit_ratio{_labels(('cache',), (cache,))} {_number(stats['hit_ratio'])}")
+    return lines + ratios
+
+
+COLLECTORS.append(_cache_lines)
+
+
+def _event_lines() -> list:
+    from .event_buffer import events  # noqa: WPS433
+
+    stats = events.stats()
+    lines = [
+        "# HELP lang_app_events_total Buffered login and activity events by outcome.",
+        "# TYPE lang_app_events_total counter",
+    ]
+    for outcome in ("recorded", "written", "waited", "dropped", "failed"):
+        lines.append(f"lang_app_events_total{_labels(('outcome',), (outcome,))} {stats[outcome]}")
+    return lines + [
+        "# HELP lang_app_events_pending Events waiting to be written.",
+        "# TYPE lang_app_events_pending gauge",
+        f"lang_app_events_pending {stats['pending']}",
+    ]
+
+
+COLLECTORS.append(_event_lines)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("lang_app_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["lang_app_query_started"].pop()
+    elapsed = time.perf_counter() - started
+    sql_query_duration.observe(elapsed)
+    timings = _current.get()
+    if timings is not None:
+        with timings.lock:
+            timings.sql_queries += 1
+            timings.sql_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute.
+    started = exception_context.connection.info.get("lang_app_query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def init_metrics(app) -> None:
+    """Register the request hooks, SQL event listeners and ``/metrics`` (METRICS_ENABLED).
+
+    ``/metrics`` wants ``Authorization: Bearer <METRICS_TOKEN>`` and is not
+    served at all without a token (behind a proxy every request would look
+    local, so there is no safe anonymous case); timings are still recorded.
+    """
+    if not app.config.get("METRICS_ENABLED", False):
+        return
+    server_timing = app.config.get("SERVER_TIMING", False)
+    token = app.config.get("METRICS_TOKEN", "")
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+                event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+                event.listen(engine, "handle_error", _handle_error)
+
+    @app.before_request
+    def start_timing():
+        _current.set(RequestTimings())
+
+    @app.after_request
+    def record_timing(response):
+        timings = _current.get()
+        if timings is None:
+            return response
+        elapsed = time.perf_counter() - timings.started
+        endpoint = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        request_duration.observe(elapsed, request.method, endpoint, response.status_code)
+        request_sql_queries.observe(timings.sql_queries, endpoint)
+        request_sql_seconds.observe(timings.sql_seconds, endpoint)
+        request_http_seconds.observe(timings.http_seconds, endpoint)
+        if server_timing:
+            response.headers["Server-Timing"] = (
+                f"app;dur={elapsed * 1000:.1f}, "
+                f'db;dur={timings.sql_seconds * 1000:.1f};desc="{timings.sql_queries} queries", '
+                f"http;dur={timings.http_seconds * 1000:.1f}"
+            )
+        return response
+
+    @app.teardown_request
+    def stop_timing(exc=None):
+        _current.set(None)
+
+    if not token:
+        logger.warning("METRICS_TOKEN is not set; /metrics is disabled")
+        return
+
+    def metrics_view():
+        if request.headers.get("Authorization") != f"Bearer {token}":
+            abort(401)
+        return Response(render(), mimetype="text/plain; version=0.0.4")
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
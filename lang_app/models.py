@@ -1,9 +1,44 @@
+import base64
+import json
+import zlib
 from datetime import datetime
 
 from flask_login import UserMixin
-from werkzeug.security import check_password_hash, generate_password_hash
 
 from .extensions import db
+from .passwords import hash_password, verify_password
+
+# Payloads at least this long (as JSON) are stored zlib-compressed.
+COMPRESS_MIN_BYTES = 256
+
+
+class CompressedJSON(db.TypeDecorator):
+    """JSON stored in a Text column, zlib-compressed when that makes it smaller.
+
+    Compressed values are written as ``"z:" + base64(zlib(json))``; anything
+    else is read as plain JSON, so rows written before compression (or too
+    small to benefit) decode transparently.
+    """
+
+    impl = db.Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+        if len(raw) >= COMPRESS_MIN_BYTES:
+            packed = "z:" + base64.b64encode(zlib.compress(raw.encode(), 6)).decode()
+            if len(packed) < len(raw):
+                return packed
+        return raw
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if value.startswith("z:"):
+            return json.loads(zlib.decompress(base64.b64decode(value[2:])))
+        return json.loads(value)
 
 
 class User(UserMixin, db.Model):
@@ -18,13 +53,21 @@ class User(UserMixin, db.Model):
     assignments = db.relationship("Assignment", backref="user", lazy=True)
 
     def set_password(self, password: str) -> None:
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
 
 class Task(db.Model):
+    __table_args__ = (
+        db.Index("ix_task_user_created", "user_id", "created_at"),
+        # Serves the dashboard's upcoming tasks.
+        db.Index("ix_task_user_open_due", "user_id", "is_completed", "due_date"),
+        # Serves the reminder scan: open tasks in a due-date window, across users.
+        db.Index("ix_task_open_due_user", "is_completed", "due_date", "user_id", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     name = db.Column(db.String(255), nullable=False)
@@ -33,25 +76,131 @@ class Task(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+class TaskReminder(db.Model):
+    """Records that a reminder went out for a task's current due date."""
+
+    __table_args__ = (db.UniqueConstraint("task_id", "due_date", name="uq_task_reminder_task_due"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, db.ForeignKey("task.id", ondelete="CASCADE"), nullable=False)
+    due_date = db.Column(db.Date, nullable=False)
+    sent_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 class VocabEntry(db.Model):
+    __table_args__ = (
+        db.Index("ix_vocab_entry_user_created", "user_id", "created_at"),
+        db.Index("ix_vocab_entry_user_language", "user_id", "target_language"),
+        # id range probes for random sampling (see sampling.py)
+        db.Index("ix_vocab_entry_user_id", "user_id", "id"),
+        # spaced-repetition due queues, overall and per language (see scheduler.py)
+        db.Index("ix_vocab_entry_user_due", "user_id", "due_at"),
+        db.Index("ix_vocab_entry_user_language_due", "user_id", "target_language", "due_at"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     source_word = db.Column(db.String(255), nullable=False)
     target_language = db.Column(db.String(10), nullable=False)
     translated_word = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # SM-2 review state; new words are due immediately.
+    ease = db.Column(db.Float, nullable=False, default=2.5)
+    interval_days = db.Column(db.Integer, nullable=False, default=0)
+    repetitions = db.Column(db.Integer, nullable=False, default=0)
+    due_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
+
+
+class CachedTranslation(db.Model):
+    """Persistent tier of the translation cache (see translation_cache.py)."""
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "source_text", "source_language", "target_language",
+            name="uq_cached_translation_key",
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    source_text = db.Column(db.String(255), nullable=False)
+    source_language = db.Column(db.String(10), nullable=False)
+    target_language = db.Column(db.String(10), nullable=False)
+    translated_text = db.Column(db.String(255), nullable=True)  # NULL = cached failure
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class StarterSet(db.Model):
+    """Fully translated starter words for one language (see starter_sets.py)."""
+
+    language = db.Column(db.String(10), primary_key=True)
+    words = db.Column(db.Text, nullable=False)  # JSON object: English word -> translation
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
 class Assignment(db.Model):
+    __table_args__ = (db.Index("ix_assignment_user_created", "user_id", "created_at"),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
     assignment_type = db.Column(db.String(50), nullable=False)  # 'translation', 'fill_blank', 'multiple_choice'
     language = db.Column(db.String(10), nullable=False)  # Target language
-    content = db.Column(db.Text, nullable=False)  # JSON string with exercise data
+    # Question payload and answer key are stored separately, and only loaded
+    # by the endpoints that need them.
+    content = db.deferred(db.Column(CompressedJSON, nullable=False))
+    answer_key = db.deferred(db.Column(CompressedJSON, nullable=True))  # {"answers": ..., "vocab_ids": ...}
     is_completed = db.Column(db.Boolean, default=False)
     score = db.Column(db.Float, nullable=True)  # Percentage score
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime, nullable=True)
 
+
+class OutboxEmail(db.Model):
+    """Email waiting to be delivered by the outbox worker (see email_utils.py)."""
+
+    __table_args__ = (db.Index("ix_outbox_email_status_next", "status", "next_attempt_at"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    html_content = db.Column(db.Text, nullable=False)
+    substitutions = db.Column(db.Text, nullable=True)  # JSON object of SendGrid substitution tags
+    status = db.Column(db.String(20), nullable=False, default="pending")  # 'pending', 'sending', 'sent', 'dead'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # When a pending email is due, or when a 'sending' claim expires.
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+
+class UserStats(db.Model):
+    """Per-user dashboard counters, maintained incrementally (see stats.py)."""
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    tasks_total = db.Column(db.Integer, nullable=False, default=0)
+    tasks_completed = db.Column(db.Integer, nullable=False, default=0)
+    vocab_total = db.Column(db.Integer, nullable=False, default=0)
+    assignments_total = db.Column(db.Integer, nullable=False, default=0)
+    assignments_completed = db.Column(db.Integer, nullable=False, default=0)
+    assignment_score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    assignment_score_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class UserLanguageStats(db.Model):
+    """Vocabulary count per user and target language."""
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    language = db.Column(db.String(10), primary_key=True)
+    vocab_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class UserDailyStats(db.Model):
+    """Tasks and vocab entries created per user and (UTC) day."""
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    tasks_created = db.Column(db.Integer, nullable=False, default=0)
+    vocab_created = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,114 @@
+"""Keyset pagination and field projection for the list endpoints.
+
+Without ``limit``/``cursor`` a list endpoint keeps returning the full JSON
+array it always has. With them it returns ``{"items": [...], "next_cursor":
+...}``; the cursor encodes the last row's ``(created_at, id)`` so every page
+is an index range scan, no matter how deep it is. ``fields=a,b`` selects only
+those columns from the database.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from flask import jsonify, request
+from sqlalchemy import select, tuple_
+
+from .extensions import db
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Return ``(created_at, id)``; raises ValueError for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def list_response(model, criteria, fields: dict):
+    """Build the response for a ``created_at DESC`` list of ``model`` rows.
+
+    ``fields`` maps each JSON key to ``(column, formatter)``, in output order.
+    """
+    requested = request.args.get("fields")
+    if requested:
+        names = list(dict.fromkeys(name.strip() for name in requested.split(",") if name.strip()))
+        unknown = [name for name in names if name not in fields]
+        if unknown or not names:
+            return jsonify({"error": f"Unknown field(s): {', '.join(unknown) or requested}"}), 400
+    else:
+        names = list(fields)
+
+    paginate = "limit" in request.args or "cursor" in request.args
+    stmt = list_query(model, criteria, fields, names)
+
+    if not paginate:
+        rows = db.session.execute(stmt).all()
+        return jsonify([_serialize(row, names, fields) for row in rows])
+
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            created_at, row_id = decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        stmt = stmt.where(after_cursor(model, created_at, row_id))
+    else:
+        stmt = stmt.where(after_cursor(model))
+
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]._created_at, rows[-1]._id)
+
+    return jsonify({"items": [_serialize(row, names, fields) for row in rows], "next_cursor": next_cursor})
+
+
+def list_query(model, criteria, fields: dict, names):
+    """The ``created_at DESC, id DESC`` SELECT behind ``list_response``."""
+    return (
+        select(
+            model.id.label("_id"),
+            model.created_at.label("_created_at"),
+            *(fields[name][0].label(name) for name in names),
+        )
+        .where(*criteria)
+        .order_by(model.created_at.desc(), model.id.desc())
+    )
+
+
+def after_cursor(model, created_at=None, row_id=None):
+    """Keyset condition for the page after ``(created_at, row_id)``, or the first page."""
+    if created_at is None:
+        # Rows without a timestamp cannot be addressed by a cursor.
+        return model.created_at.isnot(None)
+    return tuple_(model.created_at, model.id) < tuple_(created_at, row_id)
+
+
+def _serialize(row, names, fields) -> dict:
+    return {name: fields[name][1](getattr(row, name)) for name in names}
+
+
+def as_is(value):
+    return value
+
+
+def isoformat(value):
+    return value.isoformat() if value else None
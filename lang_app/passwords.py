@@ -0,0 +1,117 @@
+"""Password hashing policy and where the hashing runs.
+
+PASSWORD_HASH_METHOD is a werkzeug method string ("scrypt",
+"scrypt:16384:8:1", "pbkdf2:sha256:600000", ...), so the algorithm and cost
+can differ per environment. Hashes made under an older policy still verify;
+``needs_rehash`` tells login to store a fresh hash once the password is known.
+
+Hashing is deliberately slow, so with PASSWORD_HASH_WORKERS > 0 it runs in a
+small process pool per web worker instead of on the request thread. At most
+PASSWORD_HASH_MAX_PENDING jobs are queued or running; beyond that callers
+wait up to PASSWORD_HASH_QUEUE_TIMEOUT seconds and then get ``HashingBusy``
+(a 503), so a burst of logins cannot take every core or request thread.
+Pool processes are spawned, not forked, so they never inherit a worker's
+threads or held locks; scripts that hash must guard ``__main__`` as usual.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import cached_property
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+
+
+class HashingBusy(Exception):
+    """Too many password hashes are already queued in this worker."""
+
+
+class HashingPolicy:
+    def __init__(self, method: str = "scrypt", workers: int = 0, max_pending: int = 16):
+        self.settings = (method, workers, max_pending)
+        self.method = method
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max(max_pending, workers, 1))
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    @cached_property
+    def prefix(self) -> str:
+        """What new hashes start with before the first "$", e.g. "scrypt:32768:8:1"."""
+        return generate_password_hash("", self.method).split("$", 1)[0]
+
+    def _executor(self):
+        with self._lock:
+            # Created lazily so each (forked) web worker gets its own pool.
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def run(self, fn, *args):
+        """``fn(*args)`` in the pool (or inline when there is none), waiting for a free slot."""
+        if self.workers <= 0:
+            return fn(*args)
+        if not self._slots.acquire(timeout=PASSWORD_HASH_QUEUE_TIMEOUT):
+            raise HashingBusy()
+        try:
+            return self._executor().submit(fn, *args).result()
+        except BrokenProcessPool:
+            logger.warning("Password hashing pool died; hashing inline")
+            with self._lock:
+                self._pool = None
+            return fn(*args)
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+policy = HashingPolicy()
+
+
+def init_password_hashing(app) -> None:
+    """Apply PASSWORD_HASH_METHOD/WORKERS/MAX_PENDING and turn ``HashingBusy`` into a 503."""
+    global policy
+
+    settings = (
+        app.config.get("PASSWORD_HASH_METHOD", "scrypt"),
+        app.config.get("PASSWORD_HASH_WORKERS", 0),
+        app.config.get("PASSWORD_HASH_MAX_PENDING", 16),
+    )
+    if settings != policy.settings:
+        policy.shutdown()
+        policy = HashingPolicy(*settings)
+
+    @app.errorhandler(HashingBusy)
+    def hashing_busy(error):
+        return {"error": "Too many sign-ins right now, please retry"}, 503, {"Retry-After": "1"}
+
+
+def hash_password(password: str) -> str:
+    return policy.run(generate_password_hash, password, policy.method)
+
+
+def verify_password(pwhash: str, password: str) -> bool:
+    if not pwhash:
+        return False
+    return policy.run(check_password_hash, pwhash, password)
+
+
+def needs_rehash(pwhash: str) -> bool:
+    """True when ``pwhash`` was not made with the current method and cost."""
+    return pwhash.split("$", 1)[0] != policy.prefix
@@ -0,0 +1,75 @@
+"""EXPLAIN QUERY PLAN checks for the hot queries (``flask check-query-plans``).
+
+Each entry is built by the same function the hot request path uses (or,
+for primary-key ``db.session.get`` calls, the equivalent SELECT). On SQLite the
+check fails if any of them reads a table with a full scan instead of an
+index search, or does not use the index REQUIRED_INDEXES names for it,
+which usually means an index is missing or not usable.
+"""
+
+import re
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, text
+
+from .analytics import daily_counts_query, language_counts_query, upcoming_tasks_query
+from .assignments import ASSIGNMENT_FIELDS
+from .extensions import db
+from .models import Assignment, Task, UserLanguageStats, UserStats, VocabEntry
+from .pagination import after_cursor, list_query
+from .reminders import due_tasks_query
+from .sampling import bounds_query, probe_query, vocab_criteria
+from .scheduler import due_query
+from .tasks import TASK_FIELDS
+from .vocab import REVIEW_DEFAULT_LIMIT, VOCAB_FIELDS
+
+# "SCAN task" is a full table scan; "SCAN task USING INDEX ..." walks an index.
+_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+# Queries that must use one particular index: any other one still reads far
+# more rows than they need (e.g. every user's tasks for the reminder window).
+REQUIRED_INDEXES = {"reminder_due_tasks": "ix_task_open_due_user"}
+
+
+def hot_queries(user_id: int = 1) -> dict:
+    def listing(model, fields):
+        return list_query(model, [model.user_id == user_id], fields, list(fields))
+
+    return {
+        "list_tasks": listing(Task, TASK_FIELDS),
+        "list_vocab": listing(VocabEntry, VOCAB_FIELDS),
+        "list_vocab_page": listing(VocabEntry, VOCAB_FIELDS)
+        .where(after_cursor(VocabEntry, datetime.utcnow(), 1000))
+        .limit(51),
+        "list_assignments": listing(Assignment, ASSIGNMENT_FIELDS),
+        "sample_vocab_bounds": bounds_query(vocab_criteria(user_id)),
+        "sample_vocab": probe_query(vocab_criteria(user_id), [1000]),
+        "sample_vocab_language": probe_query(vocab_criteria(user_id, "es"), [1000]),
+        "review_queue": due_query(user_id, REVIEW_DEFAULT_LIMIT),
+        "review_queue_language": due_query(user_id, REVIEW_DEFAULT_LIMIT, "es"),
+        # db.session.get() of the stats rows (dashboard totals, vocab_count).
+        "dashboard_totals": select(UserStats).where(UserStats.user_id == user_id),
+        "vocab_count_language": select(UserLanguageStats).where(
+            UserLanguageStats.user_id == user_id, UserLanguageStats.language == "es"
+        ),
+        "dashboard_languages": language_counts_query(user_id),
+        "dashboard_daily": daily_counts_query(user_id, date.today() - timedelta(days=30)),
+        "dashboard_upcoming": upcoming_tasks_query(user_id, date.today() + timedelta(days=7)),
+        "reminder_due_tasks": due_tasks_query(date.today(), date.today() + timedelta(days=1)),
+    }
+
+
+def check_query_plans(user_id: int = 1) -> dict:
+    """Return ``{query name: plan lines}`` for scans and missed REQUIRED_INDEXES (SQLite only)."""
+    if db.engine.dialect.name != "sqlite":
+        raise RuntimeError("check-query-plans only understands SQLite query plans")
+
+    problems = {}
+    with db.engine.connect() as conn:
+        for name, stmt in hot_queries(user_id).items():
+            compiled = stmt.compile(db.engine, compile_kwargs={"literal_binds": True})
+            plan = [row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+            scans = [line for line in plan if _FULL_SCAN.match(line)]
+            required = REQUIRED_INDEXES.get(name)
+            if scans or (required and not any(required in line for line in plan)):
+                problems[name] = plan
+    return problems
@@ -0,0 +1,181 @@
+"""Per-user response cache with write-driven invalidation.
+
+Cached payloads are tagged with the user's version counter; write handlers
+call ``bump(user_id)`` after committing, which increments the counter and
+drops the user's cached payloads. Two backends are available:
+
+- ``memory``: bounded in-process LRU, for a single worker.
+- ``sqlite``: a shared SQLite file, so every gunicorn worker sees the same
+  versions and payloads.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value, _ = self._entries.get(key, (0, None))
+            self._entries[key] = (value + 1, None)
+            self._entries.move_to_end(key)
+            return value + 1
+
+
+class SQLiteBackend:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and process (connections must not cross a fork).
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str):
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl if ttl else None),
+        )
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def incr(self, key: str) -> int:
+        row = self._connect().execute(
+            "INSERT INTO cache (key, value, expires_at) VALUES (?, '1', NULL) "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1 "
+            "RETURNING value",
+            (key,),
+        ).fetchone()
+        return int(row[0])
+
+
+backend = None
+
+# Cached payload keys per user; ``bump`` drops all of them.
+USER_KEYS = ("dashboard",)
+
+_counters = {"hits": 0, "misses": 0}
+_counters_lock = threading.Lock()
+
+
+def init_response_cache(app) -> None:
+    """Create the configured backend (RESPONSE_CACHE_BACKEND: memory, sqlite or none)."""
+    global backend
+
+    kind = app.config.get("RESPONSE_CACHE_BACKEND", "memory")
+    if kind == "sqlite":
+        backend = SQLiteBackend(app.config["RESPONSE_CACHE_PATH"])
+    elif kind == "memory":
+        backend = MemoryBackend(app.config.get("RESPONSE_CACHE_SIZE", 1024))
+    else:
+        backend = None
+
+
+def _safe(call, default=None):
+    """The cache is an optimization: log backend errors instead of failing requests."""
+    try:
+        return call()
+    except Exception as e:  # noqa: BLE001
+        logger.warning("Response cache error: %s", e)
+        return default
+
+
+def version(user_id: int) -> int:
+    if backend is None:
+        return 0
+    return _safe(lambda: backend.get(f"version:{user_id}") or 0, 0)
+
+
+def bump(user_id: int) -> None:
+    """Invalidate everything cached for ``user_id``; call after committing a write."""
+    if backend is None:
+        return
+
+    def invalidate():
+        backend.incr(f"version:{user_id}")
+        for name in USER_KEYS:
+            backend.delete(f"{name}:{user_id}")
+
+    _safe(invalidate)
+
+
+def lookup(name: str, user_id: int, current_version: int):
+    """Return the cached value for ``name`` if it was stored at ``current_version``."""
+    if backend is None:
+        return None
+    entry = _safe(lambda: backend.get(f"{name}:{user_id}"))
+    hit = bool(entry) and entry.get("version") == current_version
+    with _counters_lock:
+        _counters["hits" if hit else "misses"] += 1
+    return entry.get("value") if hit else None
+
+
+def store(name: str, user_id: int, current_version: int, value, ttl: float | None = None) -> None:
+    if backend is None:
+        return
+    _safe(lambda: backend.set(f"{name}:{user_id}", {"version": current_version, "value": value}, ttl))
+
+
+def stats() -> dict:
+    """Lookup counts and hit ratio for this process."""
+    with _counters_lock:
+        counts = dict(_counters)
+    lookups = counts["hits"] + counts["misses"]
+    counts["hit_ratio"] = round(counts["hits"] / lookups, 4) if lookups else None
+    return counts
@@ -0,0 +1,108 @@
+"""Random vocabulary samples without reading a user's whole vocabulary.
+
+Small vocabularies are sampled from their id list (one covering-index read).
+Larger ones use rowid range probes: pick random ids between the user's
+smallest and largest id and take the first row at or after each, all as
+scalar subqueries of a single SELECT. Each probe is an index seek, so a
+sample costs O(k) no matter how many words the user has. Rows that follow
+a gap in the id sequence are a little more likely to be picked, which is
+fine for quizzes. When the ids are so clustered that the probes keep
+hitting the same rows, the shortfall is read in id order from a random
+start, so a large enough vocabulary always yields ``k`` ids.
+"""
+
+import random
+
+from sqlalchemy import select
+
+from . import stats
+from .extensions import db
+from .models import VocabEntry
+
+# Below this many candidate rows, sampling the full id list is just as cheap.
+SAMPLE_SCAN_LIMIT = 256
+# Probe rounds before settling for fewer than k distinct ids.
+SAMPLE_MAX_ROUNDS = 4
+
+
+def vocab_criteria(user_id: int, language=None) -> list:
+    criteria = [VocabEntry.user_id == user_id]
+    if language:
+        criteria.append(VocabEntry.target_language == language)
+    return criteria
+
+
+def sample_vocab_ids(user_id: int, k: int, language=None, rng=random) -> list:
+    """Return up to ``k`` distinct random VocabEntry ids for the user (and language)."""
+    total = stats.vocab_count(user_id, language)
+    if k <= 0 or total <= 0:
+        return []
+    criteria = vocab_criteria(user_id, language)
+
+    if total <= max(SAMPLE_SCAN_LIMIT, 4 * k):
+        ids = db.session.scalars(select(VocabEntry.id).where(*criteria)).all()
+        return rng.sample(ids, min(k, len(ids)))
+
+    low, high = db.session.execute(bounds_query(criteria)).one()
+    if low is None:
+        return []
+
+    chosen = []
+    seen = set()
+    for _ in range(SAMPLE_MAX_ROUNDS):
+        # Over-probe a little so collisions rarely need another round.
+        probes = [rng.randint(low, high) for _ in range(2 * (k - len(chosen)))]
+        row = db.session.execute(probe_query(criteria, probes)).one()
+        for entry_id in row:
+            if entry_id is not None and entry_id not in seen:
+                seen.add(entry_id)
+                chosen.append(entry_id)
+        if len(chosen) >= k:
+            break
+    if len(chosen) < k:
+        # Clustered ids make most probes land on the same rows; take the rest
+        # in id order from a random start, wrapping around to the lowest id.
+        start = rng.randint(low, high)
+        for window in (VocabEntry.id >= start, VocabEntry.id < start):
+            if len(chosen) >= k:
+                break
+            chosen.extend(
+                db.session.scalars(
+                    select(VocabEntry.id)
+                    .where(*criteria, window, VocabEntry.id.notin_(seen))
+                    .order_by(VocabEntry.id)
+                    .limit(k - len(chosen))
+                )
+            )
+    return chosen[:k]
+
+
+def bounds_query(criteria):
+    # Two index seeks; a combined MIN()/MAX() would scan the user's index range.
+    return select(
+        select(VocabEntry.id).where(*criteria).order_by(VocabEntry.id).limit(1).scalar_subquery(),
+        select(VocabEntry.id).where(*criteria).order_by(VocabEntry.id.desc()).limit(1).scalar_subquery(),
+    )
+
+
+def probe_query(criteria, probes):
+    """First id at or after each probe, one scalar subquery (index seek) per probe."""
+    return select(
+        *(
+            select(VocabEntry.id)
+            .where(*criteria, VocabEntry.id >= probe)
+            .order_by(VocabEntry.id)
+            .limit(1)
+            .scalar_subquery()
+            for probe in probes
+        )
+    )
+
+
+def sample_vocab(user_id: int, k: int, language=None, rng=random) -> list:
+    """Return up to ``k`` random VocabEntry rows, fetched in one query."""
+    ids = sample_vocab_ids(user_id, k, language, rng)
+    if not ids:
+        return []
+    by_id = {entry.id: entry for entry in db.session.scalars(select(VocabEntry).where(VocabEntry.id.in_(ids)))}
+    return [by_id[entry_id] for entry_id in ids if entry_id in by_id]
@@ -0,0 +1,103 @@
+"""SM-2 spaced-repetition scheduling for vocabulary entries.
+
+Each VocabEntry carries its review state (ease, interval, repetitions,
+due_at). Graded assignments feed ``record_reviews``, which updates every
+reviewed card in one batched UPDATE inside the caller's transaction. Due
+cards are read from the ``(user_id[, target_language], due_at)`` indexes with
+a LIMIT, so finding the next cards is a bounded index range scan.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from .extensions import db
+from .models import VocabEntry
+from .sampling import sample_vocab
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+# Longest gap between reviews (SM-2 intervals otherwise grow without bound).
+MAX_INTERVAL_DAYS = 36500
+# SM-2 quality grades (0-5) given to a correct and an incorrect answer.
+QUALITY_CORRECT = 4
+QUALITY_INCORRECT = 1
+
+
+def next_review(ease: float, interval_days: int, repetitions: int, quality: int, now=None) -> dict:
+    """Apply one SM-2 step; returns the new review state."""
+    now = now or datetime.utcnow()
+    if quality >= 3:
+        if repetitions == 0:
+            interval_days = 1
+        elif repetitions == 1:
+            interval_days = 6
+        else:
+            interval_days = min(MAX_INTERVAL_DAYS, max(1, round(interval_days * ease)))
+        repetitions += 1
+    else:
+        repetitions = 0
+        interval_days = 1
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return {
+        "ease": round(ease, 4),
+        "interval_days": interval_days,
+        "repetitions": repetitions,
+        "due_at": now + timedelta(days=interval_days),
+    }
+
+
+def due_query(user_id: int, limit: int, language=None, now=None):
+    now = now or datetime.utcnow()
+    criteria = [VocabEntry.user_id == user_id, VocabEntry.due_at <= now]
+    if language:
+        criteria.append(VocabEntry.target_language == language)
+    return select(VocabEntry).where(*criteria).order_by(VocabEntry.due_at).limit(limit)
+
+
+def due_entries(user_id: int, limit: int, language=None, now=None) -> list:
+    """Up to ``limit`` cards due by ``now``, most overdue first."""
+    return db.session.scalars(due_query(user_id, limit, language, now)).all()
+
+
+def review_words(user_id: int, k: int, language=None) -> list:
+    """Up to ``k`` words to practise: due cards first, topped up with random ones."""
+    words = list(due_entries(user_id, k, language))
+    if len(words) < k:
+        seen = {entry.id for entry in words}
+        extra = [entry for entry in sample_vocab(user_id, k + len(words), language) if entry.id not in seen]
+        words.extend(extra[: k - len(words)])
+    return words
+
+
+def record_reviews(user_id: int, results: dict, now=None) -> int:
+    """Update the review state for ``{vocab_id: correct}``; returns cards updated.
+
+    Reads the current state of the reviewed cards in one query and writes
+    them back with one executemany UPDATE. The caller commits.
+    """
+    if not results:
+        return 0
+    now = now or datetime.utcnow()
+    rows = db.session.execute(
+        select(VocabEntry.id, VocabEntry.ease, VocabEntry.interval_days, VocabEntry.repetitions).where(
+            VocabEntry.user_id == user_id, VocabEntry.id.in_(list(results))
+        )
+    ).all()
+    if not rows:
+        return 0
+    updates = [
+        {
+            "id": row.id,
+            **next_review(
+                row.ease if row.ease is not None else DEFAULT_EASE,
+                row.interval_days or 0,
+                row.repetitions or 0,
+                QUALITY_CORRECT if results[row.id] else QUALITY_INCORRECT,
+                now,
+            ),
+        }
+        for row in rows
+    ]
+    db.session.execute(update(VocabEntry), updates)
+    return len(updates)
@@ -0,0 +1,121 @@
+"""Precomputed starter word sets for "basic" assignments.
+
+The first basic assignment in a language translates the starter words
+concurrently under one deadline and uses whatever arrived in time. Once a
+language is fully translated, the set is stored in ``starter_set``, so every
+later assignment in that language makes no upstream calls at all.
+``flask warm-starter-sets`` builds the sets ahead of time.
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+
+from sqlalchemy.exc import IntegrityError
+
+from . import metrics
+from .extensions import db
+from .models import StarterSet
+from .translation_cache import MISSING, translation_cache
+from .vocab import _translate_upstream
+
+logger = logging.getLogger(__name__)
+
+# Seconds a basic assignment waits for starter word translations.
+STARTER_SET_DEADLINE = float(os.environ.get("STARTER_SET_DEADLINE", "8"))
+
+STARTER_WORDS = ["hello", "thank you", "yes", "no", "please"]
+
+# The learning languages offered in the UI (templates/index.html).
+STARTER_LANGUAGES = [
+    "es", "fr", "de", "it", "pt", "ru", "ja", "ko", "zh", "ar", "hi",
+    "nl", "sv", "pl", "tr", "vi", "th", "he", "cs", "ro", "hu",
+]
+
+# Translations that miss the deadline keep running here and land in the
+# in-memory translation cache when they finish.
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="starter")
+
+
+def _cache_late_result(word: str, language: str, future) -> None:
+    # No app context on the worker thread, so this only fills the in-memory tier.
+    if future.exception() is None:
+        translation_cache.set(word, "auto", language, future.result())
+
+
+def translate_starter_words(language: str, deadline: float = STARTER_SET_DEADLINE) -> dict:
+    """Translate STARTER_WORDS concurrently; returns ``{word: translation or None}``.
+
+    Words still in flight when ``deadline`` passes come back as None.
+    """
+    results = {}
+    futures = {}
+    for word in STARTER_WORDS:
+        cached = translation_cache.get(word, "auto", language)
+        if cached is MISSING:
+            futures[_executor.submit(metrics.bind(_translate_upstream), word, language)] = word
+        else:
+            results[word] = cached
+    if not futures:
+        return results
+
+    done, pending = wait(futures, timeout=deadline)
+    for future in done:
+        word = futures[future]
+        results[word] = future.result()
+        translation_cache.set(word, "auto", language, results[word])
+    for future in pending:
+        word = futures[future]
+        results[word] = None
+        future.add_done_callback(partial(_cache_late_result, word, language))
+    if pending:
+        logger.warning("Starter set for %s: %d word(s) missed the %.1fs deadline", language, len(pending), deadline)
+    return results
+
+
+def get_starter_set(language: str, deadline: float = STARTER_SET_DEADLINE) -> dict:
+    """Return ``{word: translation or None}`` for ``language``, staging it for storage once complete."""
+    stored = db.session.get(StarterSet, language)
+    if stored is not None:
+        return json.loads(stored.words)
+
+    words = translate_starter_words(language, deadline)
+    if all(words.get(word) for word in STARTER_WORDS):
+        save_starter_set(language, words)
+    return words
+
+
+def save_starter_set(language: str, words: dict) -> None:
+    """Stage a set in the caller's transaction; the caller commits.
+
+    A savepoint keeps a lost race from rolling back anything else the
+    caller has pending.
+    """
+    try:
+        with db.session.begin_nested():
+            db.session.merge(StarterSet(language=language, words=json.dumps(words)))
+    except IntegrityError:
+        # Another worker stored the same language first.
+        pass
+
+
+def warm_starter_sets(languages=None, force: bool = False, deadline: float = 30.0) -> dict:
+    """Build and store starter sets; returns ``{language: status}``."""
+    statuses = {}
+    for language in languages or STARTER_LANGUAGES:
+        if not force and db.session.get(StarterSet, language) is not None:
+            statuses[language] = "cached"
+            continue
+        started = time.monotonic()
+        words = translate_starter_words(language, deadline)
+        missing = [word for word in STARTER_WORDS if not words.get(word)]
+        if missing:
+            statuses[language] = f"incomplete ({', '.join(missing)})"
+            continue
+        save_starter_set(language, words)
+        db.session.commit()
+        statuses[language] = f"stored in {time.monotonic() - started:.1f}s"
+    return statuses
@@ -0,0 +1,317 @@
+"""Materialized per-user statistics backing the analytics dashboard.
+
+Write paths call the ``*_created``/``*_updated`` hooks below inside their own
+transaction, after flushing the change, so the counters commit (or roll
+back) together with the row they describe. A user with no ``UserStats`` row
+yet (e.g. one who predates these tables) is backfilled from the source
+tables on their first write or dashboard visit (``backfill_stats``, which
+only inserts missing rows, so racing backfills are harmless) instead of
+starting from zero. ``rebuild_stats`` recomputes everything, and
+``check_stats`` reports any drift.
+"""
+
+from collections import Counter
+from datetime import date, datetime
+
+from sqlalchemy import and_, case, delete, func, insert, literal, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .models import Assignment, Task, User, UserDailyStats, UserLanguageStats, UserStats, VocabEntry
+
+
+def _increment(model, key: dict, **deltas) -> None:
+    """Add ``deltas`` to the row identified by ``key``, creating it if needed."""
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert_fn = sqlite_insert if dialect == "sqlite" else pg_insert
+        stmt = insert_fn(table).values(**key, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: table.c[name] + stmt.excluded[name] for name in deltas},
+        )
+        db.session.execute(stmt)
+        return
+
+    where = and_(*(table.c[name] == value for name, value in key.items()))
+    result = db.session.execute(
+        update(table).where(where).values({name: table.c[name] + value for name, value in deltas.items()})
+    )
+    if result.rowcount == 0:
+        db.session.execute(insert(table).values(**key, **deltas))
+
+
+def _insert_missing(model, rows: list) -> None:
+    """Insert ``rows`` into ``model``'s table, skipping any whose key already exists."""
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert_fn = sqlite_insert if dialect == "sqlite" else pg_insert
+        db.session.execute(insert_fn(table).on_conflict_do_nothing(), rows)
+        return
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(table).values(**row))
+        except IntegrityError:
+            pass
+
+
+def backfill_stats(user_id: int, changes=()) -> None:
+    """Create ``user_id``'s stats rows as they stood before ``changes``.
+
+    ``changes`` are the ``(model, key, deltas)`` the caller is about to apply;
+    the source rows already include them (they are flushed first), so they
+    are subtracted here. Rows are inserted only where none exist yet, so
+    when two first writes race, the first backfill wins and both deltas
+    still land exactly once.
+    """
+    db.session.flush()
+    for model, expected in _EXPECTED.items():
+        columns = _COLUMNS[model]
+        key_size = 1 if model is UserStats else 2
+        rows = {}
+        for row in db.session.execute(expected(user_id)):
+            values = dict(zip(columns, row))
+            if isinstance(values.get("day"), str):
+                values["day"] = date.fromisoformat(values["day"])
+            rows[tuple(values[name] for name in columns[:key_size])] = values
+        for change_model, key, deltas in changes:
+            if change_model is not model:
+                continue
+            values = rows.setdefault(
+                tuple(key[name] for name in columns[:key_size]),
+                {**key, **{name: 0 for name in columns[key_size:]}},
+            )
+            for name, delta in deltas.items():
+                values[name] -= delta
+        if rows:
+            _insert_missing(model, list(rows.values()))
+
+
+def _apply(user_id: int, changes: list) -> None:
+    """Apply ``[(model, key, deltas)]`` for a user, backfilling their stats first if they have none."""
+    if db.session.get(UserStats, user_id) is None:
+        backfill_stats(user_id, changes)
+    for model, key, deltas in changes:
+        _increment(model, key, **deltas)
+
+
+def _day(created_at):
+    return (created_at or datetime.utcnow()).date()
+
+
+# -- write-path hooks --------------------------------------------------------
+
+def task_created(task: Task) -> None:
+    _apply(task.user_id, [
+        (UserStats, {"user_id": task.user_id}, {"tasks_total": 1, "tasks_completed": int(bool(task.is_completed))}),
+        (UserDailyStats, {"user_id": task.user_id, "day": _day(task.created_at)}, {"tasks_created": 1}),
+    ])
+
+
+def task_updated(task: Task, was_completed: bool) -> None:
+    delta = int(bool(task.is_completed)) - int(bool(was_completed))
+    _apply(task.user_id, [(UserStats, {"user_id": task.user_id}, {"tasks_completed": delta})])
+
+
+def task_deleted(task: Task) -> None:
+    changes = [
+        (UserStats, {"user_id": task.user_id}, {"tasks_total": -1, "tasks_completed": -int(bool(task.is_completed))}),
+    ]
+    if task.created_at is not None:
+        changes.append((UserDailyStats, {"user_id": task.user_id, "day": task.created_at.date()}, {"tasks_created": -1}))
+    _apply(task.user_id, changes)
+
+
+def vocab_added(entries) -> None:
+    """Record one or more new VocabEntry rows (all belonging to the same user)."""
+    entries = list(entries)
+    if not entries:
+        return
+    user_id = entries[0].user_id
+    changes = [(UserStats, {"user_id": user_id}, {"vocab_total": len(entries)})]
+    for language, count in Counter(entry.target_language for entry in entries).items():
+        changes.append((UserLanguageStats, {"user_id": user_id, "language": language}, {"vocab_count": count}))
+    for day, count in Counter(_day(entry.created_at) for entry in entries).items():
+        changes.append((UserDailyStats, {"user_id": user_id, "day": day}, {"vocab_created": count}))
+    _apply(user_id, changes)
+
+
+def assignment_created(assignment: Assignment) -> None:
+    _apply(assignment.user_id, [(UserStats, {"user_id": assignment.user_id}, {"assignments_total": 1})])
+
+
+def assignment_completed(assignment: Assignment) -> None:
+    scored = assignment.score is not None
+    _apply(assignment.user_id, [(
+        UserStats,
+        {"user_id": assignment.user_id},
+        {
+            "assignments_completed": 1,
+            "assignment_score_sum": assignment.score if scored else 0,
+            "assignment_score_count": int(scored),
+        },
+    )])
+
+
+# -- reads -------------------------------------------------------------------
+
+def vocab_count(user_id: int, language=None) -> int:
+    """Number of vocab entries for a user (optionally one language), from the stats tables.
+
+    Per-language rows are only trusted once the user has a ``UserStats`` row
+    (their stats were built in full, so a missing language means none);
+    before that the count comes from a COUNT on the source table.
+    """
+    totals = db.session.get(UserStats, user_id)
+    if totals is not None:
+        if not language:
+            return totals.vocab_total
+        row = db.session.get(UserLanguageStats, (user_id, language))
+        return row.vocab_count if row is not None else 0
+    criteria = [VocabEntry.user_id == user_id]
+    if language:
+        criteria.append(VocabEntry.target_language == language)
+    return db.session.scalar(select(func.count()).select_from(VocabEntry).where(*criteria))
+
+
+# -- backfill and consistency ------------------------------------------------
+
+def _user_filter(column, user_id):
+    return [column == user_id] if user_id is not None else []
+
+
+def _expected_totals(user_id=None):
+    completed = lambda column: func.coalesce(func.sum(case((column == True, 1), else_=0)), 0)  # noqa: E731
+    tasks = (
+        select(Task.user_id, func.count().label("total"), completed(Task.is_completed).label("completed"))
+        .where(*_user_filter(Task.user_id, user_id))
+        .group_by(Task.user_id)
+        .subquery()
+    )
+    vocab = (
+        select(VocabEntry.user_id, func.count().label("total"))
+        .where(*_user_filter(VocabEntry.user_id, user_id))
+        .group_by(VocabEntry.user_id)
+        .subquery()
+    )
+    scored = and_(Assignment.is_completed == True, Assignment.score.isnot(None))
+    assignments = (
+        select(
+            Assignment.user_id,
+            func.count().label("total"),
+            completed(Assignment.is_completed).label("completed"),
+            func.coalesce(func.sum(case((scored, Assignment.score), else_=0)), 0).label("score_sum"),
+            func.coalesce(func.sum(case((scored, 1), else_=0)), 0).label("score_count"),
+        )
+        .where(*_user_filter(Assignment.user_id, user_id))
+        .group_by(Assignment.user_id)
+        .subquery()
+    )
+    return (
+        select(
+            User.id.label("user_id"),
+            func.coalesce(tasks.c.total, 0).label("tasks_total"),
+            func.coalesce(tasks.c.completed, 0).label("tasks_completed"),
+            func.coalesce(vocab.c.total, 0).label("vocab_total"),
+            func.coalesce(assignments.c.total, 0).label("assignments_total"),
+            func.coalesce(assignments.c.completed, 0).label("assignments_completed"),
+            func.coalesce(assignments.c.score_sum, 0).label("assignment_score_sum"),
+            func.coalesce(assignments.c.score_count, 0).label("assignment_score_count"),
+        )
+        .outerjoin(tasks, tasks.c.user_id == User.id)
+        .outerjoin(vocab, vocab.c.user_id == User.id)
+        .outerjoin(assignments, assignments.c.user_id == User.id)
+        .where(*_user_filter(User.id, user_id))
+    )
+
+
+def _expected_languages(user_id=None):
+    return (
+        select(VocabEntry.user_id, VocabEntry.target_language.label("language"), func.count().label("vocab_count"))
+        .where(*_user_filter(VocabEntry.user_id, user_id))
+        .group_by(VocabEntry.user_id, VocabEntry.target_language)
+    )
+
+
+def _expected_days(user_id=None):
+    created = union_all(
+        select(Task.user_id, func.date(Task.created_at).label("day"),
+               literal(1).label("tasks"), literal(0).label("vocab"))
+        .where(Task.created_at.isnot(None), *_user_filter(Task.user_id, user_id)),
+        select(VocabEntry.user_id, func.date(VocabEntry.created_at), literal(0), literal(1))
+        .where(VocabEntry.created_at.isnot(None), *_user_filter(VocabEntry.user_id, user_id)),
+    ).subquery()
+    return select(
+        created.c.user_id,
+        created.c.day,
+        func.sum(created.c.tasks).label("tasks_created"),
+        func.sum(created.c.vocab).label("vocab_created"),
+    ).group_by(created.c.user_id, created.c.day)
+
+
+_COLUMNS = {
+    UserStats: ["user_id", "tasks_total", "tasks_completed", "vocab_total", "assignments_total",
+                "assignments_completed", "assignment_score_sum", "assignment_score_count"],
+    UserLanguageStats: ["user_id", "language", "vocab_count"],
+    UserDailyStats: ["user_id", "day", "tasks_created", "vocab_created"],
+}
+
+_EXPECTED = {
+    UserStats: _expected_totals,
+    UserLanguageStats: _expected_languages,
+    UserDailyStats: _expected_days,
+}
+
+
+def rebuild_stats(user_id=None) -> None:
+    """Recompute the stats tables from source rows (one user, or everyone).
+
+    Runs as set-based ``INSERT ... SELECT`` statements; the caller commits.
+    """
+    for model, expected in _EXPECTED.items():
+        db.session.execute(delete(model).where(*_user_filter(model.user_id, user_id)))
+        db.session.execute(insert(model).from_select(_COLUMNS[model], expected(user_id)))
+
+
+def check_stats(user_id=None) -> list:
+    """Compare materialized stats with a fresh aggregate; returns mismatch descriptions."""
+    problems = []
+    for model, expected in _EXPECTED.items():
+        columns = _COLUMNS[model]
+        key_size = 1 if model is UserStats else 2
+
+        def keyed(rows):
+            out = {}
+            for row in rows:
+                values = [str(value) if name == "day" else value for name, value in zip(columns, row)]
+                out[tuple(values[:key_size])] = tuple(values[key_size:])
+            return out
+
+        want = keyed(db.session.execute(expected(user_id)).all())
+        have = keyed(
+            db.session.execute(
+                select(*(model.__table__.c[name] for name in columns)).where(*_user_filter(model.user_id, user_id))
+            ).all()
+        )
+        zero = lambda values: all(not value for value in values)  # noqa: E731
+        for key in sorted(set(want) | set(have), key=str):
+            expected_values = want.get(key)
+            actual_values = have.get(key)
+            if expected_values is None and actual_values is not None and zero(actual_values):
+                continue  # a row decremented back to zero is fine
+            if expected_values is not None and actual_values is not None and all(
+                abs((a or 0) - (b or 0)) < 1e-6 for a, b in zip(expected_values, actual_values)
+            ):
+                continue
+            problems.append(
+                f"{model.__tablename__} {dict(zip(columns, key))}: expected {expected_values}, found {actual_values}"
+            )
+    return problems
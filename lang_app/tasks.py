@@ -3,31 +3,26 @@ from datetime import datetime
 from flask import Blueprint, jsonify, request
 from flask_login import current_user, login_required
 
+from . import response_cache, stats
 from .extensions import db
 from .models import Task
+from .pagination import as_is, isoformat, list_response
 
 tasks_bp = Blueprint("tasks", __name__)
 
+TASK_FIELDS = {
+    "id": (Task.id, as_is),
+    "name": (Task.name, as_is),
+    "due_date": (Task.due_date, isoformat),
+    "is_completed": (Task.is_completed, as_is),
+}
+
 
 @tasks_bp.route("/", methods=["GET"])
 @login_required
 def list_tasks():
-    tasks = (
-        Task.query.filter_by(user_id=current_user.id)
-        .order_by(Task.created_at.desc())
-        .all()
-    )
-    return jsonify(
-        [
-            {
-                "id": task.id,
-                "name": task.name,
-                "due_date": task.due_date.isoformat() if task.due_date else None,
-                "is_completed": task.is_completed,
-            }
-            for task in tasks
-        ]
-    )
+    """List the user's tasks, newest first (supports limit/cursor/fields)."""
+    return list_response(Task, [Task.user_id == current_user.id], TASK_FIELDS)
 
 
 @tasks_bp.route("/", methods=["POST"])
@@ -48,7 +43,10 @@ def create_task():
 
     task = Task(user_id=current_user.id, name=name, due_date=due_date)
     db.session.add(task)
+    db.session.flush()
+    stats.task_created(task)
     db.session.commit()
+    response_cache.bump(current_user.id)
     return jsonify({"message": "Task created", "id": task.id}), 201
 
 
@@ -57,6 +55,7 @@ def create_task():
 def update_task(task_id):
     task = Task.query.filter_by(id=task_id, user_id=current_user.id).first_or_404()
     data = request.get_json() or {}
+    was_completed = task.is_completed
 
     if "name" in data:
         task.name = data["name"].strip()
@@ -71,7 +70,9 @@ def update_task(task_id):
     if "is_completed" in data:
         task.is_completed = bool(data["is_completed"])
 
+    stats.task_updated(task, was_completed)
     db.session.commit()
+    response_cache.bump(current_user.id)
     return jsonify({"message": "Task updated"})
 
 
@@ -80,6 +81,9 @@ def update_task(task_id):
 def delete_task(task_id):
     task = Task.query.filter_by(id=task_id, user_id=current_user.id).first_or_404()
     db.session.delete(task)
+    db.session.flush()
+    stats.task_deleted(task)
     db.session.commit()
+    response_cache.bump(current_user.id)
     return jsonify({"message": "Task deleted"})
 
@@ -0,0 +1,229 @@
+"""Two-tier cache for translate_word lookups.
+
+Tier 1 is a bounded in-process LRU, tier 2 is the ``cached_translation`` SQL
+table so results survive restarts and are shared between gunicorn workers.
+Failed lookups are cached too (as ``None``) with a much shorter TTL so a dead
+upstream is not hammered for the same word.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import has_app_context
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from .extensions import db
+from .models import CachedTranslation
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_CACHE_SIZE = int(os.environ.get("TRANSLATION_CACHE_SIZE", "10000"))
+TRANSLATION_CACHE_TTL = int(os.environ.get("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600)))
+TRANSLATION_CACHE_NEGATIVE_TTL = int(os.environ.get("TRANSLATION_CACHE_NEGATIVE_TTL", "300"))
+
+# Sentinel returned by ``get`` when nothing (not even a failure) is cached.
+MISSING = object()
+
+
+class TranslationCache:
+    """(text, source, target)-keyed cache with an LRU tier and a SQL tier."""
+
+    def __init__(self, max_entries: int, ttl: int, negative_ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "db_hits": 0, "negative_hits": 0, "misses": 0}
+
+    def get(self, text: str, source: str, target: str):
+        """Return the cached translation, ``None`` for a cached failure, or MISSING."""
+        key = (text, source, target)
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                value, expires_at = item
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._count("negative_hits" if value is None else "memory_hits")
+                    return value
+                del self._entries[key]
+
+        row = self._db_get(key)
+        if row is not None:
+            value, expires_at = row
+            self._remember(key, value, expires_at)
+            with self._lock:
+                self._count("negative_hits" if value is None else "db_hits")
+            return value
+
+        with self._lock:
+            self._count("misses")
+        return MISSING
+
+    def set(self, text: str, source: str, target: str, value) -> None:
+        """Cache a translation, or a failure when ``value`` is None."""
+        key = (text, source, target)
+        ttl = self.ttl if value is not None else self.negative_ttl
+        expires_at = time.time() + ttl
+        self._remember(key, value, expires_at)
+        self._db_set(key, value, expires_at)
+
+    def set_many(self, source: str, target: str, values: dict) -> None:
+        """Cache ``{text: translation or None}`` with one SQL transaction for all of them."""
+        now = time.time()
+        rows = {}
+        for text, value in values.items():
+            expires_at = now + (self.ttl if value is not None else self.negative_ttl)
+            self._remember((text, source, target), value, expires_at)
+            rows[text] = (value, expires_at)
+        if rows:
+            self._db_set_many(source, target, rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+        hits = stats["memory_hits"] + stats["db_hits"] + stats["negative_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_ratio"] = round(hits / lookups, 4) if lookups else None
+        return stats
+
+    def clear(self) -> None:
+        """Drop the in-process tier and reset counters (SQL rows are kept)."""
+        with self._lock:
+            self._entries.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def _count(self, name: str) -> None:
+        self._counters[name] += 1
+
+    def _remember(self, key, value, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # The SQL tier runs on its own connection so that caching never commits
+    # (or rolls back) whatever the request's session is in the middle of.
+
+    def _db_get(self, key):
+        if not has_app_context():
+            return None
+        text, source, target = key
+        stmt = select(CachedTranslation.translated_text, CachedTranslation.expires_at).where(
+            CachedTranslation.source_text == text,
+            CachedTranslation.source_language == source,
+            CachedTranslation.target_language == target,
+        )
+        try:
+            with db.engine.connect() as conn:
+                row = conn.execute(stmt).first()
+        except SQLAlchemyError as e:
+            logger.warning("Translation cache read failed: %s", e)
+            return None
+        if row is None or row.expires_at <= datetime.utcnow():
+            return None
+        remaining = (row.expires_at - datetime.utcnow()).total_seconds()
+        return row.translated_text, time.time() + remaining
+
+    def _db_set(self, key, value, expires_at: float) -> None:
+        if not has_app_context():
+            return
+        text, source, target = key
+        expires = datetime.utcnow() + timedelta(seconds=expires_at - time.time())
+        where = (
+            CachedTranslation.source_text == text,
+            CachedTranslation.source_language == source,
+            CachedTranslation.target_language == target,
+        )
+        try:
+            with db.engine.begin() as conn:
+                result = conn.execute(
+                    update(CachedTranslation)
+                    .where(*where)
+                    .values(translated_text=value, expires_at=expires)
+                )
+                if result.rowcount == 0:
+                    conn.execute(
+                        insert(CachedTranslation).values(
+                            source_text=text,
+                            source_language=source,
+                            target_language=target,
+                            translated_text=value,
+                            expires_at=expires,
+                            created_at=datetime.utcnow(),
+                        )
+                    )
+        except IntegrityError:
+            # Another worker stored the same key concurrently; theirs is as good as ours.
+            pass
+        except SQLAlchemyError as e:
+            logger.warning("Translation cache write failed: %s", e)
+
+    def _db_set_many(self, source: str, target: str, rows: dict) -> None:
+        """Upsert ``{text: (value, expires_at)}``: one SELECT, one executemany UPDATE and one INSERT."""
+        if not has_app_context():
+            return
+        now = datetime.utcnow()
+        values = {
+            text: (value, now + timedelta(seconds=expires_at - time.time()))
+            for text, (value, expires_at) in rows.items()
+        }
+        table = CachedTranslation.__table__
+        try:
+            with db.engine.begin() as conn:
+                existing = dict(
+                    conn.execute(
+                        select(CachedTranslation.source_text, CachedTranslation.id).where(
+                            CachedTranslation.source_text.in_(list(values)),
+                            CachedTranslation.source_language == source,
+                            CachedTranslation.target_language == target,
+                        )
+                    ).all()
+                )
+                if existing:
+                    conn.execute(
+                        update(table)
+                        .where(table.c.id == bindparam("row_id"))
+                        .values(translated_text=bindparam("value"), expires_at=bindparam("expires")),
+                        [
+                            {"row_id": row_id, "value": values[text][0], "expires": values[text][1]}
+                            for text, row_id in existing.items()
+                        ],
+                    )
+                new = [text for text in values if text not in existing]
+                if new:
+                    conn.execute(
+                        insert(CachedTranslation),
+                        [
+                            {
+                                "source_text": text,
+                                "source_language": source,
+                                "target_language": target,
+                                "translated_text": values[text][0],
+                                "expires_at": values[text][1],
+                                "created_at": now,
+                            }
+                            for text in new
+                        ],
+                    )
+        except IntegrityError:
+            # Another worker stored some of these keys concurrently; fall back to per-key upserts.
+            for text, (value, expires_at) in rows.items():
+                self._db_set((text, source, target), value, expires_at)
+        except SQLAlchemyError as e:
+            logger.warning("Translation cache write failed: %s", e)
+
+
+translation_cache = TranslationCache(
+    TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL, TRANSLATION_CACHE_NEGATIVE_TTL
+)
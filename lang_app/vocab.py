@@ -1,39 +1,74 @@
+import csv
+import io
+import json
+import logging
 import os
-from random import sample
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
-import requests
 from flask import Blueprint, jsonify, request
 from flask_login import current_user, login_required
 
+from . import event_buffer, metrics, response_cache, stats
+from .endpoint_pool import EndpointPool
 from .extensions import db
 from .models import VocabEntry
+from .pagination import as_is, list_response
+from .sampling import sample_vocab
+from .scheduler import due_entries
+from .translation_cache import MISSING, translation_cache
 
 vocab_bp = Blueprint("vocab", __name__)
+logger = logging.getLogger(__name__)
+
+VOCAB_FIELDS = {
+    "id": (VocabEntry.id, as_is),
+    "source_word": (VocabEntry.source_word, as_is),
+    "target_language": (VocabEntry.target_language, as_is),
+    "translated_word": (VocabEntry.translated_word, as_is),
+}
 
 LIBRE_TRANSLATE_URL = os.environ.get(
     "LIBRE_TRANSLATE_URL", "https://libretranslate.de/translate"
 )
+# Public instances tried after LIBRE_TRANSLATE_URL (comma-separated; empty disables).
+LIBRE_TRANSLATE_FALLBACK_URLS = [
+    url.strip()
+    for url in os.environ.get(
+        "LIBRE_TRANSLATE_FALLBACK_URLS", "https://libretranslate.com/translate,https://libretranslate.de/translate"
+    ).split(",")
+    if url.strip()
+]
+# Upstream routing: per-call timeout, overall budget per translation, delay before
+# a hedged request goes to a second endpoint (0 disables hedging), breaker tuning.
+TRANSLATE_TIMEOUT = float(os.environ.get("TRANSLATE_TIMEOUT", "15"))
+TRANSLATE_BUDGET = float(os.environ.get("TRANSLATE_BUDGET", "20"))
+TRANSLATE_HEDGE_AFTER = float(os.environ.get("TRANSLATE_HEDGE_AFTER", "2"))
+TRANSLATE_BREAKER_THRESHOLD = int(os.environ.get("TRANSLATE_BREAKER_THRESHOLD", "3"))
+TRANSLATE_BREAKER_COOLDOWN = float(os.environ.get("TRANSLATE_BREAKER_COOLDOWN", "30"))
+# Bulk import limits: words per request, words per upstream call, upstream calls in flight.
+VOCAB_BATCH_MAX_WORDS = int(os.environ.get("VOCAB_BATCH_MAX_WORDS", "1000"))
+TRANSLATE_BATCH_SIZE = int(os.environ.get("TRANSLATE_BATCH_SIZE", "50"))
+TRANSLATE_CONCURRENCY = int(os.environ.get("TRANSLATE_CONCURRENCY", "8"))
+# Cards returned by GET /review by default and at most.
+REVIEW_DEFAULT_LIMIT = 10
+REVIEW_MAX_LIMIT = 50
+
+translation_endpoints = EndpointPool(
+    [LIBRE_TRANSLATE_URL, *LIBRE_TRANSLATE_FALLBACK_URLS],
+    timeout=TRANSLATE_TIMEOUT,
+    budget=TRANSLATE_BUDGET,
+    hedge_after=TRANSLATE_HEDGE_AFTER,
+    failure_threshold=TRANSLATE_BREAKER_THRESHOLD,
+    cooldown=TRANSLATE_BREAKER_COOLDOWN,
+)
 
 
 @vocab_bp.route("/", methods=["GET"])
 @login_required
 def list_vocab():
-    entries = (
-        VocabEntry.query.filter_by(user_id=current_user.id)
-        .order_by(VocabEntry.created_at.desc())
-        .all()
-    )
-    return jsonify(
-        [
-            {
-                "id": entry.id,
-                "source_word": entry.source_word,
-                "target_language": entry.target_language,
-                "translated_word": entry.translated_word,
-            }
-            for entry in entries
-        ]
-    )
+    """List the user's vocabulary, newest first (supports limit/cursor/fields)."""
+    return list_response(VocabEntry, [VocabEntry.user_id == current_user.id], VOCAB_FIELDS)
 
 
 @vocab_bp.route("/", methods=["POST"])
@@ -45,10 +80,7 @@ def add_vocab():
     if not source_word or not target_language:
         return jsonify({"error": "source_word and target_language are required"}), 400
 
-    # Log the translation attempt for debugging
-    print(f"[VOCAB] Attempting to translate '{source_word}' to {target_language}")
-
-    translated_word = translate_word(source_word, target_language)
+    translated_word = _usable_translation(translate_word(source_word, target_language))
     
     if translated_word is None:
         error_msg = (
@@ -59,11 +91,9 @@ def add_vocab():
             "- Unsupported language pair\n"
             "Please check your internet connection and try again."
         )
-        print(f"[VOCAB] Translation failed: {error_msg}")
+        logger.warning("Translation failed for %r to %s", source_word, target_language)
         return jsonify({"error": error_msg}), 502
 
-    print(f"[VOCAB] Successfully translated '{source_word}' → '{translated_word}'")
-
     entry = VocabEntry(
         user_id=current_user.id,
         source_word=source_word,
@@ -71,17 +101,125 @@ def add_vocab():
         translated_word=translated_word,
     )
     db.session.add(entry)
+    db.session.flush()
+    stats.vocab_added([entry])
     db.session.commit()
+    response_cache.bump(current_user.id)
+    event_buffer.record(
+        "activity_events",
+        {
+            "type": "vocab_added",
+            "user_id": current_user.id,
+            "vocab_id": entry.id,
+            "target_language": target_language,
+            "timestamp": datetime.utcnow(),
+        },
+    )
     return jsonify({"message": "Added", "id": entry.id, "translated": translated_word})
 
 
+@vocab_bp.route("/batch", methods=["POST"])
+@login_required
+def add_vocab_batch():
+    """Import many words at once.
+
+    Accepts JSON ``{"words": [...], "target_language": "es"}`` or a multipart
+    upload with a ``file`` (CSV with one word per row, or a JSON list) and a
+    ``target_language`` form field. Returns a result for every submitted word.
+    """
+    if "file" in request.files:
+        target_language = request.form.get("target_language", "").strip()
+        try:
+            words = _parse_word_upload(request.files["file"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    else:
+        data = request.get_json() or {}
+        target_language = data.get("target_language", "").strip()
+        words = data.get("words")
+        if not isinstance(words, list) or not all(isinstance(word, str) for word in words):
+            return jsonify({"error": "words must be a list of strings"}), 400
+
+    if not target_language:
+        return jsonify({"error": "target_language is required"}), 400
+
+    words = [str(word).strip() for word in words if str(word).strip()]
+    if not words:
+        return jsonify({"error": "No words to import"}), 400
+    if len(words) > VOCAB_BATCH_MAX_WORDS:
+        return jsonify({"error": f"At most {VOCAB_BATCH_MAX_WORDS} words per import"}), 400
+
+    unique_words = list(dict.fromkeys(words))
+    logger.info("Batch translating %s word(s) to %s", len(unique_words), target_language)
+    translations = translate_words(unique_words, target_language)
+
+    entries = {
+        word: VocabEntry(
+            user_id=current_user.id,
+            source_word=word,
+            target_language=target_language,
+            translated_word=translations[word],
+        )
+        for word in unique_words
+        if _usable_translation(translations.get(word)) is not None
+    }
+    if entries:
+        db.session.add_all(entries.values())
+        db.session.flush()
+        stats.vocab_added(entries.values())
+        db.session.commit()
+        response_cache.bump(current_user.id)
+
+    results = []
+    seen = set()
+    for word in words:
+        if word in seen:
+            results.append({"source_word": word, "status": "duplicate"})
+            continue
+        seen.add(word)
+        entry = entries.get(word)
+        if entry is None:
+            results.append({"source_word": word, "status": "failed", "error": "Translation failed"})
+        else:
+            results.append(
+                {"source_word": word, "status": "added", "id": entry.id, "translated": entry.translated_word}
+            )
+
+    body = {
+        "message": f"Added {len(entries)} of {len(unique_words)} word(s)",
+        "added": len(entries),
+        "failed": len(unique_words) - len(entries),
+        "duplicates": len(words) - len(unique_words),
+        "results": results,
+    }
+    return jsonify(body), (200 if entries else 502)
+
+
+def _parse_word_upload(upload):
+    """Read words from an uploaded CSV (first column) or JSON list."""
+    raw = upload.read().decode("utf-8-sig")
+    if (upload.filename or "").lower().endswith(".json") or upload.mimetype == "application/json":
+        try:
+            items = json.loads(raw)
+        except ValueError:
+            raise ValueError("Uploaded file is not valid JSON")
+        if not isinstance(items, list):
+            raise ValueError("JSON upload must be a list of words")
+        words = [item.get("source_word", "") if isinstance(item, dict) else item for item in items]
+        if not all(isinstance(word, str) for word in words):
+            raise ValueError("Every word in the JSON upload must be a string")
+        return words
+
+    rows = [row for row in csv.reader(io.StringIO(raw)) if row]
+    if rows and rows[0][0].strip().lower() in ("word", "source_word"):
+        rows = rows[1:]
+    return [row[0] for row in rows]
+
+
 @vocab_bp.route("/quiz", methods=["GET"])
 @login_required
 def quiz():
-    entries = VocabEntry.query.filter_by(user_id=current_user.id).all()
-    if not entries:
-        return jsonify({"questions": []})
-    questions = sample(entries, min(len(entries), 5))
+    questions = sample_vocab(current_user.id, 5)
     return jsonify(
         {
             "questions": [
@@ -97,63 +235,108 @@ def quiz():
     )
 
 
-def translate_word(text: str, target_language: str):
-    """Translate using a LibreTranslate-compatible API."""
-    # Try multiple API endpoints
-    api_endpoints = [
-        LIBRE_TRANSLATE_URL,
-        "https://libretranslate.com/translate",
-        "https://libretranslate.de/translate"
-    ]
-    
-    payload = {"q": text, "source": "auto", "target": target_language}
-    headers = {"Content-Type": "application/json"}
-    
-    # Try each endpoint
-    for endpoint in api_endpoints:
-        try:
-            # Try JSON format
-            response = requests.post(endpoint, json=payload, headers=headers, timeout=15)
-            
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                    translated = data.get("translatedText")
-                    if translated:
-                        return translated
-                except ValueError:
-                    # Response is not JSON
-                    pass
-            
-            # If JSON failed, try form data
-            response = requests.post(endpoint, data=payload, timeout=15)
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                    translated = data.get("translatedText")
-                    if translated:
-                        return translated
-                except ValueError:
-                    pass
-            
-            # Log non-200 responses
-            if response.status_code != 200:
-                print(f"Translation failed on {endpoint}: Status {response.status_code}, Response: {response.text[:200]}")
-                
-        except requests.exceptions.Timeout:
-            print(f"Translation timeout on {endpoint} for '{text}' to {target_language}")
-            continue
-        except requests.exceptions.ConnectionError:
-            print(f"Translation connection error on {endpoint} for '{text}' to {target_language}")
-            continue
-        except requests.RequestException as e:
-            print(f"Translation error on {endpoint}: {str(e)}")
-            continue
-        except Exception as e:
-            print(f"Unexpected translation error on {endpoint}: {str(e)}")
-            continue
-    
-    # If all endpoints failed, try a simple fallback translation dictionary
-    print(f"All translation endpoints failed for '{text}' to {target_language}")
-    return None
+@vocab_bp.route("/review", methods=["GET"])
+@login_required
+def review():
+    """Next cards due for review, most overdue first (``limit``, optional ``language``)."""
+    try:
+        limit = int(request.args.get("limit", REVIEW_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, REVIEW_MAX_LIMIT))
+    cards = due_entries(current_user.id, limit, request.args.get("language") or None)
+    return jsonify(
+        {
+            "cards": [
+                {
+                    "id": entry.id,
+                    "source_word": entry.source_word,
+                    "target_language": entry.target_language,
+                    "answer": entry.translated_word,
+                    "due_at": entry.due_at.isoformat() if entry.due_at else None,
+                    "interval_days": entry.interval_days,
+                    "repetitions": entry.repetitions,
+                }
+                for entry in cards
+            ]
+        }
+    )
+
+
+def translate_word(text: str, target_language: str, source_language: str = "auto"):
+    """Translate using a LibreTranslate-compatible API, going through the cache.
+
+    Returns None when every endpoint failed; failures are cached briefly too.
+    """
+    cached = translation_cache.get(text, source_language, target_language)
+    if cached is not MISSING:
+        return cached
+
+    translated = _usable_translation(_translate_upstream(text, target_language, source_language))
+    translation_cache.set(text, source_language, target_language, translated)
+    return translated
+
+
+def translate_words(texts, target_language: str, source_language: str = "auto") -> dict:
+    """Translate many strings; returns ``{text: translation or None}``.
+
+    Cache hits are answered locally. Misses go upstream in chunks of
+    TRANSLATE_BATCH_SIZE (LibreTranslate accepts a list for ``q``) with up to
+    TRANSLATE_CONCURRENCY requests in flight; words from chunks the upstream
+    rejects are retried one by one.
+    """
+    results = {}
+    misses = []
+    for text in dict.fromkeys(texts):
+        cached = translation_cache.get(text, source_language, target_language)
+        if cached is MISSING:
+            misses.append(text)
+        else:
+            results[text] = cached
+    if not misses:
+        return results
+
+    chunks = [misses[i:i + TRANSLATE_BATCH_SIZE] for i in range(0, len(misses), TRANSLATE_BATCH_SIZE)]
+    leftovers = []
+    with ThreadPoolExecutor(max_workers=TRANSLATE_CONCURRENCY) as pool:
+        batched = pool.map(
+            metrics.bind(
+                lambda chunk: _translate_upstream(chunk, target_language, source_language)
+                if len(chunk) > 1 else None
+            ),
+            chunks,
+        )
+        for chunk, translated in zip(chunks, batched):
+            if isinstance(translated, list) and len(translated) == len(chunk):
+                # Empty items become None, a short-lived negative cache entry.
+                results.update((text, _usable_translation(item)) for text, item in zip(chunk, translated))
+            else:
+                leftovers.extend(chunk)
+
+        singles = pool.map(
+            metrics.bind(lambda text: _translate_upstream(text, target_language, source_language)),
+            leftovers,
+        )
+        results.update((text, _usable_translation(item)) for text, item in zip(leftovers, singles))
+
+    # Cache writes need the app context, so they happen back on this thread.
+    translation_cache.set_many(source_language, target_language, {text: results[text] for text in misses})
+    return results
+
+
+def _usable_translation(value):
+    """``value`` if it is a non-blank string, else None (a failed translation)."""
+    return value if isinstance(value, str) and value.strip() else None
+
+
+def _translate_upstream(text, target_language: str, source_language: str = "auto"):
+    """Translate using a LibreTranslate-compatible API.
+
+    ``text`` may also be a list, in which case the API returns a list.
+    """
+    payload = {"q": text, "source": source_language, "target": target_language}
+    translated = translation_endpoints.translate(payload)
+    if translated is None:
+        logger.warning("All translation endpoints failed for %r to %s", text, target_language)
+    return translated
 